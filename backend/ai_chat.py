@@ -10,6 +10,7 @@ from typing import Dict, Any, List, Optional
 import logging
 import json
 from .gemini_client import gemini_client
+from .metrics import metrics_collector
 
 class RealAIChat:
     """
@@ -47,6 +48,7 @@ Always provide substantive, research-focused responses that demonstrate your adv
         # Conversation history storage
         self.conversations = {}
     
+    @metrics_collector.timed('ai_chat.chat')
     def chat(self, message: str, user_id: str = "mayo", session_id: Optional[str] = None, character: str = "research-scientist") -> Dict[str, Any]:
         """
         Process chat message and return AI response using Gemini CLI
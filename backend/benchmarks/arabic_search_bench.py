@@ -0,0 +1,165 @@
+"""
+Bilingual search benchmark: LIKE substring matching (plain, and OR-expanded
+over spelling variants) vs the normalized search-term index, on a synthetic
+Arabic / English corpus whose Arabic words carry random diacritics, tatweel,
+alef / hamza / teh marbuta variants and article prefixes.
+
+Usage:
+    python -m backend.benchmarks.arabic_search_bench [rows] [repeats]
+"""
+
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Set
+from flask import Flask
+from src.models.knowledge_base import db, KnowledgeEntry
+import src.models.knowledge_models  # noqa: F401 - registers search_terms
+from backend.search_index import search_index, KNOWLEDGE
+
+ARABIC_WORDS = ['مدرسة', 'كتاب', 'طبيب', 'صحة', 'علم', 'قلب', 'دواء', 'أمل', 'إيمان', 'قرآن',
+                'سلام', 'رحمة', 'مستشفى', 'أسرة', 'صلاة', 'شفاء', 'عافية', 'إسلام', 'مؤمن', 'سؤال']
+ENGLISH_WORDS = ['medicine', 'wellness', 'research', 'quantum', 'biology', 'market', 'strategy',
+                 'prayer', 'balance', 'innovation', 'patient', 'heart', 'school', 'hope', 'faith']
+
+HARAKAT = ['\u064e', '\u064f', '\u0650', '\u0652', '\u0651', '\u064b']  # fatha, damma, kasra, sukun, shadda, tanwin
+PREFIXES = ['', '', 'ال', 'وال', 'بال', 'لل', 'كال']
+ALEF_FORMS = ['ا', 'أ', 'إ', 'آ']
+
+
+def _variant(word: str, rng: random.Random) -> str:
+    """Spell an Arabic word the way mixed-source text does"""
+    if word[0] in ALEF_FORMS and rng.random() < 0.5:
+        word = rng.choice(ALEF_FORMS) + word[1:]
+    if word.endswith('ة') and rng.random() < 0.3:
+        word = word[:-1] + 'ه'
+    if word.endswith('ى') and rng.random() < 0.3:
+        word = word[:-1] + 'ي'
+    if rng.random() < 0.4:
+        word = ''.join(letter + (rng.choice(HARAKAT) if rng.random() < 0.5 else '') for letter in word)
+    if rng.random() < 0.2:
+        position = rng.randint(1, len(word) - 1)
+        word = word[:position] + '\u0640' * rng.randint(1, 3) + word[position:]
+    return rng.choice(PREFIXES) + word
+
+
+def _create_app() -> Flask:
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def _seed(rows: int) -> Dict[str, Set[int]]:
+    """Insert the corpus and return, per vocabulary word, the ids of the entries containing it"""
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    truth: Dict[str, Set[int]] = {word: set() for word in ARABIC_WORDS + ENGLISH_WORDS}
+    arabic_letters = [chr(code) for code in range(0x0628, 0x063b)]
+    fillers = [f'term{i}' for i in range(5000)] + [
+        ''.join(rng.choice(arabic_letters) for _ in range(rng.randint(4, 6))) for _ in range(5000)
+    ]
+    values = []
+    for entry_id in range(1, rows + 1):
+        # A few tracked words among filler drawn from a large vocabulary
+        words = [rng.choice(fillers) for _ in range(40)]
+        for _ in range(3):
+            if rng.random() < 0.5:
+                word = rng.choice(ARABIC_WORDS)
+                words.insert(rng.randint(0, len(words)), _variant(word, rng))
+            else:
+                word = rng.choice(ENGLISH_WORDS)
+                words.insert(rng.randint(0, len(words)), word.capitalize() if rng.random() < 0.2 else word)
+            truth[word].add(entry_id)
+        values.append({
+            'id': entry_id,
+            'category': 'bilingual',
+            'title': f'Entry {entry_id}',
+            'content': ' '.join(words),
+            'meta_data': json.dumps({}),
+            'tags': json.dumps([]),
+            'confidence_score': 1.0,
+            'created_at': now,
+            'updated_at': now
+        })
+    db.session.execute(KnowledgeEntry.__table__.insert(), values)
+    db.session.commit()
+    return truth
+
+
+def _spellings(word: str) -> List[str]:
+    """The OR-expansion a caller has to write without normalization (still blind to harakat and tatweel)"""
+    stems = {word}
+    if word[0] in ALEF_FORMS:
+        stems |= {form + word[1:] for form in ALEF_FORMS}
+    if word.endswith('ة'):
+        stems |= {stem[:-1] + 'ه' for stem in stems}
+    if word.endswith('ى'):
+        stems |= {stem[:-1] + 'ي' for stem in stems}
+    return sorted(stems)
+
+
+def _recall(found: Set[int], expected: Set[int]) -> float:
+    return len(found & expected) / len(expected) if expected else 1.0
+
+
+def _best_of(repeats: int, func):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run(rows: int = 5000, repeats: int = 3):
+    app = _create_app()
+    with app.app_context():
+        db.create_all()
+        truth = _seed(rows)
+
+        started = time.perf_counter()
+        search_index.backfill(KNOWLEDGE, batch_size=1000)
+        index_seconds = time.perf_counter() - started
+
+        queries = ARABIC_WORDS + ENGLISH_WORDS
+
+        def plain_like():
+            return [{row[0] for row in db.session.query(KnowledgeEntry.id).filter(
+                db.or_(KnowledgeEntry.title.contains(word), KnowledgeEntry.content.contains(word))
+            )} for word in queries]
+
+        def expanded_like():
+            return [{row[0] for row in db.session.query(KnowledgeEntry.id).filter(db.or_(*[
+                column.contains(spelling)
+                for spelling in _spellings(word)
+                for column in (KnowledgeEntry.title, KnowledgeEntry.content)
+            ]))} for word in queries]
+
+        def term_index():
+            return [{row[0] for row in search_index.filter(
+                db.session.query(KnowledgeEntry.id), KNOWLEDGE, word
+            )} for word in queries]
+
+        results = []
+        for name, func in (('LIKE', plain_like), ('LIKE, OR-expanded spellings', expanded_like),
+                           ('normalized term index', term_index)):
+            seconds, found = _best_of(repeats, func)
+            arabic = [_recall(ids, truth[word]) for word, ids in zip(queries, found) if word in ARABIC_WORDS]
+            english = [_recall(ids, truth[word]) for word, ids in zip(queries, found) if word in ENGLISH_WORDS]
+            results.append((name, seconds / len(queries), sum(arabic) / len(arabic), sum(english) / len(english)))
+
+    print(f"{rows} bilingual rows, {len(queries)} queries, best of {repeats}; "
+          f"index built in {index_seconds * 1000:.0f} ms")
+    print(f"  {'method':32} {'ms/query':>9} {'recall ar':>10} {'recall en':>10}")
+    for name, seconds, arabic, english in results:
+        print(f"  {name:32} {seconds * 1000:9.2f} {arabic:10.1%} {english:10.1%}")
+
+
+if __name__ == '__main__':
+    arguments = [int(argument) for argument in sys.argv[1:3]]
+    run(*arguments)
@@ -0,0 +1,90 @@
+"""
+Serialization benchmark: ORM to_dict() vs the bulk column-tuple serializer
+on 10k-row pages of KnowledgeEntry.
+
+Usage:
+    python -m backend.benchmarks.serialization_bench [rows] [repeats]
+"""
+
+import json
+import sys
+import time
+from datetime import datetime
+from flask import Flask
+from src.models.knowledge_base import db, KnowledgeEntry
+from backend.serializers import knowledge_serializer, orjson
+
+
+def _create_app() -> Flask:
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def _seed(rows: int):
+    now = datetime.utcnow()
+    db.session.execute(KnowledgeEntry.__table__.insert(), [
+        {
+            'category': f'category-{i % 20}',
+            'title': f'Knowledge entry {i}',
+            'content': 'Quantum biology and evolutionary patterns in neural integration. ' * 8,
+            'meta_data': json.dumps({'source_ai': 'manus_ii', 'revision': i % 7, 'reviewed': i % 2 == 0}),
+            'tags': json.dumps(['research', f'topic-{i % 50}', 'telstp']),
+            'confidence_score': (i % 100) / 100,
+            'source': 'benchmark',
+            'created_at': now,
+            'updated_at': now
+        }
+        for i in range(rows)
+    ])
+    db.session.commit()
+
+
+def _best_of(repeats: int, func) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(rows: int = 10000, repeats: int = 5):
+    app = _create_app()
+    with app.app_context():
+        db.create_all()
+        _seed(rows)
+
+        def orm_to_dict():
+            entries = KnowledgeEntry.query.order_by(KnowledgeEntry.updated_at.desc()).limit(rows).all()
+            return json.dumps({'entries': [entry.to_dict() for entry in entries], 'total': rows})
+
+        def bulk_encode():
+            page = knowledge_serializer.query().order_by(KnowledgeEntry.updated_at.desc()).limit(rows).all()
+            return knowledge_serializer.encode_page('entries', page, total=rows)
+
+        def lazy_titles():
+            page = knowledge_serializer.query().order_by(KnowledgeEntry.updated_at.desc()).limit(rows).all()
+            return [record['title'] for record in knowledge_serializer.records(page)]
+
+        # Both paths must produce the same document
+        assert json.loads(orm_to_dict()) == json.loads(bulk_encode())
+
+        results = [
+            ('ORM + to_dict() + json.dumps', _best_of(repeats, orm_to_dict)),
+            ('column tuples + encode_page', _best_of(repeats, bulk_encode)),
+            ('column tuples + lazy records', _best_of(repeats, lazy_titles))
+        ]
+
+    print(f"{rows} rows, best of {repeats}, encoder: {'orjson' if orjson else 'json'}")
+    baseline = results[0][1]
+    for name, seconds in results:
+        print(f"  {name:32} {seconds * 1000:8.1f} ms  {baseline / seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    arguments = [int(argument) for argument in sys.argv[1:3]]
+    run(*arguments)
@@ -1,20 +1,58 @@
 import openai
 import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from src.models.knowledge_base import db, KnowledgeEntry, ErrorLog
+from typing import Dict, List, Any, Optional, Tuple
+from flask import current_app, has_app_context
+from src.models.knowledge_base import db, KnowledgeEntry
 from src.models.memory_system import ShortTermMemory, LongTermMemory, EpisodicMemory, ProceduralMemory
 from .gemini_client import gemini_client
+from .memory_cache import session_context_cache
+from .memory_consolidation import memory_consolidator
+from .memory_sweeper import memory_sweeper
+from .metrics import metrics_collector
+from .error_aggregator import error_aggregator
+from .serializers import knowledge_context_serializer, short_term_memory_serializer, procedural_memory_serializer
+from .tag_index import tag_index, LONG_TERM_MEMORY
+from .memory_graph import memory_graph, KNOWLEDGE
+from .memory_ranking import memory_ranker
+from .episodic_archive import episodic_archive
+from .skill_usage import skill_usage
+from .knowledge_dedup import knowledge_dedup
+from .search_index import search_index
+from .knowledge_snapshot import knowledge_snapshot
+from .similar_errors import similar_errors
+
+# The cancel flag of the plan node running on each worker thread
+_node_state = threading.local()
+
+
+def _is_timeout(value: Any) -> bool:
+    """A usable timeout: a positive int or float (bool is rejected)"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+
 
 class ManusAIEngine:
     """Core AI processing engine for Manus II - Now powered by Gemini CLI"""
     
+    # Capabilities that only touch the database; everything else waits on Gemini CLI
+    DB_CAPABILITIES = {'knowledge_retrieval', 'memory_management'}
+    
+    # How often execute_capabilities checks whether queued nodes have started
+    QUEUE_POLL_SECONDS = 0.05
+    
     def __init__(self):
         self.client = gemini_client
         self.logger = logging.getLogger(__name__)
         self.system_prompt = self._load_system_prompt()
         
+        # Separate pools so slow Gemini calls never starve database work
+        self._db_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='manus-db')
+        self._llm_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='manus-llm')
+        
     def _load_system_prompt(self) -> str:
         """Load the system prompt that defines Manus II's personality and capabilities"""
         return """You are Manus II, an advanced AI assistant powered by Google's Gemini with 1M token context window. 
@@ -37,19 +75,25 @@ class ManusAIEngine:
     def process_query(self, query: str, session_id: str, context: Optional[Dict] = None, character: str = "research-scientist") -> Dict[str, Any]:
         """Process a user query using Gemini CLI"""
         try:
-            # Store query in short-term memory
-            self._store_short_term_memory(session_id, 'conversation', f"User query: {query}")
-            
-            # Retrieve relevant context from memory and knowledge base
-            relevant_context = self._get_relevant_context(query, session_id)
-            
-            response = self._generate_response_gemini(query, relevant_context, context, character)
-            
-            # Store response in short-term memory
-            self._store_short_term_memory(session_id, 'conversation', f"AI response: {response['content']}")
-            
-            # Learn from this interaction
-            self._learn_from_interaction(query, response, session_id)
+            with metrics_collector.span('process_query'):
+                # Store query in short-term memory
+                with metrics_collector.span('process_query.store_memory'):
+                    self._store_short_term_memory(session_id, 'conversation', f"User query: {query}")
+                
+                # Retrieve relevant context from memory and knowledge base
+                with metrics_collector.span('process_query.retrieval'):
+                    relevant_context = self._get_relevant_context(query, session_id)
+                
+                with metrics_collector.span('process_query.generation'):
+                    response = self._generate_response_gemini(query, relevant_context, context, character)
+                
+                # Store response in short-term memory
+                with metrics_collector.span('process_query.store_memory'):
+                    self._store_short_term_memory(session_id, 'conversation', f"AI response: {response['content']}")
+                
+                # Learn from this interaction
+                with metrics_collector.span('process_query.learning'):
+                    self._learn_from_interaction(query, response, session_id, relevant_context)
             
             return {
                 'success': True,
@@ -70,22 +114,33 @@ class ManusAIEngine:
     def _generate_response_gemini(self, query: str, context: Dict, additional_context: Optional[Dict] = None, character: str = "research-scientist") -> Dict[str, Any]:
         """Generate response using Gemini CLI"""
         
-        # Prepare context string for Gemini
-        context_str = ""
-        
-        # Add relevant context
-        if context.get('relevant_knowledge'):
-            context_str += "Relevant knowledge from your knowledge base:\n"
-            for knowledge in context['relevant_knowledge']:
-                context_str += f"- {knowledge['title']}: {knowledge['content'][:200]}...\n"
-        
-        if context.get('recent_memory'):
-            context_str += "\nRecent conversation context:\n"
-            for memory in context['recent_memory']:
-                context_str += f"- {memory['content']}\n"
-        
-        if additional_context:
-            context_str += f"\nAdditional context: {json.dumps(additional_context)}\n"
+        with metrics_collector.span('process_query.prompt_building'):
+            # Prepare context string for Gemini
+            context_str = ""
+            
+            # Add relevant context
+            if context.get('relevant_knowledge'):
+                context_str += "Relevant knowledge from your knowledge base:\n"
+                for knowledge in context['relevant_knowledge']:
+                    context_str += f"- {knowledge['title']}: {knowledge['snippet']}\n"
+            
+            if context.get('associated_memories'):
+                context_str += "\nAssociated memories:\n"
+                for memory in context['associated_memories']:
+                    context_str += f"- {memory['title']}\n"
+            
+            if context.get('similar_errors'):
+                context_str += "\nSimilar past errors and how they were corrected:\n"
+                for error in context['similar_errors']:
+                    context_str += f"- {error['description']} -> {error['corrective_action']}\n"
+            
+            if context.get('recent_memory'):
+                context_str += "\nRecent conversation context:\n"
+                for memory in context['recent_memory']:
+                    context_str += f"- {memory['content']}\n"
+            
+            if additional_context:
+                context_str += f"\nAdditional context: {json.dumps(additional_context)}\n"
         
         response = self.client.chat(
             message=query,
@@ -109,44 +164,88 @@ class ManusAIEngine:
         """Retrieve relevant context from memory and knowledge base"""
         context = {}
         
-        # Get recent short-term memory for this session
-        recent_memory = ShortTermMemory.query.filter_by(session_id=session_id)\
-            .order_by(ShortTermMemory.last_accessed.desc())\
-            .limit(10).all()
-        context['recent_memory'] = [mem.to_dict() for mem in recent_memory]
+        # Get recent short-term memory for this session (cached after the first turn)
+        context['recent_memory'] = session_context_cache.get_recent(
+            session_id, self._load_recent_memory, self._recent_memory_version
+        )
         
-        # Search for relevant knowledge
-        relevant_knowledge = KnowledgeEntry.query.filter(
-            db.or_(
-                KnowledgeEntry.title.contains(query[:50]),
-                KnowledgeEntry.content.contains(query[:50])
+        # Search for relevant knowledge in the shared memory-mapped snapshot when one is published
+        context['relevant_knowledge'] = knowledge_snapshot.search(query)
+        if context['relevant_knowledge'] is None:
+            # Otherwise by normalized terms in the database, best term overlap first,
+            # over-fetching so duplicates do not take the five slots
+            ranked = search_index.ranked(KNOWLEDGE, query)
+            if ranked is not None:
+                relevant_knowledge = knowledge_context_serializer.query().join(
+                    ranked, KnowledgeEntry.id == ranked.c.entity_id
+                ).order_by(ranked.c.matched.desc(), KnowledgeEntry.confidence_score.desc()).limit(15).all()
+            else:
+                relevant_knowledge = []
+            id_position = knowledge_context_serializer.positions['id'][0]
+            distinct_ids = set(knowledge_dedup.distinct([row[id_position] for row in relevant_knowledge])[:5])
+            context['relevant_knowledge'] = knowledge_context_serializer.dicts(
+                [row for row in relevant_knowledge if row[id_position] in distinct_ids]
             )
-        ).order_by(KnowledgeEntry.confidence_score.desc()).limit(5).all()
-        context['relevant_knowledge'] = [knowledge.to_dict() for knowledge in relevant_knowledge]
+        
+        # Follow the association graph from the matched knowledge to related memories
+        associated = memory_graph.related_memories(
+            [(KNOWLEDGE, knowledge['id']) for knowledge in context['relevant_knowledge']]
+        )
+        
+        # Favor recent, frequently reinforced long-term memories among the associations
+        long_term_ids = [memory['id'] for memory in associated if memory['type'] == LONG_TERM_MEMORY]
+        rank_scores = dict(memory_ranker.top_k(len(long_term_ids), candidate_ids=long_term_ids)) if long_term_ids else {}
+        for memory in associated:
+            memory['rank_score'] = rank_scores.get(memory['id'], 1.0) if memory['type'] == LONG_TERM_MEMORY else 1.0
+        context['associated_memories'] = sorted(associated, key=lambda memory: memory['weight'] * memory['rank_score'], reverse=True)
         
         # Get relevant procedural memory
-        relevant_skills = ProceduralMemory.query.filter(
+        relevant_skills = procedural_memory_serializer.query().filter(
             db.or_(
                 ProceduralMemory.skill_name.contains(query[:50]),
                 ProceduralMemory.description.contains(query[:50])
             )
         ).order_by(ProceduralMemory.success_rate.desc()).limit(3).all()
-        context['relevant_skills'] = [skill.to_dict() for skill in relevant_skills]
+        context['relevant_skills'] = procedural_memory_serializer.dicts(relevant_skills)
+        
+        # Resolved errors resembling the query, so their fixes are not rediscovered
+        context['similar_errors'] = similar_errors.lookup(query)
         
         return context
     
+    def _load_recent_memory(self, session_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Read the most recent short-term memories of a session from the database"""
+        recent_memory = short_term_memory_serializer.query().filter(ShortTermMemory.session_id == session_id)\
+            .order_by(ShortTermMemory.last_accessed.desc())\
+            .limit(limit).all()
+        return short_term_memory_serializer.dicts(recent_memory)
+    
+    def _recent_memory_version(self, session_id: str) -> Tuple[int, Optional[int]]:
+        """Row count and newest id of a session's short-term memory, from the session index"""
+        count, newest = db.session.query(
+            db.func.count(ShortTermMemory.id), db.func.max(ShortTermMemory.id)
+        ).filter(ShortTermMemory.session_id == session_id).one()
+        return count, newest
+    
     def _store_short_term_memory(self, session_id: str, context_type: str, content: str):
         """Store information in short-term memory"""
         memory = ShortTermMemory(
             session_id=session_id,
             context_type=context_type,
             content=content,
-            meta_data=json.dumps({'timestamp': datetime.utcnow().isoformat()})
+            meta_data=json.dumps({'timestamp': datetime.utcnow().isoformat()}),
+            expires_at=memory_sweeper.expiry_for(context_type)
         )
         db.session.add(memory)
-        db.session.commit()
+        db.session.flush()
+        memory_dict = memory.to_dict()
+        with metrics_collector.span('db.commit'):
+            db.session.commit()
+        
+        # Write-through so the next turn is served from the cache
+        session_context_cache.record(session_id, memory_dict)
     
-    def _learn_from_interaction(self, query: str, response: Dict, session_id: str):
+    def _learn_from_interaction(self, query: str, response: Dict, session_id: str, relevant_context: Optional[Dict] = None):
         """Learn from the interaction and update knowledge/memory"""
         # This is a simplified learning mechanism
         # In a full implementation, this would involve more sophisticated analysis
@@ -166,21 +265,38 @@ class ManusAIEngine:
                 tags=json.dumps(['interaction', 'successful'])
             )
             db.session.add(pattern)
-            db.session.commit()
+            db.session.flush()
+            tag_index.set_tags(LONG_TERM_MEMORY, pattern.id, pattern.tags)
+            
+            # Associate the pattern with the knowledge that informed the answer
+            for knowledge in (relevant_context or {}).get('relevant_knowledge', []):
+                memory_graph.add_association(LONG_TERM_MEMORY, pattern.id, KNOWLEDGE, knowledge['id'],
+                                             weight=0.5, relation='answered_with')
+            
+            memory_ranker.upsert(pattern.id, pattern.importance_score, 0.0, pattern.last_reinforced)
+            
+            # Memories that contributed to a successful answer are reinforced
+            memory_ranker.reinforce([
+                memory['id'] for memory in (relevant_context or {}).get('associated_memories', [])
+                if memory['type'] == LONG_TERM_MEMORY
+            ])
+            with metrics_collector.span('db.commit'):
+                db.session.commit()
     
     def _log_error(self, error_type: str, description: str, context: Dict):
-        """Log an error for learning purposes"""
-        error = ErrorLog(
-            error_type=error_type,
-            description=description,
-            context=json.dumps(context),
+        """Log an error for learning purposes (aggregated by fingerprint, flushed periodically)"""
+        # The failed query may have left the session mid-transaction
+        db.session.rollback()
+        
+        fingerprint = error_aggregator.record(
+            error_type,
+            description,
+            context,
             impact='medium',
             source_ai='manus_ii'
         )
-        db.session.add(error)
-        db.session.commit()
         
-        self.logger.error(f"Error logged: {error_type} - {description}")
+        self.logger.error(f"Error logged: {error_type} - {description} [{fingerprint[:12]}]")
     
     def get_capabilities(self) -> List[str]:
         """Return list of available capabilities"""
@@ -210,13 +326,192 @@ class ManusAIEngine:
         }
         
         if capability in capability_map:
-            return capability_map[capability](parameters)
+            with metrics_collector.span(f'capability.{capability}'):
+                return capability_map[capability](parameters)
         else:
             return {
                 'success': False,
                 'error': f'Capability {capability} not implemented yet'
             }
     
+    def execute_capabilities(self, plan: Any, default_timeout: float = 60.0) -> Dict[str, Any]:
+        """
+        Execute a small DAG of capability invocations.
+        
+        plan is a list of nodes (or {'nodes': [...], 'timeout': seconds}), each node being
+        {'id', 'capability', 'parameters', 'depends_on': [ids], 'timeout': seconds}.
+        Independent nodes run concurrently; a node receives the results of its
+        dependencies in parameters['dependency_results'] and is skipped if any failed.
+        A malformed plan is rejected before anything runs with status_code 400.
+        
+        A node's timeout counts from when a worker starts it, not from when it was
+        queued. Worker threads cannot be killed, so a timed-out node is only
+        abandoned: its cancel flag is set (capabilities poll node_cancelled()
+        between steps) and its worker stays busy until the current call returns,
+        which Gemini CLI calls bound with their own subprocess timeouts.
+        """
+        if isinstance(plan, dict):
+            default_timeout = plan.get('timeout', default_timeout)
+            plan = plan.get('nodes')
+        
+        nodes, error = self._validate_plan(plan, default_timeout)
+        if error:
+            return {'success': False, 'error': error, 'status_code': 400}
+        
+        app = current_app._get_current_object() if has_app_context() else None
+        plan_started = time.perf_counter()
+        
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = {node_id: set(node.get('depends_on') or []) for node_id, node in nodes.items()}
+        running = {}  # future -> (node_id, timeout, cancel flag)
+        started: Dict[str, float] = {}  # node_id -> time its worker picked it up, written by the worker
+        
+        while pending or running:
+            # Start every node whose dependencies are settled
+            for node_id in list(pending):
+                dependencies = pending[node_id]
+                failed = [dep for dep in dependencies if dep in results and results[dep]['status'] != 'success']
+                node = nodes[node_id]
+                
+                if failed:
+                    del pending[node_id]
+                    results[node_id] = {
+                        'capability': node['capability'],
+                        'status': 'skipped',
+                        'error': f"Dependency failed: {', '.join(sorted(failed))}",
+                        'started_at': None,
+                        'duration': 0.0
+                    }
+                elif all(dep in results for dep in dependencies):
+                    del pending[node_id]
+                    parameters = dict(node.get('parameters') or {})
+                    if dependencies:
+                        parameters['dependency_results'] = {dep: results[dep]['result'] for dep in dependencies}
+                    
+                    executor = self._db_executor if node['capability'] in self.DB_CAPABILITIES else self._llm_executor
+                    cancelled = threading.Event()
+                    future = executor.submit(self._run_capability_node, app, node_id, node['capability'],
+                                             parameters, started, cancelled)
+                    running[future] = (node_id, node.get('timeout', default_timeout), cancelled)
+            
+            if not running:
+                continue
+            
+            # Sleep until the next running node's deadline; poll while some are still queued
+            deadlines = [started[node_id] + timeout for node_id, timeout, _ in running.values() if node_id in started]
+            wait_timeout = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+            if len(deadlines) < len(running):
+                wait_timeout = self.QUEUE_POLL_SECONDS if wait_timeout is None else min(wait_timeout, self.QUEUE_POLL_SECONDS)
+            done, _ = wait(list(running), timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                node_id, _, _ = running.pop(future)
+                now = time.perf_counter()
+                node_started = started.get(node_id, now)
+                entry = {
+                    'capability': nodes[node_id]['capability'],
+                    'started_at': node_started - plan_started,
+                    'duration': now - node_started
+                }
+                try:
+                    result = future.result()
+                    entry['result'] = result
+                    entry['status'] = 'success' if result.get('success') else 'failed'
+                    if not result.get('success'):
+                        entry['error'] = result.get('error')
+                except Exception as e:
+                    entry['status'] = 'failed'
+                    entry['error'] = str(e)
+                results[node_id] = entry
+            
+            # Abandon nodes past their own deadline; their dependents get skipped
+            now = time.perf_counter()
+            for future, (node_id, timeout, cancelled) in list(running.items()):
+                if node_id in started and started[node_id] + timeout <= now:
+                    running.pop(future)
+                    cancelled.set()
+                    results[node_id] = {
+                        'capability': nodes[node_id]['capability'],
+                        'status': 'timeout',
+                        'error': f'Node timed out after {timeout:.1f}s',
+                        'started_at': started[node_id] - plan_started,
+                        'duration': now - started[node_id]
+                    }
+        
+        return {
+            'success': all(result['status'] == 'success' for result in results.values()),
+            'results': results,
+            'total_duration': time.perf_counter() - plan_started,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    
+    def _validate_plan(self, plan: Any, default_timeout: Any) -> tuple:
+        """Index plan nodes by id and reject malformed nodes, unknown dependencies and cycles"""
+        if not _is_timeout(default_timeout):
+            return None, 'Plan timeout must be a positive number of seconds'
+        if not isinstance(plan, list):
+            return None, 'Plan must be a list of nodes'
+        
+        nodes = {}
+        for node in plan:
+            if not isinstance(node, dict):
+                return None, 'Each node must be an object'
+            node_id = node.get('id')
+            if not node_id or not isinstance(node_id, str) or not isinstance(node.get('capability'), str):
+                return None, 'Each node needs an id and a capability'
+            if node_id in nodes:
+                return None, f'Duplicate node id {node_id}'
+            depends_on = node.get('depends_on')
+            if depends_on is not None and (not isinstance(depends_on, list)
+                                           or not all(isinstance(dep, str) for dep in depends_on)):
+                return None, f'Node {node_id} depends_on must be a list of node ids'
+            if 'timeout' in node and not _is_timeout(node['timeout']):
+                return None, f'Node {node_id} timeout must be a positive number of seconds'
+            if node.get('parameters') is not None and not isinstance(node['parameters'], dict):
+                return None, f'Node {node_id} parameters must be an object'
+            nodes[node_id] = node
+        
+        for node_id, node in nodes.items():
+            for dep in node.get('depends_on') or []:
+                if dep not in nodes:
+                    return None, f'Node {node_id} depends on unknown node {dep}'
+        
+        # Kahn's algorithm: every node must be reachable in topological order
+        remaining = {node_id: len(set(node.get('depends_on') or [])) for node_id, node in nodes.items()}
+        ready = [node_id for node_id, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            current = ready.pop()
+            visited += 1
+            for node_id, node in nodes.items():
+                if current in set(node.get('depends_on') or []):
+                    remaining[node_id] -= 1
+                    if remaining[node_id] == 0:
+                        ready.append(node_id)
+        
+        if visited != len(nodes):
+            return None, 'Plan contains a dependency cycle'
+        
+        return nodes, None
+    
+    def _run_capability_node(self, app, node_id: str, capability: str, parameters: Dict,
+                             started: Dict[str, float], cancelled: threading.Event) -> Dict[str, Any]:
+        """Run one plan node on a worker thread inside its own app context"""
+        started[node_id] = time.perf_counter()
+        _node_state.cancelled = cancelled
+        try:
+            if app is None:
+                return self.execute_capability(capability, parameters)
+            with app.app_context():
+                return self.execute_capability(capability, parameters)
+        finally:
+            _node_state.cancelled = None
+    
+    def node_cancelled(self) -> bool:
+        """True when the plan node running on this thread has timed out and been abandoned"""
+        cancelled = getattr(_node_state, 'cancelled', None)
+        return cancelled is not None and cancelled.is_set()
+    
     def _execute_knowledge_retrieval(self, parameters: Dict) -> Dict[str, Any]:
         """Execute knowledge retrieval capability"""
         query = parameters.get('query', '')
@@ -229,12 +524,7 @@ class ManusAIEngine:
             knowledge_query = knowledge_query.filter(KnowledgeEntry.category == category)
         
         if query:
-            knowledge_query = knowledge_query.filter(
-                db.or_(
-                    KnowledgeEntry.title.contains(query),
-                    KnowledgeEntry.content.contains(query)
-                )
-            )
+            knowledge_query = search_index.filter(knowledge_query, KNOWLEDGE, query)
         
         results = knowledge_query.order_by(KnowledgeEntry.confidence_score.desc()).limit(limit).all()
         
@@ -249,15 +539,115 @@ class ManusAIEngine:
         action = parameters.get('action')
         
         if action == 'cleanup':
-            # Clean up expired short-term memories
-            expired_count = ShortTermMemory.query.filter(
-                ShortTermMemory.expires_at < datetime.utcnow()
-            ).delete()
-            db.session.commit()
+            # Clean up expired short-term memories in bounded batches
+            result = memory_sweeper.sweep(max_batches=parameters.get('max_batches'))
             
             return {
                 'success': True,
-                'message': f'Cleaned up {expired_count} expired memories'
+                'message': f"Cleaned up {result['reclaimed']} expired memories",
+                'sweep': result
+            }
+        
+        if action == 'sweeper_stats':
+            return {
+                'success': True,
+                'sweeper': memory_sweeper.get_stats()
+            }
+        
+        if action == 'consolidate':
+            # Compact near-duplicate interaction patterns, resuming from the last checkpoint
+            return memory_consolidator.run(max_batches=parameters.get('max_batches'),
+                                            should_stop=self.node_cancelled)
+        
+        if action == 'backfill_associations':
+            return memory_graph.backfill(batch_size=parameters.get('batch_size', 500))
+        
+        if action == 'archive_episodes':
+            # Move months older than the hot window into compressed partitions
+            return episodic_archive.compact(hot_months=parameters.get('hot_months'))
+        
+        if action == 'episodes':
+            start = parameters.get('start')
+            end = parameters.get('end')
+            return {
+                'success': True,
+                'episodes': episodic_archive.query_range(
+                    start=datetime.fromisoformat(start) if start else None,
+                    end=datetime.fromisoformat(end) if end else None,
+                    limit=parameters.get('limit', 100)
+                )
+            }
+        
+        if action == 'archive_stats':
+            return {
+                'success': True,
+                'archive': episodic_archive.get_stats()
+            }
+        
+        if action == 'record_skill_usage':
+            # Outcomes of skills that were actually executed; retrieval alone is not a use
+            skill_id = parameters.get('skill_id')
+            if not isinstance(skill_id, int) or isinstance(skill_id, bool):
+                return {'success': False, 'error': 'record_skill_usage requires an integer skill_id'}
+            skill_usage.record(skill_id, bool(parameters.get('success', True)))
+            return {'success': True}
+        
+        if action == 'skill_leaderboard':
+            order_by = parameters.get('order_by', 'success_rate')
+            if order_by not in skill_usage.LEADERBOARD_ORDERS:
+                return {'success': False, 'error': f'Unsupported leaderboard order: {order_by}'}
+            return {
+                'success': True,
+                'skills': skill_usage.leaderboard(
+                    limit=parameters.get('limit', 10),
+                    order_by=order_by,
+                    min_uses=parameters.get('min_uses', 1)
+                )
+            }
+        
+        if action == 'flush_skill_usage':
+            return {
+                'success': True,
+                'written': skill_usage.flush(),
+                'usage': skill_usage.get_stats()
+            }
+        
+        if action == 'top_memories':
+            return {
+                'success': True,
+                'memories': [
+                    {'id': memory_id, 'score': score}
+                    for memory_id, score in memory_ranker.top_k(parameters.get('k', 10))
+                ]
+            }
+        
+        if action == 'flush_memory_scores':
+            return {
+                'success': True,
+                'written': memory_ranker.flush(),
+                'ranking': memory_ranker.get_stats()
+            }
+        
+        if action == 'cache_stats':
+            return {
+                'success': True,
+                'cache': session_context_cache.get_stats()
+            }
+        
+        if action == 'build_knowledge_snapshot':
+            # Publish a fresh snapshot; every worker maps it on its next retrieval
+            return knowledge_snapshot.build(parameters.get('path'))
+        
+        if action == 'knowledge_snapshot_stats':
+            return {
+                'success': True,
+                'snapshot': knowledge_snapshot.get_stats()
+            }
+        
+        if action == 'similar_error_stats':
+            return {
+                'success': True,
+                'similar_errors': similar_errors.get_stats()
             }
         
         return {
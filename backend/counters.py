@@ -0,0 +1,53 @@
+"""
+Counter Upserts for Manus II
+Adds deltas to a counter row identified by its unique key in one statement,
+so two transactions writing the first row of a key never race on the insert
+(the update-then-insert pattern lets both see no row and one hit the unique
+constraint)
+"""
+
+from typing import Dict, Any, Optional
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from src.models.knowledge_base import db
+
+# Dialects with a native insert-or-increment statement
+_UPSERT_DIALECTS = {
+    'postgresql': postgresql,
+    'sqlite': sqlite,
+    'mysql': mysql,
+    'mariadb': mysql
+}
+
+
+def add_to_counter(table, key: Dict[str, Any], deltas: Dict[str, Any], create: bool = True,
+                   values: Optional[Dict[str, Any]] = None):
+    """
+    Add `deltas` to the columns of the row matching `key` (the columns of a
+    unique constraint), creating it with the deltas as values when missing
+    and `create` is set; `values` are set as given either way. Callers own
+    the transaction
+    """
+    values = values or {}
+    dialect = _UPSERT_DIALECTS.get(db.session.get_bind().dialect.name)
+    if not create or dialect is None:
+        result = db.session.execute(
+            table.update()
+            .where(*[table.c[name] == value for name, value in key.items()])
+            .values({**{name: table.c[name] + delta for name, delta in deltas.items()}, **values})
+        )
+        if result.rowcount == 0 and create:
+            # No native upsert on this backend: the first insert can still race here
+            db.session.execute(table.insert(), [{**key, **deltas, **values}])
+        return
+
+    statement = dialect.insert(table).values({**key, **deltas, **values})
+    if dialect is mysql:
+        statement = statement.on_duplicate_key_update(
+            {**{name: table.c[name] + statement.inserted[name] for name in deltas}, **values}
+        )
+    else:
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={**{name: table.c[name] + statement.excluded[name] for name in deltas}, **values}
+        )
+    db.session.execute(statement)
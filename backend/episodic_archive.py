@@ -0,0 +1,255 @@
+"""
+Episodic Memory Archive for Manus II
+Moves cold months of EpisodicMemory out of the live table into compressed,
+read-only monthly partitions (gzip NDJSON files with a manifest table), and
+answers time-range queries by merging the live table with only the partitions
+whose month overlaps the range
+"""
+
+import gzip
+import hashlib
+import heapq
+import json
+import logging
+import os
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Tuple
+from src.models.memory_system import db, EpisodicMemory, EpisodicArchivePartition
+from .serializers import episodic_memory_serializer
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _sort_key(record: Dict[str, Any]) -> Tuple[datetime, int]:
+    return datetime.fromisoformat(record['event_timestamp']), record['id']
+
+
+class EpisodicArchive:
+    """
+    The live episodic_memory table is the hot partition. Archived months are
+    immutable files named after their content hash; a month that receives
+    backdated rows later is rewritten to a new file and the manifest row is
+    switched in the same transaction that deletes the archived rows.
+    """
+
+    def __init__(self, archive_dir: Optional[str] = None, hot_months: int = 3,
+                 batch_size: int = 500):
+        self.logger = logging.getLogger(__name__)
+        self.archive_dir = archive_dir or os.getenv('MANUS_EPISODIC_ARCHIVE_DIR', 'data/episodic_archive')
+        self.hot_months = hot_months
+        self.batch_size = batch_size
+
+        # Instrumentation
+        self.range_queries = 0
+        self.partitions_scanned = 0
+        self.partitions_pruned = 0
+
+    def _path(self, relative_path: str) -> str:
+        return os.path.join(self.archive_dir, relative_path)
+
+    def archive_month(self, month: datetime) -> Dict[str, Any]:
+        """Move every live row of one month into its archive partition"""
+        range_start = _month_start(month)
+        range_end = _add_months(range_start, 1)
+        key = range_start.strftime('%Y-%m')
+
+        rows = episodic_memory_serializer.query().filter(
+            EpisodicMemory.event_timestamp >= range_start,
+            EpisodicMemory.event_timestamp < range_end
+        ).order_by(EpisodicMemory.event_timestamp.asc(), EpisodicMemory.id.asc()).yield_per(self.batch_size)
+
+        archived_ids: List[int] = []
+        timestamp_index = episodic_memory_serializer.positions['event_timestamp'][0]
+
+        def live_lines() -> Iterator[Tuple[Tuple[datetime, int], bytes]]:
+            for row in rows:
+                archived_ids.append(row[0])
+                yield (row[timestamp_index], row[0]), episodic_memory_serializer.encode_row(row)
+
+        partition = EpisodicArchivePartition.query.filter_by(month=key).first()
+        sources = [live_lines()]
+        if partition is not None:
+            sources.append(self._read_lines(partition))
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        temp_path = self._path(f'.episodic-{key}.{os.getpid()}.tmp')
+        digest = hashlib.sha256()
+        row_count = 0
+        ids = []
+
+        try:
+            with gzip.open(temp_path, 'wb') as archive:
+                for sort_key, line in heapq.merge(*sources, key=lambda item: item[0]):
+                    archive.write(line + b'\n')
+                    digest.update(line)
+                    row_count += 1
+                    ids.append(sort_key[1])
+                archive.flush()
+                os.fsync(archive.fileobj.fileno())
+
+            if not archived_ids:
+                os.remove(temp_path)
+                return {'month': key, 'archived': 0}
+
+            relative_path = f'episodic-{key}.{digest.hexdigest()[:12]}.ndjson.gz'
+            os.replace(temp_path, self._path(relative_path))
+            os.chmod(self._path(relative_path), 0o444)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        previous_path = partition.path if partition is not None else None
+        if partition is None:
+            partition = EpisodicArchivePartition(month=key, range_start=range_start, range_end=range_end)
+            db.session.add(partition)
+        partition.path = relative_path
+        partition.row_count = row_count
+        partition.min_id = min(ids)
+        partition.max_id = max(ids)
+        partition.size_bytes = os.path.getsize(self._path(relative_path))
+        partition.sha256 = digest.hexdigest()
+
+        try:
+            for start in range(0, len(archived_ids), self.batch_size):
+                EpisodicMemory.query.filter(
+                    EpisodicMemory.id.in_(archived_ids[start:start + self.batch_size])
+                ).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self.logger.error(f"Archiving episodic memories for {key} failed: {str(e)}")
+            raise
+
+        # The old file is only unreferenced once the manifest switch is committed
+        if previous_path and previous_path != relative_path and os.path.exists(self._path(previous_path)):
+            os.remove(self._path(previous_path))
+
+        return {'month': key, 'archived': len(archived_ids), 'partition': partition.to_dict()}
+
+    def compact(self, hot_months: Optional[int] = None, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Archive every month older than the hot window that still has live rows"""
+        hot_months = self.hot_months if hot_months is None else hot_months
+        cutoff = _add_months(_month_start(now or datetime.utcnow()), -hot_months)
+
+        months = []
+        archived = 0
+        cursor = datetime.min
+        while True:
+            oldest = db.session.query(db.func.min(EpisodicMemory.event_timestamp)).filter(
+                EpisodicMemory.event_timestamp >= cursor,
+                EpisodicMemory.event_timestamp < cutoff
+            ).scalar()
+            if oldest is None:
+                break
+
+            result = self.archive_month(oldest)
+            months.append(result['month'])
+            archived += result['archived']
+            cursor = _add_months(_month_start(oldest), 1)
+
+        return {'success': True, 'cutoff': cutoff.isoformat(), 'months': months, 'archived': archived}
+
+    def _read_lines(self, partition: EpisodicArchivePartition) -> Iterator[Tuple[Tuple[datetime, int], bytes]]:
+        with gzip.open(self._path(partition.path), 'rb') as archive:
+            for line in archive:
+                line = line.rstrip(b'\n')
+                if line:
+                    yield _sort_key(json.loads(line)), line
+
+    def _read_partition(self, partition: EpisodicArchivePartition, start: Optional[datetime],
+                        end: Optional[datetime]) -> Iterator[Dict[str, Any]]:
+        """Yield archived records in [start, end); files are sorted, so reading stops at end"""
+        with gzip.open(self._path(partition.path), 'rb') as archive:
+            for line in archive:
+                record = json.loads(line)
+                timestamp = datetime.fromisoformat(record['event_timestamp'])
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp >= end:
+                    break
+                yield record
+
+    def _partitions(self, start: Optional[datetime], end: Optional[datetime]) -> List[EpisodicArchivePartition]:
+        query = EpisodicArchivePartition.query
+        if start is not None:
+            query = query.filter(EpisodicArchivePartition.range_end > start)
+        if end is not None:
+            query = query.filter(EpisodicArchivePartition.range_start < end)
+        return query.order_by(EpisodicArchivePartition.range_start.asc()).all()
+
+    def query_range(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    limit: int = 100) -> List[Dict[str, Any]]:
+        """Episodes with start <= event_timestamp < end from live rows and overlapping partitions"""
+        live_query = episodic_memory_serializer.query()
+        if start is not None:
+            live_query = live_query.filter(EpisodicMemory.event_timestamp >= start)
+        if end is not None:
+            live_query = live_query.filter(EpisodicMemory.event_timestamp < end)
+        live = (
+            record.to_dict() for record in episodic_memory_serializer.records(
+                live_query.order_by(EpisodicMemory.event_timestamp.asc(), EpisodicMemory.id.asc()).limit(limit)
+            )
+        )
+
+        partitions = self._partitions(start, end)
+        self.range_queries += 1
+        self.partitions_scanned += len(partitions)
+        self.partitions_pruned += EpisodicArchivePartition.query.count() - len(partitions)
+
+        sources = [live] + [self._read_partition(partition, start, end) for partition in partitions]
+        return list(islice(heapq.merge(*sources, key=_sort_key), limit))
+
+    def get_many(self, memory_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Look episodes up by id in the live table, then in partitions whose id range covers them"""
+        wanted = set(memory_ids)
+        found = {
+            record['id']: record.to_dict()
+            for record in episodic_memory_serializer.records(
+                episodic_memory_serializer.query().filter(EpisodicMemory.id.in_(list(wanted)))
+            )
+        } if wanted else {}
+
+        missing = wanted - set(found)
+        if missing:
+            for partition in EpisodicArchivePartition.query.filter(
+                EpisodicArchivePartition.min_id <= max(missing),
+                EpisodicArchivePartition.max_id >= min(missing)
+            ):
+                for record in self._read_partition(partition, None, None):
+                    if record['id'] in missing:
+                        found[record['id']] = record
+                        missing.discard(record['id'])
+                if not missing:
+                    break
+
+        return found
+
+    def get_stats(self) -> Dict[str, Any]:
+        totals = db.session.query(
+            db.func.count(EpisodicArchivePartition.id),
+            db.func.coalesce(db.func.sum(EpisodicArchivePartition.row_count), 0),
+            db.func.coalesce(db.func.sum(EpisodicArchivePartition.size_bytes), 0)
+        ).one()
+        return {
+            'archive_dir': self.archive_dir,
+            'partitions': totals[0],
+            'archived_rows': int(totals[1]),
+            'archived_bytes': int(totals[2]),
+            'live_rows': EpisodicMemory.query.count(),
+            'range_queries': self.range_queries,
+            'partitions_scanned': self.partitions_scanned,
+            'partitions_pruned': self.partitions_pruned
+        }
+
+
+# Global episodic archive instance
+episodic_archive = EpisodicArchive()
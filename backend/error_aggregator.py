@@ -0,0 +1,304 @@
+"""
+Error Aggregation for Manus II
+Fingerprints errors and accumulates them in memory, so an outage produces one
+periodically upserted ErrorAggregate row per distinct error instead of one
+committed ErrorLog row per failed query
+"""
+
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from src.models.knowledge_base import db
+from src.models.knowledge_models import ErrorAggregate
+from .etags import table_versions
+from .error_rollups import error_rollups
+from .search_index import search_index, ERROR_AGGREGATE
+
+_NORMALIZE_RULES = [
+    (re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'), '<uuid>'),
+    (re.compile(r'0x[0-9a-f]+'), '<hex>'),
+    (re.compile(r'\d{4}-\d{2}-\d{2}[t ][\d:.]+'), '<timestamp>'),
+    # Rooted paths (/usr/bin, ./x, ~/x) or relative ones with at least three segments;
+    # slash-joined words such as "and/or" or "km/h" are kept
+    (re.compile(r'(?<![\w.-])(?:~|\.{1,2})?/[\w.-]+(?:/[\w.-]+)*|(?<![\w/.-])[\w.-]+(?:/[\w.-]+){2,}'), '<path>'),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), '<str>'),
+    (re.compile(r'\d+(?:\.\d+)?'), '<num>'),
+    (re.compile(r'\s+'), ' ')
+]
+
+
+def normalize_description(description: str) -> str:
+    """Strip the variable parts of an error message (ids, numbers, paths, quoted values)"""
+    normalized = description.lower()
+    for pattern, replacement in _NORMALIZE_RULES:
+        normalized = pattern.sub(replacement, normalized)
+    return normalized.strip()
+
+
+def error_fingerprint(error_type: str, description: str) -> str:
+    """Stable fingerprint of an error type and its normalized description"""
+    key = f"{error_type}|{normalize_description(description)}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class _PendingError:
+    __slots__ = ('error_type', 'description', 'impact', 'source_ai', 'count',
+                 'first_seen', 'last_seen', 'samples', 'hours')
+
+    def __init__(self, error_type: str, description: str, impact: str, source_ai: str, now: datetime):
+        self.error_type = error_type
+        self.description = description
+        self.impact = impact
+        self.source_ai = source_ai
+        self.count = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.samples: List[Dict[str, Any]] = []
+        self.hours = Counter()  # (hour, impact, source_ai) -> occurrences, for the rollups
+
+
+class ErrorAggregator:
+    """
+    In-memory error counters keyed by fingerprint, flushed as upserts.
+    Each fingerprint keeps a reservoir sample of occurrence contexts.
+    """
+
+    def __init__(self, flush_interval: float = 10.0, max_samples: int = 5, max_pending: int = 1000):
+        self.logger = logging.getLogger(__name__)
+        self.flush_interval = flush_interval
+        self.max_samples = max_samples
+        self.max_pending = max_pending
+
+        self._pending: Dict[str, _PendingError] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        # Instrumentation
+        self.recorded = 0
+        self.flushes = 0
+        self.rows_upserted = 0
+
+    def record(self, error_type: str, description: str, context: Optional[Dict] = None,
+               impact: str = 'medium', source_ai: str = 'manus_ii') -> str:
+        """Count one occurrence of an error and return its fingerprint"""
+        fingerprint = error_fingerprint(error_type, description)
+        now = datetime.utcnow()
+
+        with self._lock:
+            pending = self._pending.get(fingerprint)
+            if pending is None:
+                pending = self._pending[fingerprint] = _PendingError(error_type, description, impact, source_ai, now)
+
+            pending.count += 1
+            pending.hours[(now.replace(minute=0, second=0, microsecond=0), impact, source_ai)] += 1
+            pending.last_seen = now
+            pending.description = description
+            pending.impact = impact
+            pending.source_ai = source_ai
+
+            # Reservoir sampling keeps a uniform sample of contexts in bounded space
+            sample = {'timestamp': now.isoformat(), 'context': context or {}}
+            if len(pending.samples) < self.max_samples:
+                pending.samples.append(sample)
+            else:
+                slot = random.randrange(pending.count)
+                if slot < self.max_samples:
+                    pending.samples[slot] = sample
+
+            self.recorded += 1
+            due = (time.monotonic() - self._last_flush >= self.flush_interval
+                   or len(self._pending) >= self.max_pending)
+
+        # Without the background thread, flush lazily from the caller's app context
+        if due and not self._is_running():
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"Error aggregate flush failed: {str(e)}")
+
+        return fingerprint
+
+    def flush(self) -> int:
+        """Upsert all pending aggregates (requires an app context)"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+
+            if not pending:
+                return 0
+
+            try:
+                self._upsert(pending)
+            except IntegrityError:
+                # Another worker inserted one of the fingerprints first; retry as updates
+                db.session.rollback()
+                try:
+                    self._upsert(pending)
+                except Exception:
+                    db.session.rollback()
+                    self._requeue(pending)
+                    raise
+            except Exception:
+                db.session.rollback()
+                self._requeue(pending)
+                raise
+
+            self.flushes += 1
+            self.rows_upserted += len(pending)
+            return len(pending)
+
+    def _upsert(self, pending: Dict[str, _PendingError]):
+        self._write(pending)
+        table_versions.bump(ErrorAggregate.__tablename__)
+        db.session.commit()
+
+    def _write(self, pending: Dict[str, _PendingError]):
+        existing = {
+            aggregate.fingerprint: aggregate
+            for aggregate in ErrorAggregate.query.filter(ErrorAggregate.fingerprint.in_(list(pending))).all()
+        }
+
+        created = []
+        for fingerprint, item in pending.items():
+            aggregate = existing.get(fingerprint)
+            if aggregate is None:
+                aggregate = ErrorAggregate(
+                    fingerprint=fingerprint,
+                    error_type=item.error_type,
+                    normalized_description=normalize_description(item.description),
+                    occurrence_count=0,
+                    first_seen=item.first_seen,
+                    status='open'
+                )
+                db.session.add(aggregate)
+                created.append(aggregate)
+            elif aggregate.status == 'resolved':
+                # A resolved error that shows up again is a regression
+                aggregate.status = 'open'
+                aggregate.resolved_at = None
+
+            aggregate.occurrence_count = (aggregate.occurrence_count or 0) + item.count
+            aggregate.sample_description = item.description
+            aggregate.impact = item.impact
+            aggregate.source_ai = item.source_ai
+            aggregate.last_seen = max(aggregate.last_seen or item.last_seen, item.last_seen)
+
+            samples = json.loads(aggregate.sample_contexts) if aggregate.sample_contexts else []
+            aggregate.sample_contexts = json.dumps((samples + item.samples)[-self.max_samples:])
+
+            for (hour, impact, source_ai), count in item.hours.items():
+                error_rollups.record(item.error_type, impact, source_ai, hour, occurrences=count)
+
+        # New errors become searchable for similar-error lookups once resolved
+        if created:
+            db.session.flush()
+            search_index.set_text_bulk(ERROR_AGGREGATE, {
+                aggregate.id: (aggregate.sample_description, aggregate.sample_contexts) for aggregate in created
+            })
+
+    def _requeue(self, pending: Dict[str, _PendingError]):
+        """Put back aggregates that could not be written"""
+        with self._lock:
+            for fingerprint, item in pending.items():
+                current = self._pending.get(fingerprint)
+                if current is None:
+                    self._pending[fingerprint] = item
+                    continue
+                current.count += item.count
+                current.hours.update(item.hours)
+                current.first_seen = min(current.first_seen, item.first_seen)
+                current.samples = (item.samples + current.samples)[-self.max_samples:]
+
+    def fold_pending(self, fingerprint: str):
+        """
+        Write the pending occurrences of one fingerprint into the caller's
+        transaction, leaving the rest of the buffer alone (the caller commits;
+        if it rolls back they are put back for the next flush)
+        """
+        with self._lock:
+            item = self._pending.pop(fingerprint, None)
+        if item is None:
+            return
+
+        # A worker inserting the same new fingerprint concurrently fails the caller's commit, which puts these back
+        db.session.info.setdefault('taken_errors', {})[fingerprint] = item
+        self._write({fingerprint: item})
+        table_versions.bump(ErrorAggregate.__tablename__)
+
+    def resolve(self, fingerprint: str, resolved_at: Optional[datetime] = None) -> Optional[ErrorAggregate]:
+        """Mark an aggregated error as resolved (the caller commits)"""
+        aggregate = ErrorAggregate.query.filter_by(fingerprint=fingerprint).first()
+        if aggregate is not None:
+            aggregate.status = 'resolved'
+            aggregate.resolved_at = resolved_at or datetime.utcnow()
+        return aggregate
+
+    def start(self, app):
+        """Start the background flush thread for a Flask app"""
+        if self._is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_forever, args=(app,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background flush thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval)
+            self._thread = None
+
+    def _is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run_forever(self, app):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                with app.app_context():
+                    self.flush()
+            except Exception as e:
+                self.logger.error(f"Error aggregate flush failed: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return aggregation counters"""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'recorded': self.recorded,
+            'pending_fingerprints': pending,
+            'flushes': self.flushes,
+            'rows_upserted': self.rows_upserted
+        }
+
+
+@event.listens_for(Session, 'after_commit')
+def _keep_taken_errors(session):
+    session.info.pop('taken_errors', None)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _requeue_taken_errors(session, transaction):
+    """Occurrences folded into a transaction that did not commit go back to the buffer"""
+    if transaction.parent is not None:
+        return
+    taken = session.info.pop('taken_errors', None)
+    if taken:
+        error_aggregator._requeue(taken)
+
+
+# Global error aggregator instance
+error_aggregator = ErrorAggregator()
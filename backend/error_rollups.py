@@ -0,0 +1,110 @@
+"""
+Error Rollups for Manus II
+Hourly and daily counters of logged and resolved errors per error type,
+impact and source, updated in the transaction that writes the errors, so
+triage time-series and mean time to resolve never scan the error tables
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from sqlalchemy import func
+from src.models.knowledge_base import db
+from src.models.knowledge_models import ErrorRollup
+from .counters import add_to_counter
+
+GRANULARITIES = {
+    'hour': lambda at: at.replace(minute=0, second=0, microsecond=0),
+    'day': lambda at: at.replace(hour=0, minute=0, second=0, microsecond=0)
+}
+
+GROUP_BY_COLUMNS = ('error_type', 'impact', 'source_ai')
+
+
+class ErrorRollups:
+    """Maintains error_rollups; callers own the transaction"""
+
+    def record(self, error_type: str, impact: Optional[str], source_ai: Optional[str], at: datetime,
+               occurrences: int = 0, resolved: int = 0, resolve_seconds: float = 0.0):
+        """Add logged and/or resolved errors to the hour and day buckets containing `at`"""
+        table = ErrorRollup.__table__
+        for granularity, truncate in GRANULARITIES.items():
+            key = {
+                'granularity': granularity,
+                'bucket_start': truncate(at),
+                'error_type': error_type,
+                'impact': impact or 'unknown',
+                'source_ai': source_ai or 'unknown'
+            }
+            add_to_counter(table, key, {
+                'occurrences': occurrences,
+                'resolved': resolved,
+                'resolve_seconds': resolve_seconds
+            })
+
+    def record_resolved(self, error_type: str, impact: Optional[str], source_ai: Optional[str],
+                        logged_at: datetime, resolved_at: datetime):
+        """Count one resolution in the bucket of its resolution time"""
+        self.record(error_type, impact, source_ai, resolved_at, resolved=1,
+                    resolve_seconds=max((resolved_at - logged_at).total_seconds(), 0.0))
+
+    def series(self, granularity: str = 'day', start: Optional[datetime] = None, end: Optional[datetime] = None,
+               group_by: Optional[str] = None, filters: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Per-bucket occurrences, resolutions and mean time to resolve, optionally split by one dimension"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unsupported granularity: {granularity}")
+        if group_by is not None and group_by not in GROUP_BY_COLUMNS:
+            raise ValueError(f"Unsupported group_by: {group_by}")
+
+        columns = [ErrorRollup.bucket_start]
+        if group_by:
+            columns.append(getattr(ErrorRollup, group_by))
+        query = db.session.query(
+            *columns,
+            func.sum(ErrorRollup.occurrences),
+            func.sum(ErrorRollup.resolved),
+            func.sum(ErrorRollup.resolve_seconds)
+        ).filter(ErrorRollup.granularity == granularity)
+
+        if start is not None:
+            query = query.filter(ErrorRollup.bucket_start >= start)
+        if end is not None:
+            query = query.filter(ErrorRollup.bucket_start < end)
+        for name, value in (filters or {}).items():
+            if value is not None:
+                query = query.filter(getattr(ErrorRollup, name) == value)
+
+        points: List[Dict[str, Any]] = []
+        totals = defaultdict(float)
+        for row in query.group_by(*columns).order_by(*columns):
+            occurrences, resolved, resolve_seconds = int(row[-3] or 0), int(row[-2] or 0), float(row[-1] or 0.0)
+            point = {
+                'bucket_start': row[0].isoformat(),
+                'occurrences': occurrences,
+                'resolved': resolved,
+                'mean_time_to_resolve_seconds': resolve_seconds / resolved if resolved else None
+            }
+            if group_by:
+                point[group_by] = row[1]
+            points.append(point)
+
+            totals['occurrences'] += occurrences
+            totals['resolved'] += resolved
+            totals['resolve_seconds'] += resolve_seconds
+
+        return {
+            'granularity': granularity,
+            'group_by': group_by,
+            'series': points,
+            'totals': {
+                'occurrences': int(totals['occurrences']),
+                'resolved': int(totals['resolved']),
+                'mean_time_to_resolve_seconds': (
+                    totals['resolve_seconds'] / totals['resolved'] if totals['resolved'] else None
+                )
+            }
+        }
+
+
+# Global error rollups instance
+error_rollups = ErrorRollups()
@@ -0,0 +1,183 @@
+"""
+Conditional GET for Manus II
+Per-table version counters bumped inside every writing transaction, weak
+ETags derived from the versions a listing reads plus its query string, and a
+cache of serialized bodies keyed by ETag
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from typing import Dict, Any, Optional, Tuple
+from flask import Response, request, make_response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.models.knowledge_base import db
+from src.models.knowledge_models import TableVersion
+from .counters import add_to_counter
+
+
+class TableVersions:
+    """
+    Versions live in the database so every worker agrees on them; each process
+    caches what it read for `ttl` seconds, so a 304 normally costs no query and
+    a write made by another worker is visible after at most `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float = 1.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versions: Dict[str, Tuple[int, float]] = {}
+        self._invalidations: Dict[str, int] = {}  # table -> times its cached version was dropped
+
+        # Instrumentation
+        self.reads = 0
+        self.bumps = 0
+
+    def bump(self, table_name: str):
+        """Increment a table's version in the caller's transaction"""
+        # One upsert, so two workers bumping a table for the first time do not race on the insert
+        add_to_counter(TableVersion.__table__, {'table_name': table_name}, {'version': 1},
+                       values={'updated_at': datetime.utcnow()})
+
+        # The cached version is dropped once the transaction ends (see _end_transaction);
+        # dropping it now would let a concurrent reader re-cache the pre-commit version
+        db.session.info.setdefault('bumped_tables', set()).add(table_name)
+        with self._lock:
+            self.bumps += 1
+
+    def invalidate(self, table_names):
+        with self._lock:
+            for table_name in table_names:
+                self._versions.pop(table_name, None)
+                self._invalidations[table_name] = self._invalidations.get(table_name, 0) + 1
+
+    def reset(self):
+        """Forget every cached version"""
+        with self._lock:
+            table_names = list(self._versions)
+        self.invalidate(table_names)
+
+    def get(self, table_name: str) -> int:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(table_name)
+            invalidations = self._invalidations.get(table_name, 0)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        version = db.session.query(TableVersion.version).filter(
+            TableVersion.table_name == table_name
+        ).scalar() or 0
+        with self._lock:
+            # A commit that landed while we were reading may not be in what we read
+            if self._invalidations.get(table_name, 0) == invalidations:
+                self._versions[table_name] = (version, now + self.ttl)
+            self.reads += 1
+        return version
+
+    def etag(self, table_names: Tuple[str, ...], key: str) -> str:
+        """Opaque tag for a response that depends on the given tables and request key"""
+        versions = ','.join(f'{name}:{self.get(name)}' for name in table_names)
+        return hashlib.sha1(f'{versions}|{key}'.encode('utf-8')).hexdigest()[:20]
+
+
+class BodyCache:
+    """LRU of encoded response bodies keyed by ETag"""
+
+    def __init__(self, max_entries: int = 256, max_body_bytes: int = 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self._lock = threading.Lock()
+        self._bodies: 'OrderedDict[str, Tuple[bytes, str]]' = OrderedDict()
+
+        # Instrumentation
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, etag: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            cached = self._bodies.get(etag)
+            if cached is None:
+                self.misses += 1
+                return None
+            self._bodies.move_to_end(etag)
+            self.hits += 1
+            return cached
+
+    def put(self, etag: str, body: bytes, mimetype: str):
+        if len(body) > self.max_body_bytes:
+            return
+        with self._lock:
+            self._bodies[etag] = (body, mimetype)
+            self._bodies.move_to_end(etag)
+            while len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+
+    def reset(self):
+        with self._lock:
+            self._bodies.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._bodies)
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified
+        }
+
+
+def conditional_get(*table_names: str):
+    """
+    Serve a GET view with a weak ETag over the given tables. If-None-Match
+    matches are answered with 304 and cached bodies are replayed without
+    running the view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = f'{request.path}?' + '&'.join(
+                f'{name}={value}' for name, value in sorted(request.args.items(multi=True))
+            )
+            etag = table_versions.etag(table_names, key)
+
+            if request.if_none_match.contains_weak(etag):
+                body_cache.not_modified += 1
+                response = Response(status=304)
+                response.set_etag(etag, weak=True)
+                return response
+
+            cached = body_cache.get(etag)
+            if cached is not None:
+                response = Response(cached[0], mimetype=cached[1])
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                body_cache.put(etag, response.get_data(), response.mimetype)
+
+            response.set_etag(etag, weak=True)
+            return response
+        return wrapper
+    return decorator
+
+
+# Global table version and body cache instances
+table_versions = TableVersions()
+body_cache = BodyCache()
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _end_transaction(session, transaction):
+    """Drop the cached versions of tables bumped once the outermost transaction commits or rolls back"""
+    if transaction.parent is not None:
+        return
+    bumped = session.info.pop('bumped_tables', None)
+    if bumped:
+        table_versions.invalidate(bumped)
@@ -0,0 +1,40 @@
+"""
+Streaming Export for Manus II
+Encodes column-tuple queries as NDJSON chunks straight from a server-side
+cursor, optionally gzip-compressing on the fly, so exports run in constant
+memory however large the table is
+"""
+
+import zlib
+from typing import Iterator
+from .serializers import BulkSerializer
+
+# Bytes of encoded rows gathered before a chunk is handed to the server
+CHUNK_BYTES = 64 * 1024
+
+
+def stream_ndjson(serializer: BulkSerializer, query, batch_size: int = 1000,
+                  compress: bool = False) -> Iterator[bytes]:
+    """Yield NDJSON chunks for a query selecting serializer.columns"""
+    rows = query.execution_options(stream_results=True, yield_per=batch_size)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits 31: gzip framing
+
+    buffer = []
+    buffered = 0
+    for row in rows:
+        line = serializer.encode_row(row) + b'\n'
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= CHUNK_BYTES:
+            chunk = b''.join(buffer)
+            buffer = []
+            buffered = 0
+            if compressor is not None:
+                chunk = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            yield chunk
+
+    chunk = b''.join(buffer)
+    if compressor is not None:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
@@ -0,0 +1,100 @@
+"""
+Knowledge Facets for Manus II
+Category counters maintained incrementally on every knowledge write (tag
+counters live in the tag index), so the browse histograms are read in
+O(facets), plus facet counts within a filtered result and a rebuild job that
+corrects counter drift
+"""
+
+from collections import Counter
+from typing import Dict, Any, List, Optional
+from sqlalchemy import func
+from src.models.knowledge_base import db, KnowledgeEntry
+from src.models.knowledge_models import EntityTag, TagCount, FacetCount
+from .tag_index import tag_index, KNOWLEDGE
+from .counters import add_to_counter
+
+CATEGORY = 'category'
+
+
+class FacetIndex:
+    """Maintains facet_counts for knowledge categories; callers own the transaction"""
+
+    def adjust(self, facet: str, deltas: Counter, entity_type: str = KNOWLEDGE):
+        """Apply +/- deltas per facet value"""
+        table = FacetCount.__table__
+        for value, delta in deltas.items():
+            if delta == 0 or value is None:
+                continue
+            # Decrements never create a row
+            add_to_counter(table, {'entity_type': entity_type, 'facet': facet, 'value': value},
+                           {'count': delta}, create=delta > 0)
+
+    def category_changed(self, old: Optional[str], new: Optional[str]):
+        """Record one entry moving between categories (None for insert or delete)"""
+        if old != new:
+            self.adjust(CATEGORY, Counter({old: -1, new: 1}))
+
+    def histogram(self, limit: int = 100) -> Dict[str, List[Dict[str, Any]]]:
+        """Category and tag histograms of the whole knowledge base, read from the counters"""
+        categories = FacetCount.query.filter(
+            FacetCount.entity_type == KNOWLEDGE,
+            FacetCount.facet == CATEGORY,
+            FacetCount.count > 0
+        ).order_by(FacetCount.count.desc(), FacetCount.value).limit(limit)
+
+        return {
+            'categories': [row.to_dict() for row in categories],
+            'tags': [{'value': row['tag'], 'count': row['count']}
+                     for row in tag_index.cardinality(KNOWLEDGE, limit=limit)]
+        }
+
+    def within(self, query, limit: int = 100) -> Dict[str, Any]:
+        """Category and tag histograms of the entries matched by a filtered KnowledgeEntry query"""
+        matched_ids = query.with_entities(KnowledgeEntry.id).subquery()
+
+        count = func.count(KnowledgeEntry.id)
+        categories = db.session.query(KnowledgeEntry.category, count).filter(
+            KnowledgeEntry.id.in_(db.session.query(matched_ids.c.id))
+        ).group_by(KnowledgeEntry.category).order_by(count.desc(), KnowledgeEntry.category).limit(limit)
+
+        tag_count = func.count(EntityTag.entity_id)
+        tags = db.session.query(EntityTag.tag, tag_count).filter(
+            EntityTag.entity_type == KNOWLEDGE,
+            EntityTag.entity_id.in_(db.session.query(matched_ids.c.id))
+        ).group_by(EntityTag.tag).order_by(tag_count.desc(), EntityTag.tag).limit(limit)
+
+        return {
+            'total': query.order_by(None).count(),
+            'categories': [{'value': value, 'count': n} for value, n in categories],
+            'tags': [{'value': value, 'count': n} for value, n in tags]
+        }
+
+    def rebuild(self) -> Dict[str, Any]:
+        """Recount categories and knowledge tags from the source rows and fix drifted counters"""
+        corrected = {CATEGORY: 0, 'tags': 0}
+
+        actual = dict(db.session.query(KnowledgeEntry.category, func.count(KnowledgeEntry.id))
+                      .group_by(KnowledgeEntry.category))
+        stored = dict(db.session.query(FacetCount.value, FacetCount.count).filter(
+            FacetCount.entity_type == KNOWLEDGE, FacetCount.facet == CATEGORY
+        ))
+        deltas = Counter({value: actual.get(value, 0) - (stored.get(value) or 0)
+                          for value in set(actual) | set(stored)})
+        corrected[CATEGORY] = sum(1 for delta in deltas.values() if delta)
+        self.adjust(CATEGORY, deltas)
+
+        actual = dict(db.session.query(EntityTag.tag, func.count(EntityTag.id))
+                      .filter(EntityTag.entity_type == KNOWLEDGE).group_by(EntityTag.tag))
+        stored = dict(db.session.query(TagCount.tag, TagCount.count).filter(TagCount.entity_type == KNOWLEDGE))
+        deltas = Counter({tag: actual.get(tag, 0) - (stored.get(tag) or 0)
+                          for tag in set(actual) | set(stored)})
+        corrected['tags'] = sum(1 for delta in deltas.values() if delta)
+        tag_index.adjust_counts(KNOWLEDGE, deltas)
+
+        db.session.commit()
+        return {'success': True, 'corrected': corrected}
+
+
+# Global facet index instance
+facet_index = FacetIndex()
@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Dict, Any, List, Optional
 import tempfile
 import os
+from .metrics import metrics_collector
 
 class GeminiCLIClient:
     """
@@ -49,6 +50,7 @@ class GeminiCLIClient:
             Provide evidence-based insights and research methodologies."""
         }
     
+    @metrics_collector.timed('gemini.chat')
     def chat(self, message: str, character: str = "ibn-sina", session_id: Optional[str] = None, context: Optional[str] = None) -> Dict[str, Any]:
         """
         Chat with Gemini CLI using character personas
@@ -126,6 +128,7 @@ class GeminiCLIClient:
                 'timestamp': datetime.now().isoformat()
             }
     
+    @metrics_collector.timed('gemini.analyze_data')
     def analyze_data(self, data_description: str, analysis_type: str = "general") -> Dict[str, Any]:
         """
         Analyze data using Gemini CLI's analytical capabilities
@@ -190,6 +193,7 @@ Focus on scientific rigor and actionable insights."""
                 'timestamp': datetime.now().isoformat()
             }
     
+    @metrics_collector.timed('gemini.search_web')
     def search_web(self, query: str) -> Dict[str, Any]:
         """
         Use Gemini CLI's built-in Google Search capability
@@ -240,6 +244,7 @@ Focus on scientific rigor and actionable insights."""
                 'timestamp': datetime.now().isoformat()
             }
     
+    @metrics_collector.timed('gemini.process_file')
     def process_file(self, file_path: str, task: str) -> Dict[str, Any]:
         """
         Process files using Gemini CLI's file operation capabilities
@@ -288,6 +293,7 @@ Focus on scientific rigor and actionable insights."""
         """
         return list(self.character_prompts.keys())
     
+    @metrics_collector.timed('gemini.health_check')
     def health_check(self) -> Dict[str, Any]:
         """
         Check if Gemini CLI is available and working
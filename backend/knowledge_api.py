@@ -1,67 +1,299 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from sqlalchemy.exc import IntegrityError
 from src.models.knowledge_base import db, KnowledgeEntry, ErrorLog, ConceptualFramework
+from src.models.knowledge_models import ErrorAggregate
+from .error_aggregator import error_aggregator, error_fingerprint
+from .serializers import (knowledge_serializer, error_log_serializer, error_aggregate_serializer, framework_serializer,
+                          repair_json_columns)
+from .tag_index import tag_index, normalize_tags, KNOWLEDGE, TAGGED_MODELS
+from .knowledge_ingest import knowledge_ingestor
+from .knowledge_bulk import knowledge_bulk_editor, validate_changes
+from .search_index import search_index, ERROR_LOG
+from .similar_errors import similar_errors
+from .snippets import knowledge_snippets
+from .knowledge_snapshot import knowledge_snapshot
+from .knowledge_dedup import knowledge_dedup, content_hash, REJECT, MERGE, EXACT
+from .memory_graph import memory_graph
+from .memory_ranking import memory_ranker
+from .memory_sweeper import memory_sweeper
+from .skill_usage import skill_usage
+from .export import stream_ndjson
+from .etags import conditional_get, table_versions
+from .facets import facet_index
+from .error_rollups import error_rollups, GRANULARITIES, GROUP_BY_COLUMNS
+from .pagination import keyset_page, count_cache, InvalidCursor, COUNT_CACHED, COUNT_MODES
 from datetime import datetime
+import atexit
 import json
 
 knowledge_bp = Blueprint('knowledge', __name__)
 
-@knowledge_bp.route('/knowledge', methods=['GET'])
-def get_knowledge():
-    """Retrieve knowledge entries with optional filtering"""
-    category = request.args.get('category')
-    tags = request.args.get('tags')
-    search = request.args.get('search')
+@knowledge_bp.record_once
+def _start_error_aggregator(state):
+    """Flush pending error aggregates on a timer so that error reads stay read-only"""
+    error_aggregator.start(state.app)
+
+@knowledge_bp.record_once
+def _start_memory_ranker(state):
+    """Warm memory scores at startup so the first chat query does not load them, then write them back on a timer"""
+    memory_ranker.start(state.app)
+
+@knowledge_bp.record_once
+def _start_memory_sweeper(state):
+    """Delete expired short-term memory on a timer, stopping the sweep cleanly at interpreter shutdown"""
+    memory_sweeper.start(state.app)
+    atexit.register(memory_sweeper.stop)
+
+@knowledge_bp.record_once
+def _start_skill_usage(state):
+    """Flush buffered skill usage on a timer and once more at interpreter shutdown"""
+    skill_usage.start(state.app)
+    atexit.register(skill_usage.stop)
+
+def _json_response(body: bytes, status: int = 200) -> Response:
+    """Wrap an already encoded JSON body"""
+    return Response(body, status=status, mimetype='application/json')
+
+def _page_response(key, serializer, query, sort_column, id_column, filters):
+    """Keyset page of an entity query with its next cursor and a total per the count= mode"""
+    count_mode = request.args.get('count', COUNT_CACHED)
+    if count_mode not in COUNT_MODES:
+        return jsonify({'error': f'Unsupported count mode {count_mode}'}), 400
+    if 'offset' in request.args:
+        # Offset paging was replaced by keyset cursors; ignoring it would repeat page 1 forever
+        return jsonify({'error': 'offset is no longer supported; pass the next_cursor of the previous page as cursor'}), 400
     limit = request.args.get('limit', 50, type=int)
-    offset = request.args.get('offset', 0, type=int)
+    if limit < 1:
+        return jsonify({'error': 'limit must be at least 1'}), 400
+    
+    try:
+        rows, next_cursor = keyset_page(
+            query.with_entities(*serializer.columns), sort_column, id_column,
+            request.args.get('cursor'), limit,
+            serializer.positions[sort_column.key][0], serializer.positions['id'][0]
+        )
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     
+    totals = count_cache.count(sort_column.table.name, filters, query, count_mode)
+    return _json_response(serializer.encode_page(key, rows, next_cursor=next_cursor, **totals))
+
+def _export_since():
+    """Parse the since= parameter of the export endpoints (None when absent)"""
+    since = request.args.get('since')
+    return datetime.fromisoformat(since) if since else None
+
+def _export_response(serializer, query, name):
+    """
+    Stream a column-tuple query as NDJSON, gzip-compressed on ?gzip=1 or when the
+    client accepts gzip. X-Export-Started-At is the since= value for the next
+    incremental export; rows changed during the export may be exported twice.
+    """
+    started_at = datetime.utcnow()
+    if 'gzip' in request.args:
+        compress = request.args.get('gzip') == '1'
+    else:
+        # Quality-aware, so 'gzip;q=0' is a refusal
+        compress = request.accept_encodings['gzip'] > 0
+    
+    headers = {
+        'Content-Disposition': f'attachment; filename={name}.ndjson' + ('.gz' if compress else ''),
+        'X-Export-Started-At': started_at.isoformat(),
+        'Vary': 'Accept-Encoding'
+    }
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    
+    body = stream_ndjson(serializer, query, batch_size=request.args.get('batch_size', 1000, type=int),
+                         compress=compress)
+    return Response(stream_with_context(body), mimetype='application/x-ndjson', headers=headers)
+
+def _tag_list(tags):
+    """Tags of a comma-separated filter; blank ones such as ?tags=%20 are dropped, leaving no filter"""
+    return normalize_tags(tags.split(',')) if tags else []
+
+def _filtered_knowledge_query(category, tags, search):
+    """KnowledgeEntry query for the category / tags / search filters shared by listings and facets"""
     query = KnowledgeEntry.query
     
     if category:
         query = query.filter(KnowledgeEntry.category == category)
     
-    if tags:
-        tag_list = tags.split(',')
-        for tag in tag_list:
-            query = query.filter(KnowledgeEntry.tags.contains(f'"{tag}"'))
+    tag_list = _tag_list(tags)
+    if tag_list:
+        query = query.filter(KnowledgeEntry.id.in_(
+            db.session.query(tag_index.ids_with_all_tags(KNOWLEDGE, tag_list).c.entity_id)
+        ))
     
     if search:
-        query = query.filter(
-            db.or_(
-                KnowledgeEntry.title.contains(search),
-                KnowledgeEntry.content.contains(search)
-            )
-        )
+        query = search_index.filter(query, KNOWLEDGE, search)
+    
+    return query
+
+@knowledge_bp.route('/knowledge', methods=['GET'])
+@conditional_get(KnowledgeEntry.__tablename__)
+def get_knowledge():
+    """Retrieve knowledge entries with optional filtering"""
+    category = request.args.get('category')
+    tags = request.args.get('tags')
+    search = request.args.get('search')
     
-    query = query.order_by(KnowledgeEntry.updated_at.desc())
-    entries = query.offset(offset).limit(limit).all()
+    query = _filtered_knowledge_query(category, tags, search)
+    return _page_response('entries', knowledge_serializer, query, KnowledgeEntry.updated_at, KnowledgeEntry.id,
+                          {'category': category, 'tags': tags, 'search': search})
+
+@knowledge_bp.route('/knowledge/export', methods=['GET'])
+def export_knowledge():
+    """Stream every knowledge entry (or those updated since= a timestamp) as NDJSON"""
+    try:
+        since = _export_since()
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO 8601 timestamp'}), 400
     
-    return jsonify({
-        'entries': [entry.to_dict() for entry in entries],
-        'total': query.count()
-    })
+    query = knowledge_serializer.query()
+    if since:
+        query = query.filter(KnowledgeEntry.updated_at >= since)
+    query = query.order_by(KnowledgeEntry.updated_at.asc(), KnowledgeEntry.id.asc())
+    
+    return _export_response(knowledge_serializer, query, 'knowledge')
 
 @knowledge_bp.route('/knowledge', methods=['POST'])
 def add_knowledge():
-    """Add a new knowledge entry"""
+    """Add a new knowledge entry; exact duplicates are handled per the dedup policy (?dedup= overrides)"""
     data = request.get_json()
     
     if not data or not all(k in data for k in ['category', 'title', 'content']):
         return jsonify({'error': 'Missing required fields'}), 400
     
-    entry = KnowledgeEntry(
-        category=data['category'],
-        title=data['title'],
-        content=data['content'],
-        meta_data=json.dumps(data.get('metadata', {})),
-        tags=json.dumps(data.get('tags', [])),
-        confidence_score=data.get('confidence_score', 1.0),
-        source=data.get('source')
+    try:
+        policy = knowledge_dedup.policy('add', request.args.get('dedup'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    fingerprint = knowledge_dedup.fingerprint(data['content'])
+    for attempt in range(2):
+        match = knowledge_dedup.find(fingerprint)
+        if match is not None and match.kind == EXACT:
+            if policy == REJECT:
+                return jsonify({'error': 'Duplicate content', **match.to_dict()}), 409
+            if policy == MERGE:
+                existing = KnowledgeEntry.query.get(match.entry_id)
+                knowledge_dedup.merge(existing, data.get('tags', []), data.get('confidence_score'), data.get('metadata'))
+                table_versions.bump(KnowledgeEntry.__tablename__)
+                db.session.commit()
+                return jsonify({**existing.to_dict(), 'merged': True})
+        
+        entry = KnowledgeEntry(
+            category=data['category'],
+            title=data['title'],
+            content=data['content'],
+            meta_data=json.dumps(data.get('metadata', {})),
+            tags=json.dumps(data.get('tags', [])),
+            confidence_score=data.get('confidence_score', 1.0),
+            source=data.get('source')
+        )
+        
+        try:
+            db.session.add(entry)
+            db.session.flush()
+            tag_index.set_tags(KNOWLEDGE, entry.id, data.get('tags', []))
+            facet_index.category_changed(None, entry.category)
+            search_index.set_text(KNOWLEDGE, entry.id, entry.title, entry.content)
+            knowledge_snippets.set(entry.id, entry.content)
+            # Inserts the unique content hash, so a concurrent copy fails here rather than on commit
+            knowledge_dedup.index(entry.id, fingerprint, match)
+            table_versions.bump(KnowledgeEntry.__tablename__)
+            db.session.commit()
+            break
+        except IntegrityError:
+            # A concurrent request stored the same content first; apply the policy to its entry
+            db.session.rollback()
+            if attempt:
+                return jsonify({'error': 'Duplicate content', 'content_hash': fingerprint.content_hash}), 409
+    count_cache.invalidate(KnowledgeEntry.__tablename__)
+    
+    response = entry.to_dict()
+    if match is not None:
+        response['duplicate'] = match.to_dict()
+    return jsonify(response), 201
+
+@knowledge_bp.route('/knowledge/bulk', methods=['POST'])
+def bulk_add_knowledge():
+    """Stream NDJSON knowledge entries (optionally gzip-compressed) into the knowledge base in batches"""
+    compressed = (request.headers.get('Content-Encoding') == 'gzip'
+                  or request.mimetype in ('application/gzip', 'application/x-gzip'))
+    try:
+        policy = knowledge_dedup.policy('bulk', request.args.get('dedup'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    result = knowledge_ingestor.ingest(
+        request.stream,
+        compressed=compressed,
+        batch_size=request.args.get('batch_size', type=int),
+        policy=policy
     )
+    if result['inserted'] or result['merged']:
+        table_versions.bump(KnowledgeEntry.__tablename__)
+        db.session.commit()
+        count_cache.invalidate(KnowledgeEntry.__tablename__)
     
-    db.session.add(entry)
-    db.session.commit()
+    result['success'] = result['failed'] == 0 and 'body_error' not in result
+    return jsonify(result)
+
+def _bulk_target(data):
+    """Id chunks for a bulk body selecting {"ids": [...]} or {"filter": {"category", "tags", "search"}}"""
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not all(isinstance(entry_id, int) and not isinstance(entry_id, bool)
+                                                for entry_id in ids):
+            raise ValueError('ids must be an array of integers')
+        return knowledge_bulk_editor.id_chunks(ids=ids)
     
-    return jsonify(entry.to_dict()), 201
+    filters = data.get('filter') or {}
+    tags = filters.get('tags') if isinstance(filters, dict) else None
+    if isinstance(tags, list):
+        tags = ','.join(tags)
+    # Blank tags filter nothing, so they must not turn a bulk edit into one over every entry
+    if not isinstance(filters, dict) or not (filters.get('category') or _tag_list(tags) or filters.get('search')):
+        raise ValueError('Provide ids or a filter with category, tags or search')
+    
+    return knowledge_bulk_editor.id_chunks(
+        query=_filtered_knowledge_query(filters.get('category'), tags, filters.get('search'))
+    )
+
+def _bulk_response(result):
+    count_cache.invalidate(KnowledgeEntry.__tablename__)
+    return jsonify(result), 200 if result['success'] else 500
+
+@knowledge_bp.route('/knowledge/bulk', methods=['PATCH'])
+def bulk_update_knowledge():
+    """Update category, confidence, source, metadata and/or tags of many entries in chunked transactions"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    
+    try:
+        chunks = _bulk_target(data)
+        changes = validate_changes(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return _bulk_response(knowledge_bulk_editor.update(chunks, changes))
+
+@knowledge_bp.route('/knowledge/bulk', methods=['DELETE'])
+def bulk_delete_knowledge():
+    """Delete many entries by ids or filter in chunked transactions"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    
+    try:
+        chunks = _bulk_target(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return _bulk_response(knowledge_bulk_editor.delete(chunks))
 
 @knowledge_bp.route('/knowledge/<int:entry_id>', methods=['PUT'])
 def update_knowledge(entry_id):
@@ -69,6 +301,23 @@ def update_knowledge(entry_id):
     entry = KnowledgeEntry.query.get_or_404(entry_id)
     data = request.get_json()
     
+    if 'content' in data and content_hash(data['content']) != content_hash(entry.content or ''):
+        try:
+            policy = knowledge_dedup.policy('update', request.args.get('dedup'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if policy == MERGE:
+            return jsonify({'error': 'Updates support the reject and allow dedup policies'}), 400
+        
+        fingerprint = knowledge_dedup.fingerprint(data['content'])
+        match = knowledge_dedup.find(fingerprint, exclude_id=entry.id)
+        if match is not None and match.kind == EXACT and policy == REJECT:
+            return jsonify({'error': 'Duplicate content', **match.to_dict()}), 409
+        knowledge_dedup.reindex(entry.id, fingerprint, match)
+    
+    if 'category' in data:
+        facet_index.category_changed(entry.category, data['category'])
+        entry.category = data['category']
     if 'title' in data:
         entry.title = data['title']
     if 'content' in data:
@@ -77,12 +326,18 @@ def update_knowledge(entry_id):
         entry.meta_data = json.dumps(data['metadata'])
     if 'tags' in data:
         entry.tags = json.dumps(data['tags'])
+        tag_index.set_tags(KNOWLEDGE, entry.id, data['tags'])
     if 'confidence_score' in data:
         entry.confidence_score = data['confidence_score']
     if 'source' in data:
         entry.source = data['source']
+    if 'title' in data or 'content' in data:
+        search_index.set_text(KNOWLEDGE, entry.id, entry.title, entry.content)
+    if 'content' in data:
+        knowledge_snippets.set(entry.id, entry.content)
     
     entry.updated_at = datetime.utcnow()
+    table_versions.bump(KnowledgeEntry.__tablename__)
     db.session.commit()
     
     return jsonify(entry.to_dict())
@@ -91,20 +346,140 @@ def update_knowledge(entry_id):
 def delete_knowledge(entry_id):
     """Delete a knowledge entry"""
     entry = KnowledgeEntry.query.get_or_404(entry_id)
+    tag_index.remove(KNOWLEDGE, [entry.id])
+    facet_index.category_changed(entry.category, None)
+    memory_graph.remove_nodes(KNOWLEDGE, [entry.id])
+    knowledge_dedup.remove([entry.id])
+    search_index.remove(KNOWLEDGE, [entry.id])
+    knowledge_snippets.remove([entry.id])
+    knowledge_snapshot.record_deletions([entry.id])
     db.session.delete(entry)
+    table_versions.bump(KnowledgeEntry.__tablename__)
     db.session.commit()
+    count_cache.invalidate(KnowledgeEntry.__tablename__)
     
     return jsonify({'message': 'Knowledge entry deleted successfully'})
 
+@knowledge_bp.route('/knowledge/tags', methods=['GET'])
+def get_tag_cardinality():
+    """Number of entries per tag, served from the tag counters"""
+    entity_type = request.args.get('entity_type', KNOWLEDGE)
+    tags = request.args.get('tags')
+    limit = request.args.get('limit', 100, type=int)
+    
+    if entity_type not in TAGGED_MODELS:
+        return jsonify({'error': f'Unknown entity type {entity_type}'}), 400
+    
+    return jsonify({
+        'entity_type': entity_type,
+        'tags': tag_index.cardinality(entity_type, _tag_list(tags) or None, limit)
+    })
+
+@knowledge_bp.route('/knowledge/tags/backfill', methods=['POST'])
+def backfill_tags():
+    """Index the JSON tags of rows written before the tag index existed"""
+    data = request.get_json(silent=True) or {}
+    entity_types = data.get('entity_types', list(TAGGED_MODELS))
+    
+    unknown = [entity_type for entity_type in entity_types if entity_type not in TAGGED_MODELS]
+    if unknown:
+        return jsonify({'error': f"Unknown entity types: {', '.join(unknown)}"}), 400
+    
+    results = [tag_index.backfill(entity_type, batch_size=data.get('batch_size', 1000))
+               for entity_type in entity_types]
+    
+    # Tag filters on /knowledge read the index
+    if KNOWLEDGE in entity_types:
+        table_versions.bump(KnowledgeEntry.__tablename__)
+        db.session.commit()
+    return jsonify({'success': True, 'results': results})
+
+@knowledge_bp.route('/knowledge/search/backfill', methods=['POST'])
+def backfill_search_terms():
+    """Index the title and content of entries written before the search index existed"""
+    data = request.get_json(silent=True) or {}
+    result = search_index.backfill(KNOWLEDGE, batch_size=data.get('batch_size', 500))
+    
+    # Search filters on /knowledge read the index
+    table_versions.bump(KnowledgeEntry.__tablename__)
+    db.session.commit()
+    return jsonify(result)
+
+@knowledge_bp.route('/knowledge/snippets/backfill', methods=['POST'])
+def backfill_snippets():
+    """Cut prompt snippets for entries without one, or cut for a different token budget"""
+    data = request.get_json(silent=True) or {}
+    return jsonify(knowledge_snippets.backfill(batch_size=data.get('batch_size', 500)))
+
+@knowledge_bp.route('/knowledge/dedup/backfill', methods=['POST'])
+def backfill_content_hashes():
+    """Hash and LSH-index entries written before deduplication existed"""
+    data = request.get_json(silent=True) or {}
+    return jsonify(knowledge_dedup.backfill(batch_size=data.get('batch_size', 500)))
+
+@knowledge_bp.route('/knowledge/json/repair', methods=['POST'])
+def repair_json():
+    """Replace malformed legacy JSON columns once, since listings and exports splice stored JSON unchecked"""
+    data = request.get_json(silent=True) or {}
+    repaired = repair_json_columns(batch_size=data.get('batch_size', 500))
+    
+    for table_name, count in repaired.items():
+        if count:
+            table_versions.bump(table_name)
+    db.session.commit()
+    return jsonify({'success': True, 'repaired': repaired})
+
+@knowledge_bp.route('/knowledge/facets', methods=['GET'])
+@conditional_get(KnowledgeEntry.__tablename__)
+def get_knowledge_facets():
+    """Category and tag counts, for the whole knowledge base or within a category / tags / search filter"""
+    category = request.args.get('category')
+    tags = request.args.get('tags')
+    search = request.args.get('search')
+    limit = request.args.get('limit', 100, type=int)
+    
+    if not (category or tags or search):
+        return jsonify(facet_index.histogram(limit))
+    
+    return jsonify(facet_index.within(_filtered_knowledge_query(category, tags, search), limit))
+
+@knowledge_bp.route('/knowledge/facets/rebuild', methods=['POST'])
+def rebuild_knowledge_facets():
+    """Recount category and tag facets from the source rows"""
+    result = facet_index.rebuild()
+    table_versions.bump(KnowledgeEntry.__tablename__)
+    db.session.commit()
+    return jsonify(result)
+
 @knowledge_bp.route('/errors', methods=['GET'])
+@conditional_get(ErrorLog.__tablename__, ErrorAggregate.__tablename__)
 def get_errors():
-    """Retrieve error logs with optional filtering"""
+    """
+    Retrieve aggregated errors (or raw error logs with view=raw) with optional
+    filtering. Aggregates are served as of the aggregator's last flush, so an
+    error POSTed less than its flush interval (10 s) ago may not be counted
+    yet; view=raw reads the error logs, which are committed immediately
+    """
     error_type = request.args.get('error_type')
     status = request.args.get('status')
     impact = request.args.get('impact')
     source_ai = request.args.get('source_ai')
-    limit = request.args.get('limit', 50, type=int)
-    offset = request.args.get('offset', 0, type=int)
+    filters = {'error_type': error_type, 'status': status, 'impact': impact, 'source_ai': source_ai}
+    
+    if request.args.get('view') != 'raw':
+        # Never flushed by a read, see above
+        query = ErrorAggregate.query
+        if error_type:
+            query = query.filter(ErrorAggregate.error_type == error_type)
+        if status:
+            query = query.filter(ErrorAggregate.status == status)
+        if impact:
+            query = query.filter(ErrorAggregate.impact == impact)
+        if source_ai:
+            query = query.filter(ErrorAggregate.source_ai == source_ai)
+        
+        return _page_response('errors', error_aggregate_serializer, query,
+                              ErrorAggregate.last_seen, ErrorAggregate.id, filters)
     
     query = ErrorLog.query
     
@@ -117,13 +492,64 @@ def get_errors():
     if source_ai:
         query = query.filter(ErrorLog.source_ai == source_ai)
     
-    query = query.order_by(ErrorLog.created_at.desc())
-    errors = query.offset(offset).limit(limit).all()
+    return _page_response('errors', error_log_serializer, query, ErrorLog.created_at, ErrorLog.id, filters)
+
+@knowledge_bp.route('/errors/export', methods=['GET'])
+def export_errors():
+    """
+    Stream every error log (or those created or resolved since= a timestamp) as
+    NDJSON; view=aggregated streams the error aggregates instead, which hold the
+    engine's own failures (seen or resolved since= a timestamp)
+    """
+    try:
+        since = _export_since()
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO 8601 timestamp'}), 400
     
-    return jsonify({
-        'errors': [error.to_dict() for error in errors],
-        'total': query.count()
-    })
+    if request.args.get('view') == 'aggregated':
+        query = error_aggregate_serializer.query()
+        if since:
+            query = query.filter(db.or_(ErrorAggregate.last_seen >= since, ErrorAggregate.resolved_at >= since))
+        query = query.order_by(ErrorAggregate.last_seen.asc(), ErrorAggregate.id.asc())
+        return _export_response(error_aggregate_serializer, query, 'error_aggregates')
+    
+    query = error_log_serializer.query()
+    if since:
+        query = query.filter(db.or_(ErrorLog.created_at >= since, ErrorLog.resolved_at >= since))
+    query = query.order_by(ErrorLog.created_at.asc(), ErrorLog.id.asc())
+    
+    return _export_response(error_log_serializer, query, 'errors')
+
+@knowledge_bp.route('/errors/analytics', methods=['GET'])
+@conditional_get(ErrorLog.__tablename__, ErrorAggregate.__tablename__)
+def get_error_analytics():
+    """Error time-series and mean time to resolve from the hourly / daily rollups"""
+    granularity = request.args.get('granularity', 'day')
+    group_by = request.args.get('group_by')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': f'Unsupported granularity {granularity}'}), 400
+    if group_by and group_by not in GROUP_BY_COLUMNS:
+        return jsonify({'error': f'Unsupported group_by {group_by}'}), 400
+    
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO 8601 timestamps'}), 400
+    
+    result = error_rollups.series(
+        granularity=granularity,
+        start=start,
+        end=end,
+        group_by=group_by,
+        filters={name: request.args.get(name) for name in GROUP_BY_COLUMNS}
+    )
+    
+    # Current status split, read from the (small) aggregate table
+    result['status'] = dict(
+        db.session.query(ErrorAggregate.status, db.func.count(ErrorAggregate.id)).group_by(ErrorAggregate.status)
+    )
+    return jsonify(result)
 
 @knowledge_bp.route('/errors', methods=['POST'])
 def log_error():
@@ -144,7 +570,19 @@ def log_error():
     )
     
     db.session.add(error)
+    db.session.flush()
+    similar_errors.index(error)
+    table_versions.bump(ErrorLog.__tablename__)
     db.session.commit()
+    count_cache.invalidate(ErrorLog.__tablename__)
+    
+    error_aggregator.record(
+        error.error_type,
+        error.description,
+        data.get('context', {}),
+        impact=error.impact,
+        source_ai=error.source_ai
+    )
     
     return jsonify(error.to_dict()), 201
 
@@ -154,20 +592,88 @@ def resolve_error(error_id):
     error = ErrorLog.query.get_or_404(error_id)
     data = request.get_json()
     
+    if error.status != 'resolved':
+        resolved_at = datetime.utcnow()
+        error_rollups.record_resolved(error.error_type, error.impact, error.source_ai, error.created_at, resolved_at)
+        error.resolved_at = resolved_at
     error.status = 'resolved'
-    error.resolved_at = datetime.utcnow()
     if data and 'corrective_action' in data:
         error.corrective_action = data['corrective_action']
     
+    fingerprint = error_fingerprint(error.error_type, error.description)
+    error_aggregator.fold_pending(fingerprint)
+    error_aggregator.resolve(fingerprint, error.resolved_at)
+    similar_errors.index(error)
+    similar_errors.record_resolution(fingerprint, error.corrective_action, error.resolved_at)
+    table_versions.bump(ErrorLog.__tablename__)
+    table_versions.bump(ErrorAggregate.__tablename__)
     db.session.commit()
+    count_cache.invalidate(ErrorLog.__tablename__)
+    count_cache.invalidate(ErrorAggregate.__tablename__)
+    
+    # The fix is now eligible for similar-error lookups
+    similar_errors.invalidate()
     
     return jsonify(error.to_dict())
 
+@knowledge_bp.route('/errors/<int:error_id>/similar', methods=['GET'])
+def get_similar_errors(error_id):
+    """Resolved errors resembling this one, with their corrective actions"""
+    error = ErrorLog.query.get_or_404(error_id)
+    similar = similar_errors.lookup(error.description, error.error_type, exclude={'source': ERROR_LOG, 'id': error.id})
+    return jsonify({'error_id': error.id, 'similar_errors': similar})
+
+@knowledge_bp.route('/errors/search/backfill', methods=['POST'])
+def backfill_error_search_terms():
+    """Index logged and aggregated errors written before the error index existed"""
+    data = request.get_json(silent=True) or {}
+    return jsonify(similar_errors.backfill(batch_size=data.get('batch_size', 500)))
+
+@knowledge_bp.route('/errors/fingerprints/<fingerprint>/resolve', methods=['PUT'])
+def resolve_error_fingerprint(fingerprint):
+    """Mark every occurrence of an aggregated error as resolved, optionally recording its corrective action"""
+    data = request.get_json(silent=True) or {}
+    error_aggregator.fold_pending(fingerprint)
+    aggregate = ErrorAggregate.query.filter_by(fingerprint=fingerprint).first()
+    if aggregate is None:
+        return jsonify({'error': 'Error fingerprint not found'}), 404
+    
+    if aggregate.status != 'resolved':
+        error_aggregator.resolve(fingerprint)
+        error_rollups.record_resolved(aggregate.error_type, aggregate.impact, aggregate.source_ai,
+                                      aggregate.first_seen, aggregate.resolved_at)
+    similar_errors.record_resolution(fingerprint, data.get('corrective_action'), aggregate.resolved_at)
+    
+    table_versions.bump(ErrorAggregate.__tablename__)
+    db.session.commit()
+    count_cache.invalidate(ErrorAggregate.__tablename__)
+    
+    # The engine's own error is now eligible for similar-error lookups
+    similar_errors.invalidate()
+    
+    return jsonify(aggregate.to_dict())
+
 @knowledge_bp.route('/frameworks', methods=['GET'])
+@conditional_get(ConceptualFramework.__tablename__)
 def get_frameworks():
     """Retrieve conceptual frameworks"""
-    frameworks = ConceptualFramework.query.order_by(ConceptualFramework.updated_at.desc()).all()
-    return jsonify([framework.to_dict() for framework in frameworks])
+    rows = framework_serializer.query().order_by(ConceptualFramework.updated_at.desc()).all()
+    return _json_response(framework_serializer.encode_rows(rows))
+
+@knowledge_bp.route('/frameworks/export', methods=['GET'])
+def export_frameworks():
+    """Stream every conceptual framework (or those updated since= a timestamp) as NDJSON"""
+    try:
+        since = _export_since()
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO 8601 timestamp'}), 400
+    
+    query = framework_serializer.query()
+    if since:
+        query = query.filter(ConceptualFramework.updated_at >= since)
+    query = query.order_by(ConceptualFramework.updated_at.asc(), ConceptualFramework.id.asc())
+    
+    return _export_response(framework_serializer, query, 'frameworks')
 
 @knowledge_bp.route('/frameworks', methods=['POST'])
 def add_framework():
@@ -187,6 +693,7 @@ def add_framework():
     )
     
     db.session.add(framework)
+    table_versions.bump(ConceptualFramework.__tablename__)
     db.session.commit()
     
     return jsonify(framework.to_dict()), 201
@@ -0,0 +1,185 @@
+"""
+Bulk Knowledge Edits for Manus II
+Set-based updates and deletes over id lists or filter queries, applied in
+chunked transactions that keep the tag index, facet counters, association
+graph and table versions consistent with the rows
+"""
+
+import json
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, List, Iterator, Optional
+from sqlalchemy import bindparam, func
+from src.models.knowledge_base import db, KnowledgeEntry
+from .tag_index import tag_index, normalize_tags, KNOWLEDGE
+from .facets import facet_index, CATEGORY
+from .memory_graph import memory_graph
+from .etags import table_versions
+from .knowledge_dedup import knowledge_dedup
+from .search_index import search_index
+from .snippets import knowledge_snippets
+from .knowledge_snapshot import knowledge_snapshot
+
+# PATCH "set" fields and the column each one writes
+EDITABLE_FIELDS = {
+    'category': 'category',
+    'confidence_score': 'confidence_score',
+    'source': 'source',
+    'metadata': 'meta_data'
+}
+
+
+def validate_changes(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Check a PATCH body and return {'values': column values, 'tags': tag operations}"""
+    changes = data.get('set') or {}
+    if not isinstance(changes, dict):
+        raise ValueError('set must be an object')
+
+    unknown = [field for field in changes if field not in EDITABLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Fields cannot be bulk edited: {', '.join(unknown)}")
+    if 'category' in changes and not (isinstance(changes['category'], str) and changes['category']):
+        raise ValueError('category must be a non-empty string')
+    if 'confidence_score' in changes and (isinstance(changes['confidence_score'], bool)
+                                          or not isinstance(changes['confidence_score'], (int, float))):
+        raise ValueError('confidence_score must be a number')
+    if 'metadata' in changes and not isinstance(changes['metadata'], dict):
+        raise ValueError('metadata must be an object')
+
+    values = {EDITABLE_FIELDS[field]: value for field, value in changes.items()}
+    if 'meta_data' in values:
+        values['meta_data'] = json.dumps(values['meta_data'])
+
+    tags = {}
+    for operation in ('tags', 'add_tags', 'remove_tags'):
+        if operation in data:
+            if not isinstance(data[operation], list):
+                raise ValueError(f'{operation} must be an array')
+            tags[operation] = normalize_tags(data[operation])
+    if 'tags' in tags and ('add_tags' in tags or 'remove_tags' in tags):
+        raise ValueError('tags replaces the tag list and cannot be combined with add_tags / remove_tags')
+
+    if not values and not tags:
+        raise ValueError('Nothing to change')
+    return {'values': values, 'tags': tags}
+
+
+class KnowledgeBulkEditor:
+    """Each chunk of ids is one transaction; a failed chunk stops the run and is reported"""
+
+    def __init__(self, chunk_size: int = 500):
+        self.logger = logging.getLogger(__name__)
+        self.chunk_size = chunk_size
+
+    def id_chunks(self, ids: Optional[List[int]] = None, query=None) -> Iterator[List[int]]:
+        """Chunks of an explicit id list, or of the ids matched by a KnowledgeEntry query in id order"""
+        if ids is not None:
+            ids = sorted(set(ids))
+            for start in range(0, len(ids), self.chunk_size):
+                yield ids[start:start + self.chunk_size]
+            return
+
+        last_id = 0
+        while True:
+            chunk = [row[0] for row in query.with_entities(KnowledgeEntry.id).filter(
+                KnowledgeEntry.id > last_id
+            ).order_by(KnowledgeEntry.id.asc()).limit(self.chunk_size)]
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1]
+
+    def update(self, chunks: Iterator[List[int]], changes: Dict[str, Any]) -> Dict[str, Any]:
+        result = {'matched': 0, 'updated': 0, 'tags_changed': 0, 'chunks': 0}
+        for chunk in chunks:
+            try:
+                updated, tags_changed = self._update_chunk(chunk, changes)
+                table_versions.bump(KnowledgeEntry.__tablename__)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self.logger.error(f"Bulk knowledge update failed: {str(e)}")
+                return {**result, 'success': False, 'error': str(e), 'failed_ids': chunk}
+
+            result['matched'] += len(chunk)
+            result['updated'] += updated
+            result['tags_changed'] += tags_changed
+            result['chunks'] += 1
+        return {**result, 'success': True}
+
+    def _update_chunk(self, chunk: List[int], changes: Dict[str, Any]):
+        values = dict(changes['values'])
+        table = KnowledgeEntry.__table__
+
+        if 'category' in values:
+            deltas = Counter()
+            for category, count in db.session.query(KnowledgeEntry.category, func.count(KnowledgeEntry.id)).filter(
+                KnowledgeEntry.id.in_(chunk)
+            ).group_by(KnowledgeEntry.category):
+                deltas[category] -= count
+                deltas[values['category']] += count
+            facet_index.adjust(CATEGORY, deltas)
+
+        values['updated_at'] = datetime.utcnow()
+        updated = db.session.execute(table.update().where(table.c.id.in_(chunk)).values(**values)).rowcount
+
+        tags_changed = 0
+        operations = changes['tags']
+        if operations:
+            new_tags = {}
+            for entry_id, tags in db.session.query(KnowledgeEntry.id, KnowledgeEntry.tags).filter(
+                KnowledgeEntry.id.in_(chunk)
+            ):
+                current = normalize_tags(tags)
+                if 'tags' in operations:
+                    wanted = operations['tags']
+                else:
+                    wanted = [tag for tag in current if tag not in operations.get('remove_tags', [])]
+                    wanted += [tag for tag in operations.get('add_tags', []) if tag not in wanted]
+                if wanted != current:
+                    new_tags[entry_id] = wanted
+
+            if new_tags:
+                db.session.execute(
+                    table.update().where(table.c.id == bindparam('entry_id')).values(tags=bindparam('new_tags')),
+                    [{'entry_id': entry_id, 'new_tags': json.dumps(tags)} for entry_id, tags in new_tags.items()]
+                )
+                tag_index.set_tags_bulk(KNOWLEDGE, new_tags)
+            tags_changed = len(new_tags)
+
+        return updated, tags_changed
+
+    def delete(self, chunks: Iterator[List[int]]) -> Dict[str, Any]:
+        result = {'matched': 0, 'deleted': 0, 'chunks': 0}
+        for chunk in chunks:
+            try:
+                deltas = Counter()
+                for category, count in db.session.query(KnowledgeEntry.category, func.count(KnowledgeEntry.id)).filter(
+                    KnowledgeEntry.id.in_(chunk)
+                ).group_by(KnowledgeEntry.category):
+                    deltas[category] -= count
+                facet_index.adjust(CATEGORY, deltas)
+                tag_index.remove(KNOWLEDGE, chunk)
+                memory_graph.remove_nodes(KNOWLEDGE, chunk)
+                knowledge_dedup.remove(chunk)
+                search_index.remove(KNOWLEDGE, chunk)
+                knowledge_snippets.remove(chunk)
+                knowledge_snapshot.record_deletions(chunk)
+
+                deleted = KnowledgeEntry.query.filter(KnowledgeEntry.id.in_(chunk)).delete(synchronize_session=False)
+                table_versions.bump(KnowledgeEntry.__tablename__)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self.logger.error(f"Bulk knowledge delete failed: {str(e)}")
+                return {**result, 'success': False, 'error': str(e), 'failed_ids': chunk}
+
+            result['matched'] += len(chunk)
+            result['deleted'] += deleted
+            result['chunks'] += 1
+        return {**result, 'success': True}
+
+
+# Global knowledge bulk editor instance
+knowledge_bulk_editor = KnowledgeBulkEditor()
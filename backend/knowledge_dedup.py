@@ -0,0 +1,347 @@
+"""
+Knowledge Deduplication for Manus II
+A unique hash of the normalized content catches exact duplicates and MinHash
+LSH buckets flag near-duplicates with indexed lookups, so repeated ingests do
+not crowd retrieval with copies. Each endpoint applies its own policy:
+reject the duplicate, merge it into the existing entry, or allow it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+import unicodedata
+from datetime import datetime
+from typing import Dict, Any, List, Iterable, NamedTuple, Optional, Tuple
+from src.models.knowledge_base import db, KnowledgeEntry
+from src.models.knowledge_models import KnowledgeContentHash, KnowledgeLSHBucket
+from .minhash import MinHasher
+from .tag_index import tag_index, normalize_tags, KNOWLEDGE
+
+REJECT = 'reject'
+MERGE = 'merge'
+ALLOW = 'allow'
+POLICIES = (REJECT, MERGE, ALLOW)
+
+EXACT = 'exact'
+NEAR = 'near'
+
+# Endpoint -> default policy, overridable with MANUS_KNOWLEDGE_DEDUP_<ENDPOINT>.
+# POST /knowledge keeps its 201 contract by default and flags the copy in
+# 'duplicate'; merging into the existing entry is opt-in.
+DEFAULT_POLICIES = {
+    'add': ALLOW,
+    'bulk': MERGE,
+    'update': REJECT
+}
+
+# Parameters per IN (...) lookup, below SQLite's bound variable limit
+_LOOKUP_CHUNK = 500
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_content(content: str) -> str:
+    """NFKC-fold, case-fold and collapse whitespace so trivially different copies hash alike"""
+    # Kept apart from the search folding: persisted hashes and buckets depend on it, and vowel
+    # marks can carry meaning that the exact-duplicate policies must not merge away
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', content).casefold()).strip()
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(normalize_content(content).encode('utf-8')).hexdigest()
+
+
+class Fingerprint(NamedTuple):
+    content_hash: str
+    signature: List[int]
+    band_keys: List[str]
+
+
+class DuplicateMatch(NamedTuple):
+    entry_id: int
+    kind: str  # exact, near
+    similarity: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'duplicate_of': self.entry_id, 'kind': self.kind, 'similarity': round(self.similarity, 3)}
+
+
+def _chunks(values: List[Any]) -> Iterable[List[Any]]:
+    for start in range(0, len(values), _LOOKUP_CHUNK):
+        yield values[start:start + _LOOKUP_CHUNK]
+
+
+class KnowledgeDeduplicator:
+    """
+    Maintains knowledge_content_hashes and knowledge_lsh_buckets; callers own
+    the transaction. Only the first copy of a content holds its hash, so the
+    unique index also guards concurrent inserts; copies admitted under the
+    allow policy point at it with duplicate_of and take over the hash when it
+    is deleted.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.8, policies: Optional[Dict[str, str]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.similarity_threshold = similarity_threshold
+        self.hasher = MinHasher()
+        self.policies = dict(DEFAULT_POLICIES)
+        for endpoint in DEFAULT_POLICIES:
+            configured = os.getenv(f'MANUS_KNOWLEDGE_DEDUP_{endpoint.upper()}')
+            if configured in POLICIES:
+                self.policies[endpoint] = configured
+        self.policies.update(policies or {})
+
+        # Instrumentation
+        self.lookups = 0
+        self.exact_matches = 0
+        self.near_matches = 0
+        self.merges = 0
+
+    def policy(self, endpoint: str, override: Optional[str] = None) -> str:
+        """The policy of an endpoint, or a per-request override"""
+        if override is None:
+            return self.policies[endpoint]
+        if override not in POLICIES:
+            raise ValueError(f"Unsupported dedup policy: {override}")
+        return override
+
+    def fingerprint(self, content: str) -> Fingerprint:
+        signature = self.hasher.signature(normalize_content(content))
+        return Fingerprint(content_hash(content), signature, self.hasher.band_keys(signature))
+
+    def find(self, fingerprint: Fingerprint, exclude_id: Optional[int] = None) -> Optional[DuplicateMatch]:
+        return self.find_many([fingerprint], exclude_id)[0]
+
+    def find_many(self, fingerprints: List[Fingerprint],
+                  exclude_id: Optional[int] = None) -> List[Optional[DuplicateMatch]]:
+        """Best indexed duplicate of each fingerprint, with batched hash and bucket lookups"""
+        self.lookups += len(fingerprints)
+        matches: List[Optional[DuplicateMatch]] = [None] * len(fingerprints)
+
+        owners = {}
+        for chunk in _chunks(list({fp.content_hash for fp in fingerprints})):
+            owners.update(db.session.query(KnowledgeContentHash.content_hash, KnowledgeContentHash.entry_id).filter(
+                KnowledgeContentHash.content_hash.in_(chunk)
+            ))
+        for position, fp in enumerate(fingerprints):
+            owner = owners.get(fp.content_hash)
+            if owner is not None and owner != exclude_id:
+                matches[position] = DuplicateMatch(owner, EXACT, 1.0)
+                self.exact_matches += 1
+
+        pending = [position for position, match in enumerate(matches) if match is None]
+        if not pending:
+            return matches
+
+        bucket_ids: Dict[str, set] = {}
+        for chunk in _chunks(list({key for position in pending for key in fingerprints[position].band_keys})):
+            for bucket, entry_id in db.session.query(KnowledgeLSHBucket.bucket, KnowledgeLSHBucket.entry_id).filter(
+                KnowledgeLSHBucket.bucket.in_(chunk)
+            ):
+                if entry_id != exclude_id:
+                    bucket_ids.setdefault(bucket, set()).add(entry_id)
+
+        candidates = {
+            position: {entry_id for key in fingerprints[position].band_keys for entry_id in bucket_ids.get(key, ())}
+            for position in pending
+        }
+        signatures = {}
+        for chunk in _chunks(sorted(set().union(*candidates.values()))):
+            for entry_id, packed in db.session.query(KnowledgeContentHash.entry_id, KnowledgeContentHash.signature).filter(
+                KnowledgeContentHash.entry_id.in_(chunk)
+            ):
+                signatures[entry_id] = _unpack(packed)
+
+        for position, entry_ids in candidates.items():
+            best = None
+            for entry_id in sorted(entry_ids):
+                if entry_id not in signatures:
+                    continue
+                similarity = MinHasher.similarity(fingerprints[position].signature, signatures[entry_id])
+                if similarity >= self.similarity_threshold and (best is None or similarity > best.similarity):
+                    best = DuplicateMatch(entry_id, NEAR, similarity)
+            if best is not None:
+                matches[position] = best
+                self.near_matches += 1
+
+        return matches
+
+    def index(self, entry_id: int, fingerprint: Fingerprint, match: Optional[DuplicateMatch] = None):
+        self.index_many([(entry_id, fingerprint, match)])
+
+    def index_many(self, items: List[Tuple[int, Fingerprint, Optional[DuplicateMatch]]]):
+        """Record new entries; exact copies get no hash and no buckets of their own"""
+        if not items:
+            return
+
+        hash_rows = []
+        bucket_rows = []
+        for entry_id, fp, match in items:
+            exact_copy = match is not None and match.kind == EXACT
+            hash_rows.append({
+                'entry_id': entry_id,
+                'content_hash': None if exact_copy else fp.content_hash,
+                'signature': _pack(fp.signature),
+                'duplicate_of': match.entry_id if match else None,
+                'duplicate_kind': match.kind if match else None,
+                'similarity': match.similarity if match else None,
+                'created_at': datetime.utcnow()
+            })
+            if not exact_copy:
+                bucket_rows.extend({'bucket': key, 'entry_id': entry_id} for key in fp.band_keys)
+
+        db.session.execute(KnowledgeContentHash.__table__.insert(), hash_rows)
+        if bucket_rows:
+            db.session.execute(KnowledgeLSHBucket.__table__.insert(), bucket_rows)
+
+    def reindex(self, entry_id: int, fingerprint: Fingerprint, match: Optional[DuplicateMatch] = None):
+        """Re-record an entry whose content changed"""
+        self.remove([entry_id])
+        self.index(entry_id, fingerprint, match)
+
+    def remove(self, entry_ids: Iterable[int]):
+        """Forget deleted entries; the oldest exact copy of a removed first copy inherits its hash"""
+        entry_ids = sorted(set(entry_ids))
+        hashes = KnowledgeContentHash.__table__
+        buckets = KnowledgeLSHBucket.__table__
+
+        for chunk in _chunks(entry_ids):
+            removed = dict(db.session.query(KnowledgeContentHash.entry_id, KnowledgeContentHash.content_hash).filter(
+                KnowledgeContentHash.entry_id.in_(chunk)
+            ))
+            copies: Dict[int, List[Tuple[int, str, bytes]]] = {}
+            for entry_id, duplicate_of, kind, packed in db.session.query(
+                KnowledgeContentHash.entry_id, KnowledgeContentHash.duplicate_of,
+                KnowledgeContentHash.duplicate_kind, KnowledgeContentHash.signature
+            ).filter(
+                KnowledgeContentHash.duplicate_of.in_(chunk),
+                KnowledgeContentHash.entry_id.notin_(entry_ids)
+            ).order_by(KnowledgeContentHash.entry_id.asc()):
+                copies.setdefault(duplicate_of, []).append((entry_id, kind, packed))
+
+            db.session.execute(buckets.delete().where(buckets.c.entry_id.in_(chunk)))
+            db.session.execute(hashes.delete().where(hashes.c.entry_id.in_(chunk)))
+
+            for removed_id, dependents in copies.items():
+                heir = next((entry_id for entry_id, kind, _ in dependents if kind == EXACT), None)
+                if heir is not None and removed.get(removed_id):
+                    db.session.execute(hashes.update().where(hashes.c.entry_id == heir).values(
+                        content_hash=removed[removed_id], duplicate_of=None, duplicate_kind=None, similarity=None
+                    ))
+                    packed = next(packed for entry_id, _, packed in dependents if entry_id == heir)
+                    db.session.execute(buckets.insert(), [
+                        {'bucket': key, 'entry_id': heir} for key in self.hasher.band_keys(_unpack(packed))
+                    ])
+
+                others = [entry_id for entry_id, _, _ in dependents if entry_id != heir]
+                if not others:
+                    continue
+                if heir is not None:
+                    values = {'duplicate_of': heir}
+                else:
+                    values = {'duplicate_of': None, 'duplicate_kind': None, 'similarity': None}
+                db.session.execute(hashes.update().where(hashes.c.entry_id.in_(others)).values(**values))
+
+    def distinct(self, entry_ids: List[int]) -> List[int]:
+        """Keep the first of each group of entries that duplicate one another, preserving order"""
+        if not entry_ids:
+            return []
+        roots = dict(db.session.query(KnowledgeContentHash.entry_id, KnowledgeContentHash.duplicate_of).filter(
+            KnowledgeContentHash.entry_id.in_(entry_ids),
+            KnowledgeContentHash.duplicate_of.isnot(None)
+        ))
+
+        seen = set()
+        kept = []
+        for entry_id in entry_ids:
+            root = roots.get(entry_id, entry_id)
+            if root not in seen:
+                seen.add(root)
+                kept.append(entry_id)
+        return kept
+
+    def merge(self, entry: KnowledgeEntry, tags: Any = None, confidence_score: Optional[float] = None,
+              metadata: Optional[Dict[str, Any]] = None) -> KnowledgeEntry:
+        """Fold a duplicate's tags, confidence and metadata into the existing entry"""
+        current = normalize_tags(entry.tags)
+        wanted = current + [tag for tag in normalize_tags(tags) if tag not in current]
+        if wanted != current:
+            entry.tags = json.dumps(wanted)
+            tag_index.set_tags(KNOWLEDGE, entry.id, wanted)
+
+        if confidence_score is not None:
+            entry.confidence_score = max(entry.confidence_score or 0.0, confidence_score)
+
+        if metadata:
+            try:
+                existing = json.loads(entry.meta_data) if entry.meta_data else {}
+            except ValueError:
+                existing = {}
+            if isinstance(existing, dict):
+                entry.meta_data = json.dumps({**metadata, **existing})
+
+        entry.updated_at = datetime.utcnow()
+        self.merges += 1
+        return entry
+
+    def backfill(self, batch_size: int = 500, after_id: int = 0) -> Dict[str, Any]:
+        """Index entries written before deduplication existed, one batch per transaction"""
+        indexed = 0
+        duplicates = 0
+        last_id = after_id
+
+        while True:
+            batch = db.session.query(KnowledgeEntry.id, KnowledgeEntry.content).outerjoin(
+                KnowledgeContentHash, KnowledgeContentHash.entry_id == KnowledgeEntry.id
+            ).filter(
+                KnowledgeContentHash.id.is_(None),
+                KnowledgeEntry.id > last_id
+            ).order_by(KnowledgeEntry.id.asc()).limit(batch_size).all()
+            if not batch:
+                break
+
+            fingerprints = [self.fingerprint(content or '') for _, content in batch]
+            matches = self.find_many(fingerprints)
+
+            # Copies inside the batch point at the first of them
+            first_seen: Dict[str, int] = {}
+            items = []
+            for (entry_id, _), fp, match in zip(batch, fingerprints, matches):
+                if match is None and fp.content_hash in first_seen:
+                    match = DuplicateMatch(first_seen[fp.content_hash], EXACT, 1.0)
+                first_seen.setdefault(fp.content_hash, entry_id)
+                if match is not None:
+                    duplicates += 1
+                items.append((entry_id, fp, match))
+
+            self.index_many(items)
+            db.session.commit()
+            indexed += len(batch)
+            last_id = batch[-1][0]
+
+        return {'success': True, 'indexed': indexed, 'duplicates': duplicates, 'last_id': last_id}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'policies': dict(self.policies),
+            'similarity_threshold': self.similarity_threshold,
+            'lookups': self.lookups,
+            'exact_matches': self.exact_matches,
+            'near_matches': self.near_matches,
+            'merges': self.merges
+        }
+
+
+def _pack(signature: List[int]) -> bytes:
+    return struct.pack(f'<{len(signature)}I', *signature)
+
+
+def _unpack(packed: bytes) -> List[int]:
+    return list(struct.unpack(f'<{len(packed) // 4}I', packed))
+
+
+# Global knowledge deduplicator instance
+knowledge_dedup = KnowledgeDeduplicator()
@@ -0,0 +1,278 @@
+"""
+Bulk Knowledge Ingest for Manus II
+Streams NDJSON (optionally gzip-compressed) knowledge entries line by line,
+validates each one, and inserts them in multi-row batches of one transaction
+each, keeping memory bounded whatever the payload size. Lines duplicating an
+existing entry (or an earlier line) are handled per the dedup policy.
+"""
+
+import gzip
+import json
+import logging
+from collections import Counter
+from typing import Dict, Any, List, Iterator, Optional, Tuple, BinaryIO
+from src.models.knowledge_base import db, KnowledgeEntry
+from .tag_index import tag_index, normalize_tags, KNOWLEDGE
+from .facets import facet_index, CATEGORY
+from .search_index import search_index
+from .snippets import knowledge_snippets
+from .knowledge_dedup import knowledge_dedup, DuplicateMatch, REJECT, MERGE, EXACT
+
+REQUIRED_FIELDS = ('category', 'title', 'content')
+
+
+class EntryValidationError(ValueError):
+    """Raised for an NDJSON line that is not a valid knowledge entry"""
+
+
+def validate_entry(item: Any) -> Dict[str, Any]:
+    """Check one decoded line and return the KnowledgeEntry column values"""
+    if not isinstance(item, dict):
+        raise EntryValidationError('Line is not a JSON object')
+
+    missing = [field for field in REQUIRED_FIELDS if not item.get(field)]
+    if missing:
+        raise EntryValidationError(f"Missing required fields: {', '.join(missing)}")
+    for field in REQUIRED_FIELDS:
+        if not isinstance(item[field], str):
+            raise EntryValidationError(f'{field} must be a string')
+
+    metadata = item.get('metadata', {})
+    if not isinstance(metadata, dict):
+        raise EntryValidationError('metadata must be an object')
+    tags = item.get('tags', [])
+    if not isinstance(tags, list):
+        raise EntryValidationError('tags must be an array')
+    confidence_score = item.get('confidence_score', 1.0)
+    if isinstance(confidence_score, bool) or not isinstance(confidence_score, (int, float)):
+        raise EntryValidationError('confidence_score must be a number')
+
+    return {
+        'category': item['category'],
+        'title': item['title'],
+        'content': item['content'],
+        'meta_data': json.dumps(metadata),
+        'tags': json.dumps(tags),
+        'confidence_score': confidence_score,
+        'source': item.get('source')
+    }
+
+
+class _PendingLine:
+    """A validated line awaiting its batch write"""
+
+    __slots__ = ('line_number', 'values', 'tags', 'metadata', 'fingerprint', 'match', 'copy_of', 'entry_id')
+
+    def __init__(self, line_number: int, values: Dict[str, Any], item: Dict[str, Any]):
+        self.line_number = line_number
+        self.values = values
+        self.tags = item.get('tags', [])
+        self.metadata = item.get('metadata', {})
+        self.fingerprint = None
+        self.match: Optional[DuplicateMatch] = None
+        self.copy_of: Optional['_PendingLine'] = None  # earlier line of the batch with the same content
+        self.entry_id: Optional[int] = None
+
+
+class KnowledgeBulkIngestor:
+    """
+    One transaction per batch: entries are added and flushed together, their
+    tags indexed with one set_tags_bulk call, then committed. If a batch fails
+    in the database it is retried row by row under savepoints so only the
+    offending lines are rejected. Duplicates are looked up for the whole batch
+    at once; near-duplicates inside one batch are only caught by later batches.
+    """
+
+    def __init__(self, batch_size: int = 1000, max_line_bytes: int = 1024 * 1024,
+                 max_reported_errors: int = 1000):
+        self.logger = logging.getLogger(__name__)
+        self.batch_size = batch_size
+        self.max_line_bytes = max_line_bytes
+        self.max_reported_errors = max_reported_errors
+
+    def _lines(self, stream: BinaryIO) -> Iterator[Tuple[int, Optional[bytes]]]:
+        """Yield (line number, line); overlong lines are drained and yielded as None"""
+        line_number = 0
+        while True:
+            line = stream.readline(self.max_line_bytes + 1)
+            if not line:
+                return
+            line_number += 1
+            if len(line) > self.max_line_bytes and not line.endswith(b'\n'):
+                while True:
+                    rest = stream.readline(self.max_line_bytes)
+                    if not rest or rest.endswith(b'\n'):
+                        break
+                yield line_number, None
+                continue
+            yield line_number, line
+
+    def ingest(self, stream: BinaryIO, compressed: bool = False, batch_size: Optional[int] = None,
+               policy: Optional[str] = None) -> Dict[str, Any]:
+        """Ingest an NDJSON stream and report per-line errors"""
+        batch_size = batch_size or self.batch_size
+        policy = policy or knowledge_dedup.policy('bulk')
+        if compressed:
+            stream = gzip.GzipFile(fileobj=stream, mode='rb')
+
+        result = {'inserted': 0, 'merged': 0, 'duplicates': 0, 'failed': 0, 'lines': 0,
+                  'errors': [], 'errors_truncated': False}
+        batch: List[_PendingLine] = []
+
+        try:
+            for line_number, line in self._lines(stream):
+                if line is None:
+                    self._reject(result, line_number, f'Line exceeds {self.max_line_bytes} bytes')
+                    continue
+                if not line.strip():
+                    continue
+
+                result['lines'] += 1
+                try:
+                    item = json.loads(line)
+                    values = validate_entry(item)
+                except ValueError as e:
+                    self._reject(result, line_number, str(e))
+                    continue
+
+                batch.append(_PendingLine(line_number, values, item))
+                if len(batch) >= batch_size:
+                    self._write_batch(batch, result, policy)
+                    batch = []
+        except (OSError, EOFError) as e:
+            # Truncated or corrupt gzip payloads; everything before the damage is kept
+            result['body_error'] = f'Unreadable request body: {str(e)}'
+
+        if batch:
+            self._write_batch(batch, result, policy)
+
+        return result
+
+    def _deduplicate(self, batch: List[_PendingLine], result: Dict[str, Any],
+                     policy: str) -> Tuple[List[_PendingLine], List[_PendingLine]]:
+        """Split a batch into lines to insert and lines to merge into existing entries"""
+        for line in batch:
+            line.fingerprint = knowledge_dedup.fingerprint(line.values['content'])
+        matches = knowledge_dedup.find_many([line.fingerprint for line in batch])
+
+        inserts = []
+        merges = []
+        first_lines: Dict[str, _PendingLine] = {}
+        for line, match in zip(batch, matches):
+            line.match = match
+            earlier = first_lines.setdefault(line.fingerprint.content_hash, line)
+            if earlier is not line and (match is None or match.kind != EXACT):
+                line.copy_of = earlier
+
+            if (match is not None and match.kind == EXACT) or line.copy_of is not None:
+                result['duplicates'] += 1
+                if policy == REJECT:
+                    duplicate_of = (f'entry {match.entry_id}' if line.copy_of is None
+                                    else f'line {line.copy_of.line_number}')
+                    self._reject(result, line.line_number, f'Duplicate of {duplicate_of}')
+                    continue
+                if policy == MERGE and line.copy_of is None:
+                    merges.append(line)
+                    continue
+                if policy == MERGE:
+                    earlier.tags = normalize_tags(list(earlier.tags) + list(line.tags))
+                    earlier.metadata = {**line.metadata, **earlier.metadata}
+                    earlier.values['confidence_score'] = max(earlier.values['confidence_score'],
+                                                             line.values['confidence_score'])
+                    earlier.values['tags'] = json.dumps(earlier.tags)
+                    earlier.values['meta_data'] = json.dumps(earlier.metadata)
+                    result['merged'] += 1
+                    continue
+            inserts.append(line)
+
+        return inserts, merges
+
+    def _apply(self, inserts: List[_PendingLine], merges: List[_PendingLine]):
+        """Write merges and inserts of a batch in the current transaction"""
+        if merges:
+            entries = {entry.id: entry for entry in KnowledgeEntry.query.filter(
+                KnowledgeEntry.id.in_([line.match.entry_id for line in merges])
+            )}
+            for line in merges:
+                knowledge_dedup.merge(entries[line.match.entry_id], line.tags,
+                                      line.values['confidence_score'], line.metadata)
+        if not inserts:
+            return
+
+        entries = [KnowledgeEntry(**line.values) for line in inserts]
+        db.session.add_all(entries)
+        db.session.flush()
+        for line, entry in zip(inserts, entries):
+            line.entry_id = entry.id
+
+        tag_index.set_tags_bulk(KNOWLEDGE, {line.entry_id: line.tags for line in inserts})
+        facet_index.adjust(CATEGORY, Counter(line.values['category'] for line in inserts))
+        search_index.set_text_bulk(KNOWLEDGE, {
+            line.entry_id: (line.values['title'], line.values['content']) for line in inserts
+        })
+        knowledge_snippets.set_bulk({line.entry_id: line.values['content'] for line in inserts})
+        knowledge_dedup.index_many([
+            (line.entry_id, line.fingerprint,
+             DuplicateMatch(line.copy_of.entry_id, EXACT, 1.0) if line.copy_of is not None else line.match)
+            for line in inserts
+        ])
+
+    def _write_batch(self, batch: List[_PendingLine], result: Dict[str, Any], policy: str):
+        inserts, merges = self._deduplicate(batch, result, policy)
+        try:
+            self._apply(inserts, merges)
+            db.session.commit()
+            result['inserted'] += len(inserts)
+            result['merged'] += len(merges)
+        except Exception as e:
+            db.session.rollback()
+            self.logger.warning(f"Bulk knowledge batch failed, retrying row by row: {str(e)}")
+            for line in inserts:
+                line.entry_id = None
+            self._write_rows(inserts, merges, result)
+        finally:
+            # Committed entries are not needed again; keep the identity map small
+            db.session.expunge_all()
+
+    def _write_rows(self, inserts: List[_PendingLine], merges: List[_PendingLine], result: Dict[str, Any]):
+        written_merges = []
+        written_inserts = []
+        for line in merges:
+            try:
+                with db.session.begin_nested():
+                    self._apply([], [line])
+                written_merges.append(line)
+            except Exception as e:
+                self._reject(result, line.line_number, f'Merge failed: {str(e)}')
+
+        for line in inserts:
+            if line.copy_of is not None and line.copy_of.entry_id is None:
+                # The first copy was rejected, so this line becomes the first copy
+                line.copy_of = None
+            try:
+                with db.session.begin_nested():
+                    self._apply([line], [])
+                written_inserts.append(line)
+            except Exception as e:
+                line.entry_id = None
+                self._reject(result, line.line_number, f'Insert failed: {str(e)}')
+
+        try:
+            db.session.commit()
+            result['inserted'] += len(written_inserts)
+            result['merged'] += len(written_merges)
+        except Exception as e:
+            db.session.rollback()
+            for line in written_merges + written_inserts:
+                self._reject(result, line.line_number, f'Batch commit failed: {str(e)}')
+
+    def _reject(self, result: Dict[str, Any], line_number: int, message: str):
+        result['failed'] += 1
+        if len(result['errors']) < self.max_reported_errors:
+            result['errors'].append({'line': line_number, 'error': message})
+        else:
+            result['errors_truncated'] = True
+
+
+# Global knowledge bulk ingestor instance
+knowledge_ingestor = KnowledgeBulkIngestor()
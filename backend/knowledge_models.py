@@ -0,0 +1,193 @@
+from src.models.knowledge_base import db, KnowledgeEntry, ErrorLog
+from datetime import datetime
+import json
+
+# Keyset pagination indexes for listings of tables declared in knowledge_base
+db.Index('ix_knowledge_entries_updated_id', KnowledgeEntry.updated_at, KnowledgeEntry.id)
+db.Index('ix_error_logs_created_id', ErrorLog.created_at, ErrorLog.id)
+
+class ErrorAggregate(db.Model):
+    __tablename__ = 'error_aggregates'
+    __table_args__ = (
+        db.Index('ix_error_aggregates_last_seen_id', 'last_seen', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(40), nullable=False, unique=True)  # sha1 of type + normalized description
+    error_type = db.Column(db.String(100), nullable=False)
+    normalized_description = db.Column(db.Text, nullable=False)
+    sample_description = db.Column(db.Text, nullable=False)  # latest raw description
+    impact = db.Column(db.String(50), default='medium')
+    source_ai = db.Column(db.String(100))
+    status = db.Column(db.String(50), default='open')  # open, resolved
+    occurrence_count = db.Column(db.Integer, default=0)
+    sample_contexts = db.Column(db.Text)  # JSON array of sampled occurrence contexts
+    first_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    resolved_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'fingerprint': self.fingerprint,
+            'error_type': self.error_type,
+            'normalized_description': self.normalized_description,
+            'description': self.sample_description,
+            'impact': self.impact,
+            'source_ai': self.source_ai,
+            'status': self.status,
+            'occurrence_count': self.occurrence_count,
+            'sample_contexts': json.loads(self.sample_contexts) if self.sample_contexts else [],
+            'first_seen': self.first_seen.isoformat(),
+            'last_seen': self.last_seen.isoformat(),
+            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None
+        }
+
+class ErrorResolution(db.Model):
+    __tablename__ = 'error_resolutions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(40), nullable=False, unique=True)  # error_fingerprint of the fixed error
+    corrective_action = db.Column(db.Text, nullable=False)
+    resolved_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class EntityTag(db.Model):
+    __tablename__ = 'entity_tags'
+    __table_args__ = (
+        db.Index('ix_entity_tags_tag_entity', 'entity_type', 'tag', 'entity_id', unique=True),
+        db.Index('ix_entity_tags_entity', 'entity_type', 'entity_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(50), nullable=False)  # knowledge, long_term_memory
+    entity_id = db.Column(db.Integer, nullable=False)
+    tag = db.Column(db.String(200), nullable=False)
+
+class SearchTerm(db.Model):
+    __tablename__ = 'search_terms'
+    __table_args__ = (
+        db.Index('ix_search_terms_term_entity', 'entity_type', 'term', 'entity_id', unique=True),
+        db.Index('ix_search_terms_entity', 'entity_type', 'entity_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(50), nullable=False)  # knowledge
+    entity_id = db.Column(db.Integer, nullable=False)
+    term = db.Column(db.String(64), nullable=False)  # normalized, prefix-stripped token
+
+class TagCount(db.Model):
+    __tablename__ = 'tag_counts'
+    __table_args__ = (
+        db.UniqueConstraint('entity_type', 'tag', name='uq_tag_counts_entity_tag'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(50), nullable=False)
+    tag = db.Column(db.String(200), nullable=False)
+    count = db.Column(db.Integer, default=0)
+
+    def to_dict(self):
+        return {
+            'tag': self.tag,
+            'count': self.count
+        }
+
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(100), nullable=False, unique=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)  # bumped in every writing transaction
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class FacetCount(db.Model):
+    __tablename__ = 'facet_counts'
+    __table_args__ = (
+        db.UniqueConstraint('entity_type', 'facet', 'value', name='uq_facet_counts_entity_facet_value'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(50), nullable=False)  # knowledge
+    facet = db.Column(db.String(50), nullable=False)  # category
+    value = db.Column(db.String(200), nullable=False)
+    count = db.Column(db.Integer, default=0)
+
+    def to_dict(self):
+        return {
+            'value': self.value,
+            'count': self.count
+        }
+
+class ErrorRollup(db.Model):
+    __tablename__ = 'error_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'error_type', 'impact', 'source_ai',
+                            name='uq_error_rollups_bucket'),
+        db.Index('ix_error_rollups_granularity_bucket', 'granularity', 'bucket_start'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    error_type = db.Column(db.String(100), nullable=False)
+    impact = db.Column(db.String(50), nullable=False)
+    source_ai = db.Column(db.String(100), nullable=False)
+    occurrences = db.Column(db.Integer, default=0)  # errors logged in the bucket
+    resolved = db.Column(db.Integer, default=0)  # errors resolved in the bucket
+    resolve_seconds = db.Column(db.Float, default=0.0)  # summed time to resolve of those errors
+
+    def to_dict(self):
+        return {
+            'granularity': self.granularity,
+            'bucket_start': self.bucket_start.isoformat(),
+            'error_type': self.error_type,
+            'impact': self.impact,
+            'source_ai': self.source_ai,
+            'occurrences': self.occurrences,
+            'resolved': self.resolved,
+            'mean_time_to_resolve_seconds': self.resolve_seconds / self.resolved if self.resolved else None
+        }
+
+class KnowledgeContentHash(db.Model):
+    __tablename__ = 'knowledge_content_hashes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entry_id = db.Column(db.Integer, nullable=False, unique=True)
+    content_hash = db.Column(db.String(64), unique=True)  # sha256 of the normalized content; only on the first copy
+    signature = db.Column(db.LargeBinary, nullable=False)  # packed MinHash signature
+    duplicate_of = db.Column(db.Integer, index=True)  # entry this one duplicates, if any
+    duplicate_kind = db.Column(db.String(10))  # exact, near
+    similarity = db.Column(db.Float)  # estimated Jaccard similarity to duplicate_of
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'entry_id': self.entry_id,
+            'content_hash': self.content_hash,
+            'duplicate_of': self.duplicate_of,
+            'duplicate_kind': self.duplicate_kind,
+            'similarity': self.similarity
+        }
+
+class KnowledgeSnippet(db.Model):
+    __tablename__ = 'knowledge_snippets'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entry_id = db.Column(db.Integer, nullable=False, unique=True)
+    snippet = db.Column(db.Text, nullable=False)  # leading sentences of the content within the token budget
+    token_count = db.Column(db.Integer, default=0)  # estimated tokens of the snippet
+    token_budget = db.Column(db.Integer, nullable=False)  # budget it was cut for; rebuilt when it changes
+
+class KnowledgeLSHBucket(db.Model):
+    __tablename__ = 'knowledge_lsh_buckets'
+
+    id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.String(64), nullable=False, index=True)  # "<band>:<hash>" LSH key
+    entry_id = db.Column(db.Integer, nullable=False, index=True)
+
+class KnowledgeTombstone(db.Model):
+    __tablename__ = 'knowledge_tombstones'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entry_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # snapshot readers hide newer deletions
@@ -0,0 +1,425 @@
+"""
+Knowledge Snapshot for Manus II
+A compact read-only file holding each knowledge entry's title, snippet,
+confidence and duplicate group plus the search-term postings, built offline
+and published with an atomic rename. Workers memory-map it so they share one
+copy through the page cache, pick up a newly published file on their next
+read, and overlay a small delta of the rows written since it was built.
+
+Usage:
+    python -m backend.knowledge_snapshot <database-url> [snapshot-path]
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Iterable, Optional, Tuple
+import numpy as np
+from sqlalchemy import func
+from src.models.knowledge_base import db, KnowledgeEntry
+from src.models.knowledge_models import KnowledgeContentHash, KnowledgeTombstone, SearchTerm
+from .serializers import knowledge_context_serializer
+from .search_index import tokenize, KNOWLEDGE
+from .etags import table_versions
+
+MAGIC = b'MKSNAP01'
+
+# magic, built_at, watermark (epoch seconds), entry count, term count,
+# then the byte offsets of the entries, terms, postings and strings sections
+_HEADER = struct.Struct('<8sdd6Q')
+
+_ENTRY_DTYPE = np.dtype([
+    ('id', '<i8'),
+    ('root', '<i8'),  # first entry of its duplicate group
+    ('confidence', '<f8'),
+    ('title_offset', '<u8'),
+    ('title_length', '<u4'),
+    ('snippet_offset', '<u8'),
+    ('snippet_length', '<u4')
+])
+
+# Sorted by hash; postings are entry positions in the entries section
+_TERM_DTYPE = np.dtype([
+    ('hash', '<u8'),
+    ('term_offset', '<u8'),
+    ('term_length', '<u4'),
+    ('postings_offset', '<u8'),
+    ('postings_count', '<u4')
+])
+
+
+def _term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class _MappedSnapshot:
+    """One published snapshot file mapped read-only; arrays are views into the map"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as snapshot_file:
+            stat = os.fstat(snapshot_file.fileno())
+            self.map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        self.size_bytes = stat.st_size
+
+        (magic, built_at, watermark, entry_count, term_count,
+         entries_offset, terms_offset, postings_offset, self.strings_offset) = _HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a knowledge snapshot')
+
+        self.built_at = datetime.utcfromtimestamp(built_at)
+        self.watermark = datetime.utcfromtimestamp(watermark)
+        self.entries = np.frombuffer(self.map, dtype=_ENTRY_DTYPE, count=entry_count, offset=entries_offset)
+        self.terms = np.frombuffer(self.map, dtype=_TERM_DTYPE, count=term_count, offset=terms_offset)
+        postings_count = int(self.terms['postings_count'].sum()) if term_count else 0
+        self.postings_array = np.frombuffer(self.map, dtype='<u4', count=postings_count, offset=postings_offset)
+
+    def text(self, offset: int, length: int) -> str:
+        start = self.strings_offset + int(offset)
+        return self.map[start:start + int(length)].decode('utf-8')
+
+    def postings(self, term: str) -> Optional[np.ndarray]:
+        term_hash = _term_hash(term)
+        hashes = self.terms['hash']
+        position = int(np.searchsorted(hashes, np.uint64(term_hash)))
+        while position < len(hashes) and int(hashes[position]) == term_hash:
+            record = self.terms[position]
+            if self.text(record['term_offset'], record['term_length']) == term:
+                start = int(record['postings_offset'])
+                return self.postings_array[start:start + int(record['postings_count'])]
+            position += 1
+        return None
+
+    def record(self, position: int) -> Dict[str, Any]:
+        entry = self.entries[position]
+        return {
+            'id': int(entry['id']),
+            'title': self.text(entry['title_offset'], entry['title_length']),
+            'snippet': self.text(entry['snippet_offset'], entry['snippet_length']),
+            'confidence_score': float(entry['confidence'])
+        }
+
+
+class KnowledgeSnapshotStore:
+    """
+    Builds and serves the snapshot. Readers re-stat the file at most every
+    `check_interval` seconds; the delta is reloaded when the knowledge table
+    version changes and holds rows updated after the snapshot's watermark plus
+    deletions recorded as tombstones. When the delta outgrows `max_delta_rows`
+    (or no snapshot is published) search() returns None and callers query the
+    database instead.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval: float = 2.0, grace_seconds: float = 5.0,
+                 max_delta_rows: int = 5000, tombstone_retention: timedelta = timedelta(days=1)):
+        self.logger = logging.getLogger(__name__)
+        self.path = path or os.getenv('MANUS_KNOWLEDGE_SNAPSHOT', 'data/knowledge.snapshot')
+        self.check_interval = check_interval
+        self.grace_seconds = grace_seconds
+        self.max_delta_rows = max_delta_rows
+        self.tombstone_retention = tombstone_retention
+
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_MappedSnapshot] = None
+        self._next_check = 0.0
+        self._delta: Dict[int, Dict[str, Any]] = {}
+        self._shadowed: Optional[np.ndarray] = None  # snapshot positions replaced or deleted since the build
+        self._delta_version: Optional[int] = None
+        self._delta_ok = False
+
+        # Instrumentation
+        self.reloads = 0
+        self.delta_refreshes = 0
+        self.searches = 0
+        self.fallbacks = 0
+
+    def build(self, path: Optional[str] = None) -> Dict[str, Any]:
+        """Write a new snapshot next to the published one and atomically swap it in"""
+        path = path or self.path
+        started = datetime.utcnow()
+        # Rows committed around the start are also served from the delta
+        watermark = started - timedelta(seconds=self.grace_seconds)
+
+        strings = bytearray()
+
+        def add_string(value: Optional[str]) -> Tuple[int, int]:
+            encoded = (value or '').encode('utf-8')
+            offset = len(strings)
+            strings.extend(encoded)
+            return offset, len(encoded)
+
+        rows = knowledge_context_serializer.query().add_columns(
+            func.coalesce(KnowledgeContentHash.duplicate_of, KnowledgeEntry.id)
+        ).outerjoin(
+            KnowledgeContentHash, KnowledgeContentHash.entry_id == KnowledgeEntry.id
+        ).order_by(KnowledgeEntry.id.asc()).all()
+
+        entries = np.zeros(len(rows), dtype=_ENTRY_DTYPE)
+        positions: Dict[int, int] = {}
+        for position, (entry_id, title, snippet, confidence, root) in enumerate(rows):
+            positions[entry_id] = position
+            title_offset, title_length = add_string(title)
+            snippet_offset, snippet_length = add_string(snippet)
+            entries[position] = (entry_id, root, confidence or 0.0,
+                                 title_offset, title_length, snippet_offset, snippet_length)
+        del rows
+
+        postings_by_term: Dict[str, List[int]] = {}
+        for term, entity_id in db.session.query(SearchTerm.term, SearchTerm.entity_id).filter(
+            SearchTerm.entity_type == KNOWLEDGE
+        ).execution_options(yield_per=10000):
+            position = positions.get(entity_id)
+            if position is not None:
+                postings_by_term.setdefault(term, []).append(position)
+
+        terms = np.zeros(len(postings_by_term), dtype=_TERM_DTYPE)
+        postings = []
+        postings_offset = 0
+        for index, (term, term_positions) in enumerate(postings_by_term.items()):
+            term_offset, term_length = add_string(term)
+            term_positions.sort()
+            terms[index] = (_term_hash(term), term_offset, term_length, postings_offset, len(term_positions))
+            postings.append(np.asarray(term_positions, dtype='<u4'))
+            postings_offset += len(term_positions)
+        terms.sort(order='hash')
+        postings_blob = np.concatenate(postings).tobytes() if postings else b''
+
+        entries_offset = _align(_HEADER.size)
+        terms_offset = _align(entries_offset + entries.nbytes)
+        postings_section = _align(terms_offset + terms.nbytes)
+        strings_offset = _align(postings_section + len(postings_blob))
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f'{path}.tmp-{os.getpid()}'
+        with open(temporary, 'wb') as snapshot_file:
+            snapshot_file.write(_HEADER.pack(
+                MAGIC, _epoch(started), _epoch(watermark), len(entries), len(terms),
+                entries_offset, terms_offset, postings_section, strings_offset
+            ))
+            for offset, blob in ((entries_offset, entries.tobytes()), (terms_offset, terms.tobytes()),
+                                 (postings_section, postings_blob), (strings_offset, bytes(strings))):
+                snapshot_file.write(b'\0' * (offset - snapshot_file.tell()))
+                snapshot_file.write(blob)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary, path)
+
+        # Tombstones older than any snapshot a worker can still be serving are no longer needed
+        pruned = KnowledgeTombstone.query.filter(
+            KnowledgeTombstone.deleted_at < watermark - self.tombstone_retention
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+        size_bytes = os.path.getsize(path)
+        self.logger.info(f"Published knowledge snapshot {path}: {len(entries)} entries, "
+                         f"{len(terms)} terms, {size_bytes} bytes")
+        return {
+            'success': True,
+            'path': path,
+            'entries': len(entries),
+            'terms': len(terms),
+            'size_bytes': size_bytes,
+            'built_at': started.isoformat(),
+            'tombstones_pruned': pruned
+        }
+
+    def record_deletions(self, entry_ids: Iterable[int]):
+        """Tombstone deleted entries so readers hide them until the next snapshot"""
+        now = datetime.utcnow()
+        rows = [{'entry_id': entry_id, 'deleted_at': now} for entry_id in entry_ids]
+        if rows:
+            db.session.execute(KnowledgeTombstone.__table__.insert(), rows)
+
+    def _current(self) -> Optional[_MappedSnapshot]:
+        """The mapped snapshot, remapped when a new file has been swapped in"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return self._snapshot
+
+        with self._lock:
+            if now < self._next_check:
+                return self._snapshot
+            self._next_check = now + self.check_interval
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._snapshot = None
+                return None
+
+            identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if self._snapshot is None or self._snapshot.identity != identity:
+                try:
+                    snapshot = _MappedSnapshot(self.path)
+                except (OSError, ValueError) as e:
+                    self.logger.error(f"Loading knowledge snapshot failed: {str(e)}")
+                    return self._snapshot
+                # In-flight readers keep the old map alive until they drop it
+                self._snapshot = snapshot
+                self._delta_version = None
+                self.reloads += 1
+            return self._snapshot
+
+    def _refresh_delta(self, snapshot: _MappedSnapshot) -> bool:
+        """Reload rows written since the snapshot when the table version moved"""
+        version = table_versions.get(KnowledgeEntry.__tablename__)
+        if version == self._delta_version:
+            return self._delta_ok
+
+        rows = knowledge_context_serializer.query().add_columns(
+            func.coalesce(KnowledgeContentHash.duplicate_of, KnowledgeEntry.id)
+        ).outerjoin(
+            KnowledgeContentHash, KnowledgeContentHash.entry_id == KnowledgeEntry.id
+        ).filter(
+            KnowledgeEntry.updated_at >= snapshot.watermark
+        ).limit(self.max_delta_rows + 1).all()
+
+        delta_ok = len(rows) <= self.max_delta_rows
+        delta = {}
+        shadowed = None
+        if delta_ok:
+            for entry_id, title, snippet, confidence, root in rows:
+                delta[entry_id] = {
+                    'record': {'id': entry_id, 'title': title, 'snippet': snippet,
+                               'confidence_score': confidence or 0.0},
+                    'root': root,
+                    'terms': set()
+                }
+            # Terms come from the index rows written with the entry, so no content is loaded on the chat path
+            entry_ids = list(delta)
+            for start in range(0, len(entry_ids), 500):
+                for entry_id, term in db.session.query(SearchTerm.entity_id, SearchTerm.term).filter(
+                    SearchTerm.entity_type == KNOWLEDGE,
+                    SearchTerm.entity_id.in_(entry_ids[start:start + 500])
+                ):
+                    delta[entry_id]['terms'].add(term)
+            deleted = {row[0] for row in db.session.query(KnowledgeTombstone.entry_id).filter(
+                KnowledgeTombstone.deleted_at >= snapshot.watermark
+            )}
+            shadowed = np.isin(snapshot.entries['id'], np.fromiter(set(delta) | deleted, dtype='<i8'))
+        else:
+            self.logger.warning(f"More than {self.max_delta_rows} knowledge rows changed since the snapshot; "
+                                f"serving from the database until a new one is published")
+
+        with self._lock:
+            if snapshot is self._snapshot:
+                self._delta = delta
+                self._shadowed = shadowed
+                self._delta_version = version
+                self._delta_ok = delta_ok
+                self.delta_refreshes += 1
+        return delta_ok
+
+    def search(self, query: str, limit: int = 5, candidates: int = 15, min_matched: int = 2,
+               max_terms: int = 16) -> Optional[List[Dict[str, Any]]]:
+        """
+        Knowledge records ranked like SearchIndex.ranked (term overlap, then
+        confidence), one per duplicate group; None when the database must answer
+        """
+        snapshot = self._current()
+        if snapshot is None or not self._refresh_delta(snapshot):
+            self.fallbacks += 1
+            return None
+        with self._lock:
+            if snapshot is not self._snapshot:
+                self.fallbacks += 1
+                return None
+            delta = self._delta
+            shadowed = self._shadowed
+        self.searches += 1
+
+        terms = tokenize(query, drop_stopwords=True)[:max_terms]
+        if not terms:
+            return []
+        needed = min(min_matched, len(terms))
+
+        # (matched, confidence, id, root, snapshot position or delta record)
+        hits = []
+        postings = [found for found in (snapshot.postings(term) for term in terms) if found is not None]
+        if postings:
+            counts = np.bincount(np.concatenate(postings), minlength=len(snapshot.entries))
+            matched = np.nonzero((counts >= needed) & ~shadowed)[0]
+            if len(matched):
+                entries = snapshot.entries[matched]
+                order = np.lexsort((entries['id'], -entries['confidence'], -counts[matched]))[:candidates]
+                for position in matched[order]:
+                    entry = snapshot.entries[position]
+                    hits.append((int(counts[position]), float(entry['confidence']), int(entry['id']),
+                                 int(entry['root']), int(position)))
+
+        query_terms = set(terms)
+        for entry_id, item in delta.items():
+            overlap = len(query_terms & item['terms'])
+            if overlap >= needed:
+                hits.append((overlap, item['record']['confidence_score'], entry_id, item['root'], item['record']))
+
+        hits.sort(key=lambda hit: (-hit[0], -hit[1], hit[2]))
+        results = []
+        seen_roots = set()
+        for _, _, _, root, source in hits[:candidates]:
+            if root in seen_roots:
+                continue
+            seen_roots.add(root)
+            results.append(snapshot.record(source) if isinstance(source, int) else dict(source))
+            if len(results) >= limit:
+                break
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            'path': self.path,
+            'loaded': snapshot is not None,
+            'built_at': snapshot.built_at.isoformat() if snapshot else None,
+            'entries': len(snapshot.entries) if snapshot else 0,
+            'terms': len(snapshot.terms) if snapshot else 0,
+            'size_bytes': snapshot.size_bytes if snapshot else 0,
+            'delta_rows': len(self._delta),
+            'delta_ok': self._delta_ok,
+            'reloads': self.reloads,
+            'delta_refreshes': self.delta_refreshes,
+            'searches': self.searches,
+            'fallbacks': self.fallbacks
+        }
+
+
+def _epoch(moment: datetime) -> float:
+    return (moment - datetime(1970, 1, 1)).total_seconds()
+
+
+# Global knowledge snapshot instance
+knowledge_snapshot = KnowledgeSnapshotStore()
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        print(__doc__)
+        return 2
+
+    from flask import Flask
+
+    logging.basicConfig(level=logging.INFO)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = argv[0]
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        result = knowledge_snapshot.build(argv[1] if len(argv) > 1 else None)
+    print(f"Published {result['path']}: {result['entries']} entries, {result['terms']} terms, "
+          f"{result['size_bytes']} bytes")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
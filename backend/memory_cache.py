@@ -0,0 +1,166 @@
+"""
+Session Context Cache for Manus II
+Keeps the most recent short-term memories of each session in process so that
+consecutive turns do not re-read the same ShortTermMemory rows. Writes and
+sweeps in other workers are caught by comparing a cheap version of the
+session (row count and newest id) with the database once the cached copy is
+older than `revalidate_seconds`, which bounds how stale a session can be.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+
+class SessionContextCache:
+    """
+    Per-session cache of recent short-term memory with write-through updates.
+    Total size is bounded in entries and whole sessions are evicted LRU first.
+    """
+
+    def __init__(self, per_session_limit: int = 10, max_entries: int = 10000, revalidate_seconds: float = 1.0):
+        self.per_session_limit = per_session_limit
+        self.max_entries = max_entries
+        self.revalidate_seconds = revalidate_seconds
+
+        self._sessions: "OrderedDict[str, deque]" = OrderedDict()
+        self._versions: Dict[str, list] = {}  # session_id -> [version, monotonic time it was last confirmed]
+        self._loading: Dict[str, bool] = {}  # session_id -> written while loading
+        self._size = 0
+        self._lock = threading.Lock()
+
+        # Instrumentation
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revalidations = 0
+        self.stale = 0
+
+    def get_recent(self, session_id: str, loader: Callable[[str, int], List[Dict[str, Any]]],
+                   probe: Optional[Callable[[str], Tuple]] = None) -> List[Dict[str, Any]]:
+        """
+        Return recent memories for a session, newest first.
+        On a miss, loader(session_id, limit) is called to read them from the database.
+        probe(session_id) returns the session's (row count, newest id) in the
+        database; without it the cache only sees this process's writes.
+        """
+        with self._lock:
+            entries = self._sessions.get(session_id)
+            if entries is not None:
+                confirmed = self._versions[session_id]
+                if probe is None or time.monotonic() - confirmed[1] < self.revalidate_seconds:
+                    self._sessions.move_to_end(session_id)
+                    self.hits += 1
+                    return list(entries)
+
+        if entries is not None:
+            version = probe(session_id)
+            with self._lock:
+                self.revalidations += 1
+                confirmed = self._versions.get(session_id)
+                if confirmed is not None and confirmed[0] == version:
+                    confirmed[1] = time.monotonic()
+                    self._sessions.move_to_end(session_id)
+                    self.hits += 1
+                    return list(self._sessions[session_id])
+                # Another worker wrote to or swept this session
+                self.stale += 1
+                self._drop(session_id)
+
+        with self._lock:
+            self.misses += 1
+            self._loading[session_id] = False
+
+        try:
+            # Probed before loading, so a write landing in between shows up as a mismatch later
+            version = probe(session_id) if probe is not None else None
+            memories = loader(session_id, self.per_session_limit)
+        except Exception:
+            with self._lock:
+                self._loading.pop(session_id, None)
+            raise
+
+        with self._lock:
+            written_while_loading = self._loading.pop(session_id, False)
+            # A concurrent write may be missing from what we just read, so only
+            # cache the result if nothing was written for this session meanwhile
+            if not written_while_loading and session_id not in self._sessions:
+                self._sessions[session_id] = deque(memories, maxlen=self.per_session_limit)
+                self._versions[session_id] = [version, time.monotonic()]
+                self._size += len(self._sessions[session_id])
+                self._evict()
+
+        return list(memories)
+
+    def record(self, session_id: str, memory: Dict[str, Any]):
+        """Write-through hook called after a short-term memory has been committed"""
+        with self._lock:
+            entries = self._sessions.get(session_id)
+            if entries is None:
+                if session_id in self._loading:
+                    self._loading[session_id] = True
+                return
+
+            # The row this process just committed is part of the database version
+            confirmed = self._versions[session_id]
+            if confirmed[0] is not None:
+                count, newest = confirmed[0]
+                confirmed[0] = (count + 1, max(newest or 0, memory['id']))
+
+            before = len(entries)
+            entries.appendleft(memory)
+            self._size += len(entries) - before
+            self._sessions.move_to_end(session_id)
+            self._evict()
+
+    def invalidate(self, session_id: str):
+        """Drop the cached memories of one session"""
+        with self._lock:
+            self._drop(session_id)
+            if session_id in self._loading:
+                self._loading[session_id] = True
+
+    def invalidate_all(self):
+        """Drop every cached session"""
+        with self._lock:
+            self._sessions.clear()
+            self._versions.clear()
+            self._size = 0
+            for session_id in self._loading:
+                self._loading[session_id] = True
+
+    def _drop(self, session_id: str):
+        """Forget one cached session (lock held)"""
+        entries = self._sessions.pop(session_id, None)
+        if entries is not None:
+            self._size -= len(entries)
+        self._versions.pop(session_id, None)
+
+    def _evict(self):
+        """Evict least recently used sessions until the cache fits (lock held)"""
+        while self._size > self.max_entries and self._sessions:
+            session_id, entries = self._sessions.popitem(last=False)
+            self._versions.pop(session_id, None)
+            self._size -= len(entries)
+            self.evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit-rate and size statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'revalidations': self.revalidations,
+                'stale': self.stale,
+                'sessions': len(self._sessions),
+                'entries': self._size,
+                'max_entries': self.max_entries
+            }
+
+
+# Global session context cache instance
+session_context_cache = SessionContextCache()
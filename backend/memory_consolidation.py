@@ -0,0 +1,203 @@
+"""
+Memory Consolidation for Manus II
+Compacts the near-identical "Query pattern" rows that _learn_from_interaction
+writes on every successful turn into a single, better consolidated memory
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+from src.models.memory_system import db, LongTermMemory, MemoryLSHBucket, ConsolidationCheckpoint
+from .minhash import MinHasher
+from .tag_index import tag_index, LONG_TERM_MEMORY
+from .memory_graph import memory_graph
+from .memory_ranking import memory_ranker
+
+
+class MemoryConsolidator:
+    """
+    Incremental, resumable consolidation of LongTermMemory patterns.
+    Rows are processed in id order, one batch per transaction; the checkpoint is
+    committed together with the merges so a restart resumes after the last batch.
+    """
+
+    JOB_NAME = 'pattern_consolidation'
+
+    def __init__(self, batch_size: int = 200, similarity_threshold: float = 0.7,
+                 consolidation_step: float = 0.1, memory_type: str = 'pattern'):
+        self.logger = logging.getLogger(__name__)
+        self.batch_size = batch_size
+        self.similarity_threshold = similarity_threshold
+        self.consolidation_step = consolidation_step
+        self.memory_type = memory_type
+        self.hasher = MinHasher()
+
+    def _get_checkpoint(self) -> ConsolidationCheckpoint:
+        checkpoint = ConsolidationCheckpoint.query.filter_by(job_name=self.JOB_NAME).first()
+        if checkpoint is None:
+            checkpoint = ConsolidationCheckpoint(
+                job_name=self.JOB_NAME,
+                last_processed_id=0,
+                processed_count=0,
+                merged_count=0
+            )
+            db.session.add(checkpoint)
+        return checkpoint
+
+    def run_batch(self) -> Dict[str, Any]:
+        """Consolidate the next batch of pattern memories"""
+        checkpoint = self._get_checkpoint()
+        last_id = checkpoint.last_processed_id or 0
+
+        batch = LongTermMemory.query.filter(
+            LongTermMemory.memory_type == self.memory_type,
+            LongTermMemory.id > last_id
+        ).order_by(LongTermMemory.id.asc()).limit(self.batch_size).all()
+
+        if not batch:
+            db.session.commit()
+            return {'processed': 0, 'merged': 0, 'last_processed_id': last_id, 'done': True}
+
+        signatures: Dict[int, List[int]] = {}
+        merged_ids: List[int] = []
+
+        try:
+            for memory in batch:
+                signature = self.hasher.signature(memory.content)
+                keys = self.hasher.band_keys(signature)
+
+                survivor = self._find_survivor(memory.id, signature, keys, signatures)
+                if survivor is not None:
+                    self._merge(survivor, memory)
+                    merged_ids.append(memory.id)
+                    continue
+
+                # No near-duplicate yet: this row becomes the representative
+                signatures[memory.id] = signature
+                db.session.add_all([MemoryLSHBucket(bucket=key, memory_id=memory.id) for key in keys])
+                db.session.flush()
+
+            checkpoint.last_processed_id = batch[-1].id
+            checkpoint.processed_count = (checkpoint.processed_count or 0) + len(batch)
+            checkpoint.merged_count = (checkpoint.merged_count or 0) + len(merged_ids)
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+            self.logger.error(f"Memory consolidation batch failed: {str(e)}")
+            raise
+
+        return {
+            'processed': len(batch),
+            'merged': len(merged_ids),
+            'merged_ids': merged_ids,
+            'last_processed_id': batch[-1].id,
+            'done': len(batch) < self.batch_size
+        }
+
+    def run(self, max_batches: Optional[int] = None,
+            should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """
+        Run batches until caught up or max_batches is reached; should_stop is
+        checked between batches so an abandoned caller can end the run early
+        """
+        processed = 0
+        merged = 0
+        batches = 0
+        result = {'done': True, 'last_processed_id': 0}
+
+        while (max_batches is None or batches < max_batches) and not (should_stop and should_stop()):
+            result = self.run_batch()
+            batches += 1
+            processed += result['processed']
+            merged += result['merged']
+            if result['done']:
+                break
+
+        return {
+            'success': True,
+            'batches': batches,
+            'processed': processed,
+            'merged': merged,
+            'last_processed_id': result['last_processed_id'],
+            'caught_up': result['done']
+        }
+
+    def _find_survivor(self, memory_id: int, signature: List[int], keys: List[str],
+                       signatures: Dict[int, List[int]]) -> Optional[LongTermMemory]:
+        """Return the oldest indexed memory similar enough to merge into"""
+        candidate_ids = sorted({
+            row.memory_id for row in MemoryLSHBucket.query.filter(MemoryLSHBucket.bucket.in_(keys)).all()
+            if row.memory_id != memory_id
+        })
+
+        for candidate_id in candidate_ids:
+            candidate = LongTermMemory.query.get(candidate_id)
+            if candidate is None:
+                continue
+
+            candidate_signature = signatures.get(candidate_id)
+            if candidate_signature is None:
+                candidate_signature = self.hasher.signature(candidate.content)
+                signatures[candidate_id] = candidate_signature
+
+            if MinHasher.similarity(signature, candidate_signature) >= self.similarity_threshold:
+                return candidate
+
+        return None
+
+    def _merge(self, survivor: LongTermMemory, duplicate: LongTermMemory):
+        """Fold a duplicate into its survivor and delete it"""
+        score = survivor.consolidation_score or 0.0
+        survivor.consolidation_score = 1.0 - (1.0 - score) * (1.0 - self.consolidation_step)
+        survivor.importance_score = max(survivor.importance_score or 0.0, duplicate.importance_score or 0.0)
+
+        related = _load_list(survivor.related_memories)
+        for memory_id in _load_list(duplicate.related_memories):
+            if memory_id not in related and memory_id != survivor.id:
+                related.append(memory_id)
+        survivor.related_memories = json.dumps(related)
+        for memory_id in related:
+            if isinstance(memory_id, int) and memory_id != duplicate.id:
+                memory_graph.add_association(LONG_TERM_MEMORY, survivor.id, LONG_TERM_MEMORY, memory_id)
+
+        tags = _load_list(survivor.tags)
+        for tag in _load_list(duplicate.tags):
+            if tag not in tags:
+                tags.append(tag)
+        survivor.tags = json.dumps(tags)
+        tag_index.set_tags(LONG_TERM_MEMORY, survivor.id, tags)
+
+        survivor.last_reinforced = max(
+            survivor.last_reinforced or datetime.utcnow(),
+            duplicate.last_reinforced or duplicate.created_at or datetime.utcnow()
+        )
+
+        tag_index.remove(LONG_TERM_MEMORY, [duplicate.id])
+        memory_graph.merge_node(LONG_TERM_MEMORY, duplicate.id, survivor.id)
+        memory_ranker.remove([duplicate.id])
+        memory_ranker.upsert(survivor.id, survivor.importance_score, survivor.consolidation_score,
+                             survivor.last_reinforced)
+        MemoryLSHBucket.query.filter_by(memory_id=duplicate.id).delete()
+        db.session.delete(duplicate)
+        db.session.flush()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return the persisted checkpoint of the job"""
+        checkpoint = ConsolidationCheckpoint.query.filter_by(job_name=self.JOB_NAME).first()
+        return checkpoint.to_dict() if checkpoint else {'job_name': self.JOB_NAME, 'last_processed_id': 0}
+
+
+def _load_list(value: Optional[str]) -> List[Any]:
+    if not value:
+        return []
+    try:
+        loaded = json.loads(value)
+    except ValueError:
+        return []
+    return loaded if isinstance(loaded, list) else []
+
+
+# Global memory consolidator instance
+memory_consolidator = MemoryConsolidator()
@@ -0,0 +1,194 @@
+"""
+Memory Association Graph for Manus II
+Stores memory/knowledge associations as an indexed adjacency table instead of
+JSON arrays, and answers k-hop neighborhood queries with one recursive CTE
+"""
+
+import json
+from typing import Dict, Any, List, Tuple, Iterable
+from sqlalchemy import inspect, text
+from src.models.memory_system import db, MemoryAssociation, LongTermMemory, EpisodicMemory
+from .episodic_archive import episodic_archive
+
+LONG_TERM_MEMORY = 'long_term_memory'
+EPISODIC_MEMORY = 'episodic_memory'
+KNOWLEDGE = 'knowledge'
+
+# Edges are undirected for traversal: the OR join walks the source-side unique
+# index and the target-side index, and path weight is the product of edge weights
+_NEIGHBORHOOD_SQL = """
+WITH RECURSIVE walk(node_type, node_id, depth, weight) AS (
+    {anchor}
+    UNION
+    SELECT
+        CAST(CASE WHEN a.source_type = w.node_type AND a.source_id = w.node_id THEN a.target_type ELSE a.source_type END AS VARCHAR),
+        CASE WHEN a.source_type = w.node_type AND a.source_id = w.node_id THEN a.target_id ELSE a.source_id END,
+        w.depth + 1,
+        w.weight * a.weight
+    FROM walk w
+    JOIN memory_associations a
+      ON (a.source_type = w.node_type AND a.source_id = w.node_id)
+      OR (a.target_type = w.node_type AND a.target_id = w.node_id)
+    WHERE w.depth < :max_depth AND a.weight >= :min_weight
+)
+SELECT node_type, node_id, MIN(depth) AS depth, MAX(weight) AS weight
+FROM walk
+WHERE depth > 0 AND NOT ({seed_filter})
+GROUP BY node_type, node_id
+HAVING MAX(weight) >= :min_path_weight
+ORDER BY MIN(depth) ASC, MAX(weight) DESC
+LIMIT :limit
+"""
+
+
+class MemoryGraph:
+    """Adjacency-table association graph; callers own the transaction"""
+
+    def add_association(self, source_type: str, source_id: int, target_type: str, target_id: int,
+                        weight: float = 1.0, relation: str = 'related') -> MemoryAssociation:
+        """Create an edge, or strengthen it if it already exists"""
+        edge = MemoryAssociation.query.filter_by(
+            source_type=source_type, source_id=source_id,
+            target_type=target_type, target_id=target_id
+        ).first()
+
+        if edge is None:
+            edge = MemoryAssociation(
+                source_type=source_type, source_id=source_id,
+                target_type=target_type, target_id=target_id,
+                weight=weight, relation=relation
+            )
+            db.session.add(edge)
+        else:
+            edge.weight = max(edge.weight or 0.0, weight)
+        return edge
+
+    def merge_node(self, node_type: str, from_id: int, into_id: int):
+        """Move every edge of a merged-away node onto its survivor"""
+        edges = MemoryAssociation.query.filter(db.or_(
+            db.and_(MemoryAssociation.source_type == node_type, MemoryAssociation.source_id == from_id),
+            db.and_(MemoryAssociation.target_type == node_type, MemoryAssociation.target_id == from_id)
+        )).all()
+
+        moved = []
+        for edge in edges:
+            source = (edge.source_type, into_id if (edge.source_type, edge.source_id) == (node_type, from_id) else edge.source_id)
+            target = (edge.target_type, into_id if (edge.target_type, edge.target_id) == (node_type, from_id) else edge.target_id)
+            moved.append((source, target, edge.weight, edge.relation))
+            db.session.delete(edge)
+        db.session.flush()
+
+        for source, target, weight, relation in moved:
+            if source != target:
+                self.add_association(source[0], source[1], target[0], target[1], weight, relation)
+
+    def remove_nodes(self, node_type: str, node_ids: Iterable[int]):
+        """Delete every edge touching the given nodes"""
+        node_ids = list(node_ids)
+        if not node_ids:
+            return
+        MemoryAssociation.query.filter(db.or_(
+            db.and_(MemoryAssociation.source_type == node_type, MemoryAssociation.source_id.in_(node_ids)),
+            db.and_(MemoryAssociation.target_type == node_type, MemoryAssociation.target_id.in_(node_ids))
+        )).delete(synchronize_session=False)
+
+    def neighborhood(self, seeds: List[Tuple[str, int]], hops: int = 2, min_weight: float = 0.0,
+                     min_path_weight: float = 0.0, limit: int = 20) -> List[Dict[str, Any]]:
+        """Nodes within `hops` edges of any seed, nearest and strongest first"""
+        if not seeds:
+            return []
+
+        params = {
+            'max_depth': hops,
+            'min_weight': min_weight,
+            'min_path_weight': min_path_weight,
+            'limit': limit
+        }
+        anchors = []
+        seed_filters = []
+        for index, (node_type, node_id) in enumerate(seeds):
+            params[f'seed_type_{index}'] = node_type
+            params[f'seed_id_{index}'] = node_id
+            anchors.append(f"SELECT CAST(:seed_type_{index} AS VARCHAR), CAST(:seed_id_{index} AS INTEGER), 0, CAST(1.0 AS FLOAT)")
+            seed_filters.append(f"(node_type = :seed_type_{index} AND node_id = :seed_id_{index})")
+
+        sql = _NEIGHBORHOOD_SQL.format(anchor=' UNION '.join(anchors), seed_filter=' OR '.join(seed_filters))
+        rows = db.session.execute(text(sql), params).fetchall()
+
+        return [
+            {'type': row[0], 'id': row[1], 'depth': row[2], 'weight': row[3]}
+            for row in rows
+        ]
+
+    def related_memories(self, seeds: List[Tuple[str, int]], hops: int = 2, min_weight: float = 0.3,
+                         limit: int = 5) -> List[Dict[str, Any]]:
+        """Load the long-term and episodic memories in the neighborhood of the seeds"""
+        nodes = self.neighborhood(seeds, hops=hops, min_weight=min_weight, limit=limit * 4)
+
+        long_term_ids = [node['id'] for node in nodes if node['type'] == LONG_TERM_MEMORY]
+        episodic_ids = [node['id'] for node in nodes if node['type'] == EPISODIC_MEMORY]
+
+        titles = {}
+        if long_term_ids:
+            for row in db.session.query(LongTermMemory.id, LongTermMemory.title, LongTermMemory.content)\
+                    .filter(LongTermMemory.id.in_(long_term_ids)):
+                titles[(LONG_TERM_MEMORY, row.id)] = (row.title, row.content)
+        if episodic_ids:
+            for row in db.session.query(EpisodicMemory.id, EpisodicMemory.event_title, EpisodicMemory.lessons_learned)\
+                    .filter(EpisodicMemory.id.in_(episodic_ids)):
+                titles[(EPISODIC_MEMORY, row.id)] = (row.event_title, row.lessons_learned or '')
+            
+            # Episodes of cold months live in the archive partitions
+            archived_ids = [memory_id for memory_id in episodic_ids if (EPISODIC_MEMORY, memory_id) not in titles]
+            for memory_id, record in episodic_archive.get_many(archived_ids).items():
+                titles[(EPISODIC_MEMORY, memory_id)] = (record['event_title'], record['lessons_learned'] or '')
+
+        related = []
+        for node in nodes:
+            key = (node['type'], node['id'])
+            if key in titles:
+                title, content = titles[key]
+                related.append({**node, 'title': title, 'content': content})
+            if len(related) >= limit:
+                break
+        return related
+
+    def backfill(self, batch_size: int = 500) -> Dict[str, Any]:
+        """Create edges from the legacy related_memories / related_knowledge JSON columns"""
+        created = 0
+
+        for model, related_column, source_type, target_type in [
+            (LongTermMemory, LongTermMemory.related_memories, LONG_TERM_MEMORY, LONG_TERM_MEMORY),
+            (EpisodicMemory, EpisodicMemory.related_knowledge, EPISODIC_MEMORY, KNOWLEDGE)
+        ]:
+            last_id = 0
+            while True:
+                rows = db.session.query(model.id, related_column).filter(
+                    model.id > last_id, related_column.isnot(None)
+                ).order_by(model.id.asc()).limit(batch_size).all()
+                if not rows:
+                    break
+
+                for source_id, related in rows:
+                    for target_id in _load_ids(related):
+                        if (source_type, source_id) != (target_type, target_id):
+                            edge = self.add_association(source_type, source_id, target_type, target_id)
+                            # Existing edges, from earlier runs or repeated ids, are only strengthened
+                            if inspect(edge).pending:
+                                created += 1
+                db.session.commit()
+                last_id = rows[-1][0]
+
+        return {'success': True, 'edges': created}
+
+
+def _load_ids(value: str) -> List[int]:
+    try:
+        loaded = json.loads(value) if value else []
+    except ValueError:
+        return []
+    return [item for item in loaded if isinstance(item, int)] if isinstance(loaded, list) else []
+
+
+# Global memory graph instance
+memory_graph = MemoryGraph()
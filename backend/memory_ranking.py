@@ -0,0 +1,326 @@
+"""
+Memory Ranking for Manus II
+Keeps LongTermMemory importance, consolidation and reinforcement times in
+NumPy arrays so decay and reinforcement are applied to every memory at once,
+and writes changed scores back to the database in bulk on a schedule
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple, Iterable, Optional
+import numpy as np
+from sqlalchemy import bindparam
+from src.models.memory_system import db, LongTermMemory
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_seconds(value: Optional[datetime]) -> float:
+    return (value - _EPOCH).total_seconds() if value is not None else 0.0
+
+
+def _from_seconds(seconds: float) -> datetime:
+    return _EPOCH + timedelta(seconds=float(seconds))
+
+
+class MemoryRankingEngine:
+    """
+    score = importance * 2^(-age / half_life) + consolidation_weight * consolidation
+    where age is the time since the memory was last reinforced. Reinforcement
+    moves importance a fixed fraction of the way towards 1 and resets the age.
+    """
+
+    def __init__(self, half_life_days: float = 30.0, reinforcement_rate: float = 0.1,
+                 consolidation_weight: float = 0.5, flush_interval: float = 300.0):
+        self.logger = logging.getLogger(__name__)
+        self.half_life_days = half_life_days
+        self.reinforcement_rate = reinforcement_rate
+        self.consolidation_weight = consolidation_weight
+        self.flush_interval = flush_interval
+
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._size = 0
+        self._positions: Dict[int, int] = {}
+        self._allocate(1024)
+
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        # Instrumentation
+        self.flushes = 0
+        self.rows_written = 0
+
+    def _allocate(self, capacity: int):
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._importance = np.zeros(capacity, dtype=np.float64)
+        self._consolidation = np.zeros(capacity, dtype=np.float64)
+        self._reinforced_at = np.zeros(capacity, dtype=np.float64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._dirty = np.zeros(capacity, dtype=bool)
+
+    def _grow(self, needed: int):
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name in ('_ids', '_importance', '_consolidation', '_reinforced_at', '_alive', '_dirty'):
+            old = getattr(self, name)
+            new = np.zeros(new_capacity, dtype=old.dtype)
+            new[:capacity] = old
+            setattr(self, name, new)
+
+    def load(self):
+        """(Re)load every long-term memory score from the database"""
+        rows = db.session.query(
+            LongTermMemory.id, LongTermMemory.importance_score,
+            LongTermMemory.consolidation_score, LongTermMemory.last_reinforced
+        ).all()
+
+        with self._lock:
+            # Reinforcement that is not written back yet is not in the rows
+            pending = [
+                (int(self._ids[i]), self._importance[i], self._consolidation[i], self._reinforced_at[i])
+                for i in np.flatnonzero(self._dirty[:self._size] & self._alive[:self._size])
+            ]
+
+            self._allocate(max(1024, len(rows) * 2))
+            self._positions = {}
+            self._size = len(rows)
+            for index, (memory_id, importance, consolidation, last_reinforced) in enumerate(rows):
+                self._positions[memory_id] = index
+                self._ids[index] = memory_id
+                self._importance[index] = importance or 0.0
+                self._consolidation[index] = consolidation or 0.0
+                self._reinforced_at[index] = _to_seconds(last_reinforced)
+            self._alive[:self._size] = True
+            for memory_id, importance, consolidation, reinforced_at in pending:
+                self._set(memory_id, importance, consolidation, reinforced_at, dirty=True)
+            self._loaded = True
+
+    def ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _page_in(self, memory_ids: List[int]):
+        """
+        Until the full load has run (see start), read just the memories a
+        request touches, so the chat path never loads the whole table
+        """
+        with self._lock:
+            if self._loaded:
+                return
+            missing = [memory_id for memory_id in memory_ids if memory_id not in self._positions]
+        if not missing:
+            return
+
+        rows = []
+        for start in range(0, len(missing), 500):
+            rows.extend(db.session.query(
+                LongTermMemory.id, LongTermMemory.importance_score,
+                LongTermMemory.consolidation_score, LongTermMemory.last_reinforced
+            ).filter(LongTermMemory.id.in_(missing[start:start + 500])))
+
+        with self._lock:
+            for memory_id, importance, consolidation, last_reinforced in rows:
+                if memory_id not in self._positions:
+                    self._set(memory_id, importance or 0.0, consolidation or 0.0, _to_seconds(last_reinforced))
+
+    def _set(self, memory_id: int, importance: float, consolidation: float, reinforced_at: float,
+             dirty: bool = False):
+        """Write one slot; reinforcement still waiting for write-back is merged in, never dropped"""
+        index = self._positions.get(memory_id)
+        if index is None:
+            self._grow(self._size + 1)
+            index = self._size
+            self._size += 1
+            self._positions[memory_id] = index
+            self._ids[index] = memory_id
+            self._dirty[index] = False
+        if self._dirty[index]:
+            importance = max(importance, self._importance[index])
+            reinforced_at = max(reinforced_at, self._reinforced_at[index])
+        self._dirty[index] = self._dirty[index] or dirty
+        self._importance[index] = importance
+        self._consolidation[index] = consolidation
+        self._reinforced_at[index] = reinforced_at
+        self._alive[index] = True
+
+    def upsert(self, memory_id: int, importance: float, consolidation: float,
+               last_reinforced: Optional[datetime] = None):
+        """Add or refresh one memory after it has been written"""
+        with self._lock:
+            self._set(memory_id, importance or 0.0, consolidation or 0.0,
+                      _to_seconds(last_reinforced or datetime.utcnow()))
+
+    def remove(self, memory_ids: Iterable[int]):
+        """Forget deleted memories"""
+        with self._lock:
+            for memory_id in memory_ids:
+                index = self._positions.pop(memory_id, None)
+                if index is not None:
+                    self._alive[index] = False
+                    self._dirty[index] = False
+
+            # Reclaim slots once more than half of them belong to deleted memories
+            if self._size > 1024 and len(self._positions) < self._size // 2:
+                self._compact()
+
+    def _compact(self):
+        keep = np.flatnonzero(self._alive[:self._size])
+        for name in ('_ids', '_importance', '_consolidation', '_reinforced_at', '_alive', '_dirty'):
+            array = getattr(self, name)
+            array[:len(keep)] = array[keep]
+            array[len(keep):] = 0
+        self._size = len(keep)
+        self._positions = {int(memory_id): index for index, memory_id in enumerate(self._ids[:self._size])}
+
+    def reinforce(self, memory_ids: Iterable[int], now: Optional[datetime] = None):
+        """Reinforce memories that were used, in one vectorized update"""
+        memory_ids = list(memory_ids)
+        self._page_in(memory_ids)
+        with self._lock:
+            indexes = np.fromiter(
+                (self._positions[memory_id] for memory_id in memory_ids if memory_id in self._positions),
+                dtype=np.int64
+            )
+            if not len(indexes):
+                return
+            self._importance[indexes] += self.reinforcement_rate * (1.0 - self._importance[indexes])
+            self._reinforced_at[indexes] = _to_seconds(now or datetime.utcnow())
+            self._dirty[indexes] = True
+
+    def scores(self, now: Optional[datetime] = None) -> np.ndarray:
+        """Decayed score of every slot; deleted slots score -inf"""
+        self.ensure_loaded()
+        return self._scores(now)
+
+    def _scores(self, now: Optional[datetime] = None) -> np.ndarray:
+        with self._lock:
+            size = self._size
+            age_days = (_to_seconds(now or datetime.utcnow()) - self._reinforced_at[:size]) / 86400.0
+            decay = np.exp2(-np.maximum(age_days, 0.0) / self.half_life_days)
+            scores = self._importance[:size] * decay + self.consolidation_weight * self._consolidation[:size]
+            return np.where(self._alive[:size], scores, -np.inf)
+
+    def top_k(self, k: int = 5, candidate_ids: Optional[Iterable[int]] = None,
+              now: Optional[datetime] = None) -> List[Tuple[int, float]]:
+        """Return (memory_id, score) for the k best memories, optionally among candidates"""
+        if k <= 0:
+            return []
+        if candidate_ids is not None:
+            candidate_ids = list(candidate_ids)
+            self._page_in(candidate_ids)
+        else:
+            self.ensure_loaded()
+
+        with self._lock:
+            scores = self._scores(now)
+            if candidate_ids is not None:
+                indexes = np.fromiter(
+                    (self._positions[memory_id] for memory_id in candidate_ids if memory_id in self._positions),
+                    dtype=np.int64
+                )
+            else:
+                indexes = np.flatnonzero(np.isfinite(scores))
+            ids = self._ids[indexes]
+
+        if not len(indexes):
+            return []
+
+        candidate_scores = scores[indexes]
+        if len(indexes) > k:
+            best = np.argpartition(-candidate_scores, k - 1)[:k]
+        else:
+            best = np.arange(len(indexes))
+        best = best[np.argsort(-candidate_scores[best], kind='stable')]
+        return [(int(ids[i]), float(candidate_scores[i])) for i in best]
+
+    def flush(self) -> int:
+        """Write reinforced scores back with one executemany UPDATE (requires an app context)"""
+        with self._lock:
+            dirty = np.flatnonzero(self._dirty[:self._size] & self._alive[:self._size])
+            if not len(dirty):
+                return 0
+            updates = [
+                {
+                    'memory_id': int(self._ids[i]),
+                    'new_importance': float(self._importance[i]),
+                    'new_reinforced_at': _from_seconds(self._reinforced_at[i])
+                }
+                for i in dirty
+            ]
+            self._dirty[dirty] = False
+
+        table = LongTermMemory.__table__
+        try:
+            db.session.execute(
+                table.update().where(table.c.id == bindparam('memory_id')).values(
+                    importance_score=bindparam('new_importance'),
+                    last_reinforced=bindparam('new_reinforced_at')
+                ),
+                updates
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._lock:
+                for update in updates:
+                    index = self._positions.get(update['memory_id'])
+                    if index is not None:
+                        self._dirty[index] = True
+            raise
+
+        self.flushes += 1
+        self.rows_written += len(updates)
+        return len(updates)
+
+    def start(self, app):
+        """Start the background write-back thread for a Flask app; it first warms the scores of every memory"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_forever, args=(app,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background write-back thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval)
+            self._thread = None
+
+    def _run_forever(self, app):
+        try:
+            with app.app_context():
+                started = time.perf_counter()
+                self.ensure_loaded()
+                self.logger.info(f"Loaded {len(self._positions)} memory scores in {time.perf_counter() - started:.3f}s")
+        except Exception as e:
+            self.logger.error(f"Memory score warm-up failed: {str(e)}")
+
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                with app.app_context():
+                    started = time.perf_counter()
+                    written = self.flush()
+                    if written:
+                        self.logger.info(f"Wrote {written} memory scores in {time.perf_counter() - started:.3f}s")
+            except Exception as e:
+                self.logger.error(f"Memory score write-back failed: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'loaded': self._loaded,
+                'memories': len(self._positions),
+                'dirty': int(np.count_nonzero(self._dirty[:self._size])),
+                'flushes': self.flushes,
+                'rows_written': self.rows_written
+            }
+
+
+# Global memory ranking engine instance
+memory_ranker = MemoryRankingEngine()
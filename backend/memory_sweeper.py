@@ -0,0 +1,183 @@
+"""
+Short-Term Memory Expiry for Manus II
+Assigns expires_at from a per-context_type TTL policy and reclaims expired
+ShortTermMemory rows in small batches from a background thread
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from src.models.memory_system import db, ShortTermMemory
+from .memory_cache import session_context_cache
+
+# TTL per ShortTermMemory.context_type; None means the memory never expires
+DEFAULT_TTL_POLICY = {
+    'conversation': timedelta(hours=24),
+    'task': timedelta(days=7),
+    'system': timedelta(days=30)
+}
+
+
+class ShortTermMemorySweeper:
+    """
+    Rate-limited sweeper that deletes expired short-term memories.
+    Each batch is its own short transaction, batches are separated by a pause
+    and one run is capped, so writers never wait behind a long delete.
+    """
+
+    def __init__(self, ttl_policy: Optional[Dict[str, Optional[timedelta]]] = None,
+                 default_ttl: Optional[timedelta] = timedelta(hours=24),
+                 batch_size: int = 500, max_batches_per_run: int = 20,
+                 batch_pause: float = 0.05, interval: float = 300.0):
+        self.logger = logging.getLogger(__name__)
+        self.ttl_policy = dict(DEFAULT_TTL_POLICY if ttl_policy is None else ttl_policy)
+        self.default_ttl = default_ttl
+        self.batch_size = batch_size
+        self.max_batches_per_run = max_batches_per_run
+        self.batch_pause = batch_pause
+        self.interval = interval
+
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.runs = 0
+        self.batches = 0
+        self.rows_reclaimed = 0
+        self.rows_backfilled = 0
+        self.last_run_at = None
+        self.last_run_seconds = 0.0
+        self.last_run_reclaimed = 0
+
+    def expiry_for(self, context_type: str, created_at: Optional[datetime] = None) -> Optional[datetime]:
+        """Return the expiry time for a memory of the given context type"""
+        ttl = self.ttl_policy.get(context_type, self.default_ttl)
+        if ttl is None:
+            return None
+        return (created_at or datetime.utcnow()) + ttl
+
+    def sweep(self, max_batches: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Delete expired memories in bounded batches (requires an app context).
+        Returns the number of rows reclaimed by this run.
+        """
+        max_batches = max_batches or self.max_batches_per_run
+        started = time.perf_counter()
+        reclaimed = 0
+        batches = 0
+
+        with self._lock:
+            backfilled = self._backfill_expiry()
+
+            while batches < max_batches:
+                now = datetime.utcnow()
+                expired = db.session.query(ShortTermMemory.id, ShortTermMemory.session_id).filter(
+                    ShortTermMemory.expires_at < now
+                ).order_by(ShortTermMemory.expires_at.asc()).limit(self.batch_size).all()
+
+                if not expired:
+                    break
+
+                ids = [row.id for row in expired]
+                ShortTermMemory.query.filter(ShortTermMemory.id.in_(ids)).delete(synchronize_session=False)
+                db.session.commit()
+
+                for session_id in {row.session_id for row in expired}:
+                    session_context_cache.invalidate(session_id)
+
+                reclaimed += len(ids)
+                batches += 1
+
+                if len(ids) < self.batch_size:
+                    break
+                if self._stop_event.wait(self.batch_pause):
+                    break
+
+            elapsed = time.perf_counter() - started
+            self.runs += 1
+            self.batches += batches
+            self.rows_reclaimed += reclaimed
+            self.rows_backfilled += backfilled
+            self.last_run_at = datetime.utcnow()
+            self.last_run_seconds = elapsed
+            self.last_run_reclaimed = reclaimed
+
+        return {
+            'success': True,
+            'reclaimed': reclaimed,
+            'batches': batches,
+            'backfilled': backfilled,
+            'seconds': elapsed
+        }
+
+    def _backfill_expiry(self) -> int:
+        """Assign expires_at to one batch of rows written before the TTL policy existed"""
+        query = ShortTermMemory.query.filter(ShortTermMemory.expires_at.is_(None))
+
+        # Context types that never expire stay NULL, skip them so the batch makes progress
+        never_expire = [context_type for context_type, ttl in self.ttl_policy.items() if ttl is None]
+        if self.default_ttl is None:
+            query = query.filter(ShortTermMemory.context_type.in_(
+                [context_type for context_type, ttl in self.ttl_policy.items() if ttl is not None]
+            ))
+        elif never_expire:
+            query = query.filter(~ShortTermMemory.context_type.in_(never_expire))
+
+        rows = query.limit(self.batch_size).all()
+
+        backfilled = 0
+        for memory in rows:
+            expires_at = self.expiry_for(memory.context_type, memory.created_at)
+            if expires_at is not None:
+                memory.expires_at = expires_at
+                backfilled += 1
+
+        if backfilled:
+            db.session.commit()
+        return backfilled
+
+    def start(self, app):
+        """Start the background sweeper thread for a Flask app"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_forever, args=(app,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background sweeper thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+
+    def _run_forever(self, app):
+        while not self._stop_event.is_set():
+            try:
+                with app.app_context():
+                    self.sweep()
+                    db.session.remove()
+            except Exception as e:
+                self.logger.error(f"Short-term memory sweep failed: {str(e)}")
+            self._stop_event.wait(self.interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return sweeper metrics"""
+        return {
+            'runs': self.runs,
+            'batches': self.batches,
+            'rows_reclaimed': self.rows_reclaimed,
+            'rows_backfilled': self.rows_backfilled,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_run_seconds': self.last_run_seconds,
+            'last_run_reclaimed': self.last_run_reclaimed,
+            'running': self._thread is not None and self._thread.is_alive()
+        }
+
+
+# Global short-term memory sweeper instance
+memory_sweeper = ShortTermMemorySweeper()
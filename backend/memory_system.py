@@ -6,6 +6,9 @@ db = SQLAlchemy()
 
 class ShortTermMemory(db.Model):
     __tablename__ = 'short_term_memory'
+    __table_args__ = (
+        db.Index('ix_short_term_memory_session_accessed', 'session_id', 'last_accessed'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.String(100), nullable=False)
@@ -16,7 +19,7 @@ class ShortTermMemory(db.Model):
     access_count = db.Column(db.Integer, default=0)
     last_accessed = db.Column(db.DateTime, default=datetime.utcnow)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    expires_at = db.Column(db.DateTime)  # when this memory should be cleaned up
+    expires_at = db.Column(db.DateTime, index=True)  # when this memory should be cleaned up
     
     def to_dict(self):
         return {
@@ -34,6 +37,12 @@ class ShortTermMemory(db.Model):
 
 class LongTermMemory(db.Model):
     __tablename__ = 'long_term_memory'
+    __table_args__ = (
+        db.Index('ix_long_term_memory_type_importance', 'memory_type', 'importance_score'),
+        db.Index('ix_long_term_memory_type_id', 'memory_type', 'id'),
+        # Consolidation deletes rows and checkpoints by id, so SQLite must never reuse an id
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     memory_type = db.Column(db.String(50), nullable=False)  # pattern, insight, experience
@@ -76,7 +85,7 @@ class EpisodicMemory(db.Model):
     emotional_impact = db.Column(db.String(50))  # positive, negative, neutral, mixed
     lessons_learned = db.Column(db.Text)
     related_knowledge = db.Column(db.Text)  # JSON array of related knowledge IDs
-    event_timestamp = db.Column(db.DateTime, nullable=False)
+    event_timestamp = db.Column(db.DateTime, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def to_dict(self):
@@ -123,3 +132,89 @@ class ProceduralMemory(db.Model):
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
+
+class MemoryLSHBucket(db.Model):
+    __tablename__ = 'memory_lsh_buckets'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.String(64), nullable=False, index=True)  # "<band>:<hash>" LSH key
+    memory_id = db.Column(db.Integer, nullable=False, index=True)  # consolidated LongTermMemory id
+
+class ConsolidationCheckpoint(db.Model):
+    __tablename__ = 'consolidation_checkpoints'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_name = db.Column(db.String(100), nullable=False, unique=True)
+    last_processed_id = db.Column(db.Integer, default=0)
+    processed_count = db.Column(db.Integer, default=0)
+    merged_count = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_name': self.job_name,
+            'last_processed_id': self.last_processed_id,
+            'processed_count': self.processed_count,
+            'merged_count': self.merged_count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class MemoryAssociation(db.Model):
+    __tablename__ = 'memory_associations'
+    __table_args__ = (
+        # The unique edge constraint doubles as the outgoing (source-side) index
+        db.UniqueConstraint('source_type', 'source_id', 'target_type', 'target_id', name='uq_memory_associations_edge'),
+        db.Index('ix_memory_associations_target', 'target_type', 'target_id', 'weight'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    source_type = db.Column(db.String(50), nullable=False)  # long_term_memory, episodic_memory, knowledge
+    source_id = db.Column(db.Integer, nullable=False)
+    target_type = db.Column(db.String(50), nullable=False)
+    target_id = db.Column(db.Integer, nullable=False)
+    weight = db.Column(db.Float, default=1.0)  # association strength, 0-1
+    relation = db.Column(db.String(50), default='related')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'source_type': self.source_type,
+            'source_id': self.source_id,
+            'target_type': self.target_type,
+            'target_id': self.target_id,
+            'weight': self.weight,
+            'relation': self.relation,
+            'created_at': self.created_at.isoformat()
+        }
+
+class EpisodicArchivePartition(db.Model):
+    __tablename__ = 'episodic_archive_partitions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.String(7), nullable=False, unique=True)  # YYYY-MM
+    path = db.Column(db.String(500), nullable=False)  # gzip NDJSON file, relative to the archive directory
+    range_start = db.Column(db.DateTime, nullable=False, index=True)  # inclusive
+    range_end = db.Column(db.DateTime, nullable=False, index=True)  # exclusive
+    row_count = db.Column(db.Integer, default=0)
+    min_id = db.Column(db.Integer)
+    max_id = db.Column(db.Integer)
+    size_bytes = db.Column(db.Integer, default=0)
+    sha256 = db.Column(db.String(64))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'month': self.month,
+            'path': self.path,
+            'range_start': self.range_start.isoformat(),
+            'range_end': self.range_end.isoformat(),
+            'row_count': self.row_count,
+            'min_id': self.min_id,
+            'max_id': self.max_id,
+            'size_bytes': self.size_bytes,
+            'sha256': self.sha256,
+            'created_at': self.created_at.isoformat()
+        }
@@ -0,0 +1,176 @@
+"""
+Latency Instrumentation for Manus II
+Lightweight spans and timers aggregated into in-process histograms and
+rendered in the Prometheus text exposition format
+"""
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Any, Callable, List, Tuple
+
+# Upper bounds in seconds, from sub-millisecond DB work up to Gemini CLI timeouts
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _NoopSpan:
+    """Shared span returned while the collector is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('collector', 'name', 'started')
+
+    def __init__(self, collector: 'MetricsCollector', name: str):
+        self.collector = collector
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.collector.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class MetricsCollector:
+    """
+    Collects per-stage durations. Disabled collectors hand out a shared no-op
+    span, so instrumented code pays one attribute check per span.
+    """
+
+    def __init__(self, enabled: bool = True, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._histograms: Dict[str, Histogram] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._counters: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str):
+        """Context manager that records the duration of a stage"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name)
+
+    def timed(self, name: str):
+        """Decorator that records the duration of every call to a function"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def observe(self, name: str, seconds: float):
+        """Record one duration for a stage"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def register_gauge(self, name: str, help_text: str, callback: Callable[[], float]):
+        """Expose a value computed at scrape time"""
+        self._gauges[name] = (help_text, callback)
+
+    def register_counter(self, name: str, help_text: str, callback: Callable[[], float]):
+        """Expose a monotonically increasing total read at scrape time"""
+        if not name.endswith('_total'):
+            raise ValueError(f'Counter {name} must end in _total')
+        self._counters[name] = (help_text, callback)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Return count, total and mean duration per stage"""
+        with self._lock:
+            return {
+                name: {
+                    'count': histogram.count,
+                    'sum': histogram.sum,
+                    'mean': histogram.sum / histogram.count if histogram.count else 0.0
+                }
+                for name, histogram in sorted(self._histograms.items())
+            }
+
+    def render_prometheus(self) -> str:
+        """Render all histograms, gauges and counters in Prometheus text format"""
+        lines: List[str] = [
+            '# HELP manus_stage_duration_seconds Duration of query pipeline stages in seconds',
+            '# TYPE manus_stage_duration_seconds histogram'
+        ]
+
+        with self._lock:
+            snapshot = [
+                (name, list(histogram.counts), histogram.sum, histogram.count)
+                for name, histogram in sorted(self._histograms.items())
+            ]
+
+        for name, counts, total, count in snapshot:
+            stage = _escape_label(name)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'manus_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'manus_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'manus_stage_duration_seconds_sum{{stage="{stage}"}} {total}')
+            lines.append(f'manus_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+
+        scalars = [(name, 'gauge', metric) for name, metric in self._gauges.items()]
+        scalars += [(name, 'counter', metric) for name, metric in self._counters.items()]
+        for name, metric_type, (help_text, callback) in sorted(scalars):
+            try:
+                value = float(callback())
+            except Exception:
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            lines.append(f'{name} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Global metrics collector instance
+metrics_collector = MetricsCollector(enabled=os.getenv('MANUS_METRICS_ENABLED', '1') != '0')
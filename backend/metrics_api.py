@@ -0,0 +1,37 @@
+from flask import Blueprint, Response
+from .metrics import metrics_collector
+from .memory_cache import session_context_cache
+from .memory_sweeper import memory_sweeper
+from .etags import body_cache
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# Memory subsystem gauges and counters, read at scrape time
+metrics_collector.register_gauge(
+    'manus_context_cache_hit_rate', 'Hit rate of the per-session context cache',
+    lambda: session_context_cache.get_stats()['hit_rate']
+)
+metrics_collector.register_gauge(
+    'manus_context_cache_entries', 'Memories held in the per-session context cache',
+    lambda: session_context_cache.get_stats()['entries']
+)
+metrics_collector.register_counter(
+    'manus_short_term_memory_reclaimed_rows_total', 'Expired short-term memories deleted by the sweeper',
+    lambda: memory_sweeper.rows_reclaimed
+)
+metrics_collector.register_counter(
+    'manus_http_not_modified_responses_total', 'Conditional GETs answered with 304 Not Modified',
+    lambda: body_cache.not_modified
+)
+metrics_collector.register_counter(
+    'manus_http_body_cache_hits_total', 'Listing responses replayed from the ETag body cache',
+    lambda: body_cache.hits
+)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose pipeline latency histograms in Prometheus text format"""
+    return Response(
+        metrics_collector.render_prometheus(),
+        mimetype='text/plain; version=0.0.4; charset=utf-8'
+    )
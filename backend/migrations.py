@@ -0,0 +1,189 @@
+"""
+Online Index Migrations for Manus II
+Creates tables and indexes declared on the models that are missing from an
+existing database, without rebuilding tables, and checks that the hot
+queries actually use them.
+
+Usage:
+    python -m backend.migrations <database-url>          # build missing indexes
+    python -m backend.migrations <database-url> --check  # verify query plans
+"""
+
+import logging
+import sys
+from datetime import datetime
+from typing import Dict, Any, List
+from sqlalchemy import create_engine, inspect, text
+from src.models.memory_system import db as memory_db
+from src.models.knowledge_base import db as knowledge_db, KnowledgeEntry, ErrorLog
+import src.models.knowledge_models  # noqa: F401 - registers the derived knowledge tables
+
+logger = logging.getLogger(__name__)
+
+# Hot queries and the index each one is expected to use
+HOT_QUERIES = {
+    'recent_session_memory': (
+        "SELECT * FROM short_term_memory WHERE session_id = :session_id "
+        "ORDER BY last_accessed DESC LIMIT 10",
+        {'session_id': 'session'},
+        'ix_short_term_memory_session_accessed'
+    ),
+    'expired_memory_sweep': (
+        "SELECT id, session_id FROM short_term_memory WHERE expires_at < :now "
+        "ORDER BY expires_at ASC LIMIT 500",
+        {'now': datetime(2000, 1, 1)},
+        'ix_short_term_memory_expires_at'
+    ),
+    'important_memories_by_type': (
+        "SELECT * FROM long_term_memory WHERE memory_type = :memory_type "
+        "ORDER BY importance_score DESC LIMIT 10",
+        {'memory_type': 'insight'},
+        'ix_long_term_memory_type_importance'
+    ),
+    'pattern_consolidation_batch': (
+        "SELECT * FROM long_term_memory WHERE memory_type = :memory_type AND id > :last_id "
+        "ORDER BY id ASC LIMIT 200",
+        {'memory_type': 'pattern', 'last_id': 0},
+        'ix_long_term_memory_type_id'
+    ),
+    'episodes_in_range': (
+        "SELECT * FROM episodic_memory WHERE event_timestamp >= :start AND event_timestamp < :end "
+        "ORDER BY event_timestamp ASC",
+        {'start': datetime(2000, 1, 1), 'end': datetime(2000, 2, 1)},
+        'ix_episodic_memory_event_timestamp'
+    ),
+    'knowledge_keyset_page': (
+        f"SELECT * FROM {KnowledgeEntry.__tablename__} WHERE updated_at < :updated_at "
+        "OR (updated_at = :updated_at AND id < :id) ORDER BY updated_at DESC, id DESC LIMIT 51",
+        {'updated_at': datetime(2000, 1, 1), 'id': 0},
+        'ix_knowledge_entries_updated_id'
+    ),
+    'error_log_keyset_page': (
+        f"SELECT * FROM {ErrorLog.__tablename__} WHERE created_at < :created_at "
+        "OR (created_at = :created_at AND id < :id) ORDER BY created_at DESC, id DESC LIMIT 51",
+        {'created_at': datetime(2000, 1, 1), 'id': 0},
+        'ix_error_logs_created_id'
+    ),
+    'error_aggregate_keyset_page': (
+        "SELECT * FROM error_aggregates WHERE last_seen < :last_seen "
+        "OR (last_seen = :last_seen AND id < :id) ORDER BY last_seen DESC, id DESC LIMIT 51",
+        {'last_seen': datetime(2000, 1, 1), 'id': 0},
+        'ix_error_aggregates_last_seen_id'
+    ),
+    'knowledge_search_terms': (
+        "SELECT entity_id FROM search_terms WHERE entity_type = :entity_type AND term IN (:first, :second)",
+        {'entity_type': 'knowledge', 'first': 'term', 'second': 'other'},
+        'ix_search_terms_term_entity'
+    ),
+    'similar_error_terms': (
+        "SELECT entity_id FROM search_terms WHERE entity_type = :entity_type AND term IN (:first, :second)",
+        {'entity_type': 'error_log', 'first': 'term', 'second': 'other'},
+        'ix_search_terms_term_entity'
+    ),
+    'knowledge_near_duplicate_candidates': (
+        "SELECT bucket, entry_id FROM knowledge_lsh_buckets WHERE bucket IN (:first_band, :second_band)",
+        {'first_band': '0:0000000000000000', 'second_band': '1:0000000000000000'},
+        'ix_knowledge_lsh_buckets_bucket'
+    ),
+    'error_rollup_series': (
+        "SELECT bucket_start, SUM(occurrences), SUM(resolved), SUM(resolve_seconds) FROM error_rollups "
+        "WHERE granularity = :granularity AND bucket_start >= :start "
+        "GROUP BY bucket_start ORDER BY bucket_start",
+        {'granularity': 'day', 'start': datetime(2000, 1, 1)},
+        'ix_error_rollups_granularity_bucket'
+    )
+}
+
+
+def _metadatas() -> List[Any]:
+    metadatas = [memory_db.Model.metadata]
+    if knowledge_db.Model.metadata is not memory_db.Model.metadata:
+        metadatas.append(knowledge_db.Model.metadata)
+    return metadatas
+
+
+def migrate(engine) -> Dict[str, Any]:
+    """Create missing tables, then build missing indexes on existing tables"""
+    created_tables = []
+    created_indexes = []
+
+    for metadata in _metadatas():
+        existing_tables = set(inspect(engine).get_table_names())
+        missing = [table for table in metadata.sorted_tables if table.name not in existing_tables]
+        if missing:
+            metadata.create_all(engine, tables=missing)
+            created_tables.extend(table.name for table in missing)
+
+        inspector = inspect(engine)
+        for table in metadata.sorted_tables:
+            if table.name in created_tables:
+                continue
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda ix: ix.name):
+                if index.name in existing_indexes:
+                    continue
+                _create_index_online(engine, index)
+                created_indexes.append(index.name)
+
+    return {'created_tables': created_tables, 'created_indexes': created_indexes}
+
+
+def _create_index_online(engine, index):
+    """Build one index without blocking writers where the database supports it"""
+    logger.info(f"Creating index {index.name} on {index.table.name}")
+
+    if engine.dialect.name == 'postgresql':
+        # CONCURRENTLY cannot run inside a transaction block
+        columns = ', '.join(column.name for column in index.columns)
+        unique = 'UNIQUE ' if index.unique else ''
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text(
+                f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {index.name} '
+                f'ON {index.table.name} ({columns})'
+            ))
+    else:
+        # SQLite builds the index in a single short write transaction
+        index.create(bind=engine, checkfirst=True)
+
+
+def check_query_plans(engine) -> Dict[str, Dict[str, Any]]:
+    """EXPLAIN every hot query and report whether it uses its expected index"""
+    results = {}
+    explain = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+
+    with engine.connect() as conn:
+        for name, (sql, params, expected_index) in HOT_QUERIES.items():
+            rows = conn.execute(text(explain + sql), params).fetchall()
+            plan = '\n'.join(' '.join(str(value) for value in row) for row in rows)
+            results[name] = {
+                'expected_index': expected_index,
+                'uses_index': expected_index in plan,
+                'plan': plan
+            }
+
+    return results
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        print(__doc__)
+        return 2
+
+    logging.basicConfig(level=logging.INFO)
+    engine = create_engine(argv[0])
+
+    if '--check' in argv[1:]:
+        results = check_query_plans(engine)
+        for name, result in results.items():
+            status = 'ok' if result['uses_index'] else 'MISSING'
+            print(f"{status:8} {name} -> {result['expected_index']}")
+        return 0 if all(result['uses_index'] for result in results.values()) else 1
+
+    result = migrate(engine)
+    print(f"Created tables: {', '.join(result['created_tables']) or 'none'}")
+    print(f"Created indexes: {', '.join(result['created_indexes']) or 'none'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
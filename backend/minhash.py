@@ -0,0 +1,72 @@
+"""
+MinHash signatures and LSH banding for near-duplicate text detection
+"""
+
+import hashlib
+import random
+import re
+import zlib
+from typing import List, Set
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+class MinHasher:
+    """
+    Computes MinHash signatures over word shingles and splits them into LSH bands.
+    Two texts whose estimated Jaccard similarity is high share at least one band
+    key with high probability, so candidates can be found with indexed lookups.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 3, seed: int = 1):
+        if num_perm % bands != 0:
+            raise ValueError('num_perm must be divisible by bands')
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def shingles(self, text: str) -> Set[str]:
+        """Split text into overlapping word shingles"""
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        if len(tokens) <= self.shingle_size:
+            return {' '.join(tokens)}
+        return {
+            ' '.join(tokens[i:i + self.shingle_size])
+            for i in range(len(tokens) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str) -> List[int]:
+        """Compute the MinHash signature of a text"""
+        hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in self.shingles(text)]
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._permutations
+        ]
+
+    def band_keys(self, signature: List[int]) -> List[str]:
+        """Return one bucket key per LSH band, prefixed with the band number"""
+        keys = []
+        for band in range(self.bands):
+            start = band * self.rows_per_band
+            chunk = ','.join(str(value) for value in signature[start:start + self.rows_per_band])
+            digest = hashlib.blake2b(chunk.encode('ascii'), digest_size=8).hexdigest()
+            keys.append(f"{band}:{digest}")
+        return keys
+
+    @staticmethod
+    def similarity(signature_a: List[int], signature_b: List[int]) -> float:
+        """Estimate the Jaccard similarity of two signatures"""
+        if not signature_a or len(signature_a) != len(signature_b):
+            return 0.0
+        matches = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+        return matches / len(signature_a)
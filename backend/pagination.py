@@ -0,0 +1,168 @@
+"""
+Keyset Pagination for Manus II
+Pages listings by seeking past the (sort value, id) of the last row returned,
+so every page costs one index range scan regardless of depth, and serves
+totals from a short-lived count cache unless an exact count is requested
+"""
+
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Tuple, Optional
+from sqlalchemy import and_, or_, text
+
+CURSOR_VERSION = 1
+
+# count= query parameter values
+COUNT_EXACT = 'exact'
+COUNT_CACHED = 'cached'
+COUNT_NONE = 'none'
+COUNT_MODES = (COUNT_EXACT, COUNT_CACHED, COUNT_NONE)
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursor tokens that were not produced by encode_cursor"""
+
+
+def encode_cursor(sort_value: Optional[datetime], row_id: int) -> str:
+    """Opaque, URL-safe token for the position after (sort_value, row_id); sort_value may be NULL"""
+    payload = json.dumps([CURSOR_VERSION, sort_value.isoformat() if sort_value is not None else None, row_id],
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[Optional[datetime], int]:
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        version, sort_value, row_id = json.loads(payload)
+        if version != CURSOR_VERSION or not isinstance(row_id, int):
+            raise ValueError(version)
+        return (datetime.fromisoformat(sort_value) if sort_value is not None else None), row_id
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token}") from e
+
+
+def keyset_page(query, sort_column, id_column, cursor: Optional[str], limit: int,
+                sort_index: int, id_index: int) -> Tuple[List[Any], Optional[str]]:
+    """
+    Newest-first page of a column-tuple query. sort_index and id_index locate
+    the sort and id columns in each row; the returned cursor is None on the
+    last page.
+
+    Rows with a NULL sort value come last on SQLite and MySQL and first on
+    PostgreSQL, as each sorts them natively, so the index order is kept; a
+    page that runs out of one group continues into the other.
+    """
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+
+    nulls_first = query.session.get_bind().dialect.name == 'postgresql'
+    ordered = (sort_column.desc(), id_column.desc())
+    following = None
+
+    if not cursor:
+        current = query.order_by(*ordered)
+    else:
+        sort_value, row_id = decode_cursor(cursor)
+        if sort_value is None:
+            current = query.filter(sort_column.is_(None), id_column < row_id).order_by(id_column.desc())
+            if nulls_first:
+                following = query.filter(sort_column.isnot(None)).order_by(*ordered)
+        else:
+            current = query.filter(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < row_id)
+            )).order_by(*ordered)
+            if not nulls_first:
+                following = query.filter(sort_column.is_(None)).order_by(id_column.desc())
+
+    rows = current.limit(limit + 1).all()
+    if following is not None and len(rows) <= limit:
+        rows += following.limit(limit + 1 - len(rows)).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[sort_index], last[id_index])
+
+
+class CountCache:
+    """
+    Totals per (table, filters) kept for `ttl` seconds. Writers invalidate a
+    table's totals; unfiltered totals on PostgreSQL fall back to the planner's
+    row estimate instead of a full count.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._counts: Dict[Tuple[str, Tuple], Tuple[int, float]] = {}
+
+        # Instrumentation
+        self.hits = 0
+        self.exact_counts = 0
+        self.estimates = 0
+
+    def count(self, table_name: str, filters: Dict[str, Any], query, mode: str = COUNT_CACHED) -> Dict[str, Any]:
+        """Return {'total': n, 'total_source': exact|cached|estimate} (or nothing for count=none)"""
+        if mode == COUNT_NONE:
+            return {}
+
+        key = (table_name, tuple(sorted((name, value) for name, value in filters.items() if value is not None)))
+        now = time.monotonic()
+
+        if mode != COUNT_EXACT:
+            with self._lock:
+                cached = self._counts.get(key)
+            if cached is not None and cached[1] > now:
+                self.hits += 1
+                return {'total': cached[0], 'total_source': 'cached'}
+
+            if not key[1]:
+                estimate = self._estimate(query, table_name)
+                if estimate is not None:
+                    self.estimates += 1
+                    return {'total': estimate, 'total_source': 'estimate'}
+
+        total = query.order_by(None).count()
+        self.exact_counts += 1
+        with self._lock:
+            if len(self._counts) >= self.max_entries:
+                self._counts.clear()
+            self._counts[key] = (total, now + self.ttl)
+        return {'total': total, 'total_source': 'exact'}
+
+    def _estimate(self, query, table_name: str) -> Optional[int]:
+        session = query.session
+        if session.get_bind().dialect.name != 'postgresql':
+            return None
+        estimate = session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+            {'table_name': table_name}
+        ).scalar()
+        # reltuples is -1 (or 0) until the table has been vacuumed or analyzed
+        return int(estimate) if estimate is not None and estimate > 0 else None
+
+    def invalidate(self, table_name: str):
+        """Drop every cached total of one table"""
+        with self._lock:
+            for key in [key for key in self._counts if key[0] == table_name]:
+                del self._counts[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._counts)
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'exact_counts': self.exact_counts,
+            'estimates': self.estimates
+        }
+
+
+# Global count cache instance
+count_cache = CountCache()
@@ -0,0 +1,192 @@
+"""
+Search Index for Manus II
+Bilingual (Arabic / English) text normalization and tokenization, applied
+identically at index and query time, and an inverted (entity_type, term,
+entity_id) index maintained on every write, so knowledge search is one
+indexed lookup that ignores diacritics, tatweel, alef / hamza variants and
+attached article prefixes instead of a LIKE scan per spelling
+"""
+
+import re
+import unicodedata
+from typing import Dict, Any, List, Iterable, Optional, Set
+from sqlalchemy import func
+from src.models.knowledge_base import db, KnowledgeEntry, ErrorLog
+from src.models.knowledge_models import SearchTerm, ErrorAggregate
+from .tag_index import KNOWLEDGE
+
+ERROR_LOG = 'error_log'
+ERROR_AGGREGATE = 'error_aggregate'
+
+# Entity type -> (model, text columns) for backfills
+SEARCHABLE_MODELS = {
+    KNOWLEDGE: (KnowledgeEntry, (KnowledgeEntry.title, KnowledgeEntry.content)),
+    ERROR_LOG: (ErrorLog, (ErrorLog.description, ErrorLog.context, ErrorLog.corrective_action)),
+    ERROR_AGGREGATE: (ErrorAggregate, (ErrorAggregate.sample_description, ErrorAggregate.sample_contexts))
+}
+
+MAX_TERM_LENGTH = 64
+
+# Combining marks: Latin accents, Arabic harakat, Quranic annotation signs and
+# the hamza / madda marks that NFKD splits off alef, waw and yeh
+_MARKS = re.compile('[\u0300-\u036f\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06dc\u06df-\u06e4\u06e7\u06e8\u06ea-\u06ed]')
+
+_FOLD = str.maketrans({
+    '\u0640': None,  # tatweel
+    '\u0671': '\u0627',  # alef wasla -> alef
+    '\u0649': '\u064a',  # alef maksura -> yeh
+    '\u0629': '\u0647',  # teh marbuta -> heh
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic-Indic digits
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)}  # Extended Arabic-Indic digits
+})
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+_ARABIC_LETTER = re.compile('[\u0621-\u064a]')
+
+# Definite article with attached conjunctions / prepositions, longest first
+ARABIC_PREFIXES = ('وبال', 'وكال', 'وفال', 'فبال', 'فكال', 'ولل', 'فلل', 'وال', 'فال', 'بال', 'كال', 'لل', 'ال')
+# Shorter remainders are mostly lexicalised words, not article + stem ('الله' would become 'له', "for him")
+MIN_STEM_LENGTH = 3
+
+# Skipped by ranked (any-term) retrieval only; all-terms filters keep them
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'i', 'in', 'is', 'it', 'me',
+    'my', 'of', 'on', 'or', 'the', 'this', 'to', 'was', 'what', 'with', 'you',
+    'في', 'من', 'علي', 'الي', 'عن', 'مع', 'هذا', 'هذه', 'ذلك', 'التي', 'الذي', 'ما', 'لا', 'هو', 'هي', 'ان',
+    'او', 'و', 'كان', 'قد', 'ثم'
+})
+
+
+def normalize_text(text: str) -> str:
+    """Fold diacritics, tatweel, alef / hamza / yeh / teh marbuta variants, digits and case"""
+    return _MARKS.sub('', unicodedata.normalize('NFKD', text)).translate(_FOLD).casefold()
+
+
+def stem(token: str) -> str:
+    """Strip one attached article prefix from an Arabic token"""
+    if _ARABIC_LETTER.match(token):
+        for prefix in ARABIC_PREFIXES:
+            if token.startswith(prefix) and len(token) - len(prefix) >= MIN_STEM_LENGTH:
+                return token[len(prefix):]
+    return token
+
+
+def tokenize(text: Optional[str], drop_stopwords: bool = False) -> List[str]:
+    """Unique search terms of a text, in order of first appearance"""
+    if not text:
+        return []
+
+    terms = []
+    seen = set()
+    for token in _TOKEN_PATTERN.findall(normalize_text(text)):
+        if drop_stopwords and token in STOPWORDS:
+            continue
+        term = stem(token)[:MAX_TERM_LENGTH]
+        if term not in seen:
+            seen.add(term)
+            terms.append(term)
+    return terms
+
+
+class SearchIndex:
+    """Maintains search_terms; callers own the transaction"""
+
+    def terms(self, *texts: Optional[str]) -> Set[str]:
+        return {term for text in texts for term in tokenize(text)}
+
+    def set_text(self, entity_type: str, entity_id: int, *texts: Optional[str]):
+        """Replace the indexed terms of one entity"""
+        self.set_text_bulk(entity_type, {entity_id: texts})
+
+    def set_text_bulk(self, entity_type: str, texts_by_id: Dict[int, Iterable[Optional[str]]]):
+        """Replace the indexed terms of many entities with one delete and one multi-row insert"""
+        if not texts_by_id:
+            return
+
+        self.remove(entity_type, list(texts_by_id))
+        rows = [
+            {'entity_type': entity_type, 'entity_id': entity_id, 'term': term}
+            for entity_id, texts in texts_by_id.items()
+            for term in self.terms(*texts)
+        ]
+        if rows:
+            db.session.execute(SearchTerm.__table__.insert(), rows)
+
+    def remove(self, entity_type: str, entity_ids: Iterable[int]):
+        entity_ids = list(entity_ids)
+        if not entity_ids:
+            return
+        SearchTerm.query.filter(
+            SearchTerm.entity_type == entity_type,
+            SearchTerm.entity_id.in_(entity_ids)
+        ).delete(synchronize_session=False)
+
+    def ids_matching_all(self, entity_type: str, query: str):
+        """
+        Subquery of entity ids containing every term of the query, answered from
+        the (entity_type, term) index; None when the query has no terms.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return None
+        return db.session.query(SearchTerm.entity_id).filter(
+            SearchTerm.entity_type == entity_type,
+            SearchTerm.term.in_(terms)
+        ).group_by(SearchTerm.entity_id).having(
+            func.count(SearchTerm.term) == len(terms)
+        ).subquery()
+
+    def filter(self, query, entity_type: str, search: str):
+        """Restrict an entity query to rows containing every term of `search`"""
+        matching = self.ids_matching_all(entity_type, search)
+        model, columns = SEARCHABLE_MODELS[entity_type]
+        if matching is not None:
+            return query.filter(model.id.in_(db.session.query(matching.c.entity_id)))
+
+        # No word characters to look up (e.g. punctuation only): substring match as before
+        return query.filter(db.or_(*[column.contains(search) for column in columns]))
+
+    def ranked(self, entity_type: str, query: str, max_terms: int = 16, min_matched: int = 2):
+        """
+        Subquery of (entity_id, matched) for entities containing at least
+        `min_matched` non-stopword terms of the query (all of them for shorter
+        queries), for free-text retrieval; None when no term is left.
+        """
+        terms = tokenize(query, drop_stopwords=True)[:max_terms]
+        if not terms:
+            return None
+        matched = func.count(SearchTerm.term)
+        return db.session.query(
+            SearchTerm.entity_id,
+            matched.label('matched')
+        ).filter(
+            SearchTerm.entity_type == entity_type,
+            SearchTerm.term.in_(terms)
+        ).group_by(SearchTerm.entity_id).having(
+            matched >= min(min_matched, len(terms))
+        ).subquery()
+
+    def backfill(self, entity_type: str, batch_size: int = 500, after_id: int = 0) -> Dict[str, Any]:
+        """Index the text of existing rows, one committed batch at a time"""
+        model, columns = SEARCHABLE_MODELS[entity_type]
+        processed = 0
+        last_id = after_id
+
+        while True:
+            rows = db.session.query(model.id, *columns).filter(
+                model.id > last_id
+            ).order_by(model.id.asc()).limit(batch_size).all()
+            if not rows:
+                break
+
+            self.set_text_bulk(entity_type, {row[0]: row[1:] for row in rows})
+            db.session.commit()
+
+            processed += len(rows)
+            last_id = rows[-1][0]
+
+        return {'success': True, 'entity_type': entity_type, 'processed': processed, 'last_id': last_id}
+
+
+# Global search index instance
+search_index = SearchIndex()
@@ -0,0 +1,346 @@
+"""
+Bulk Serialization for Manus II
+Serializes listing pages straight from column tuples instead of ORM instances.
+JSON text columns are spliced into the response as stored and only decoded
+into Python objects when a Python caller actually reads them. Stored values
+are trusted: the writers always encode them, and repair_json_columns()
+replaces malformed legacy values once instead of on every read.
+"""
+
+import json
+import logging
+from collections.abc import Mapping
+from typing import Dict, Any, List, Tuple, Iterable, Optional
+from sqlalchemy import bindparam, func
+from sqlalchemy.orm import outerjoin
+from src.models.knowledge_base import db, KnowledgeEntry, ErrorLog, ConceptualFramework
+from src.models.knowledge_models import ErrorAggregate, KnowledgeSnippet
+from src.models.memory_system import ShortTermMemory, LongTermMemory, EpisodicMemory, ProceduralMemory
+
+try:
+    import orjson  # optional, much faster encoder
+except ImportError:
+    orjson = None
+
+_FRAGMENT = getattr(orjson, 'Fragment', None)
+_loads = orjson.loads if orjson is not None else json.loads
+
+logger = logging.getLogger(__name__)
+
+# Field kinds
+RAW = 'raw'
+JSON_LIST = 'json_list'
+JSON_OBJECT = 'json_object'
+DATETIME = 'datetime'
+
+_JSON_DEFAULTS = {JSON_LIST: '[]', JSON_OBJECT: '{}'}
+
+
+def json_text(value: Optional[str], kind: str) -> str:
+    """Stored JSON text, or the field's empty default for NULL / empty columns; never parsed"""
+    return value or _JSON_DEFAULTS[kind]
+
+
+def _is_valid_json(value: str) -> bool:
+    try:
+        _loads(value)
+    except ValueError:
+        return False
+    return True
+
+
+def fast_dumps(value: Any) -> bytes:
+    """Encode a value as compact JSON bytes with the fastest available encoder"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class LazyRecord(Mapping):
+    """
+    Read-only mapping over one row tuple. Datetimes are formatted and JSON
+    columns decoded on first access only.
+    """
+
+    __slots__ = ('_serializer', '_row', '_decoded')
+
+    def __init__(self, serializer: 'BulkSerializer', row: Tuple):
+        self._serializer = serializer
+        self._row = row
+        self._decoded = None
+
+    def __getitem__(self, key: str) -> Any:
+        index, kind = self._serializer.positions[key]
+        value = self._row[index]
+
+        if kind == RAW:
+            return value
+        if kind == DATETIME:
+            return value.isoformat() if value is not None else None
+
+        if self._decoded is None:
+            self._decoded = {}
+        if key not in self._decoded:
+            try:
+                self._decoded[key] = _loads(json_text(value, kind))
+            except ValueError:
+                # A legacy row repair_json_columns() has not reached yet
+                self._decoded[key] = _loads(_JSON_DEFAULTS[kind])
+        return self._decoded[key]
+
+    def __iter__(self):
+        return iter(self._serializer.keys)
+
+    def __len__(self) -> int:
+        return len(self._serializer.keys)
+
+    def raw(self, key: str) -> Any:
+        """Return the undecoded column value"""
+        return self._row[self._serializer.positions[key][0]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self._serializer.keys}
+
+
+class BulkSerializer:
+    """Serializes rows selected with `columns` into the shape of a model's to_dict()"""
+
+    def __init__(self, fields: List[Tuple[str, Any, str]], select_from: Optional[Any] = None):
+        self.fields = fields
+        self.select_from = select_from  # explicit FROM (e.g. a join) for fields spanning tables
+        self.keys = [key for key, _, _ in fields]
+        self.columns = [column for _, column, _ in fields]
+        self.positions = {key: (index, kind) for index, (key, _, kind) in enumerate(fields)}
+
+        self._scalar_fields = [(index, key, kind) for index, (key, _, kind) in enumerate(fields)
+                               if kind not in _JSON_DEFAULTS]
+        self._json_fields = [(index, json.dumps(key), kind)
+                             for index, (key, _, kind) in enumerate(fields) if kind in _JSON_DEFAULTS]
+
+    def query(self):
+        """Start a column-tuple query for this serializer"""
+        query = db.session.query(*self.columns)
+        if self.select_from is not None:
+            query = query.select_from(self.select_from)
+        return query
+
+    def records(self, rows: Iterable[Tuple]) -> List[LazyRecord]:
+        """Wrap rows for Python callers; nothing is decoded up front"""
+        return [LazyRecord(self, row) for row in rows]
+
+    def dicts(self, rows: Iterable[Tuple]) -> List[Dict[str, Any]]:
+        """Plain dicts for rows handed on to JSON encoders, caches or other callers"""
+        return [LazyRecord(self, row).to_dict() for row in rows]
+
+    def encode_rows(self, rows: Iterable[Tuple]) -> bytes:
+        """Encode rows as a JSON array without decoding their JSON columns"""
+        if _FRAGMENT is not None:
+            return orjson.dumps([self._fragment_row(row) for row in rows])
+        return b'[' + b','.join(self.encode_row(row) for row in rows) + b']'
+
+    def encode_row(self, row: Tuple) -> bytes:
+        """Encode one row as a JSON object"""
+        if _FRAGMENT is not None:
+            return orjson.dumps(self._fragment_row(row))
+
+        scalars = {}
+        for index, key, kind in self._scalar_fields:
+            value = row[index]
+            if kind == DATETIME and value is not None:
+                value = value.isoformat()
+            scalars[key] = value
+
+        encoded = json.dumps(scalars, separators=(',', ':'), ensure_ascii=False)
+        parts = [encoded[:-1]]
+        separator = ',' if scalars else ''
+        for index, key_json, kind in self._json_fields:
+            parts.append(f'{separator}{key_json}:{json_text(row[index], kind)}')
+            separator = ','
+        parts.append('}')
+        return ''.join(parts).encode('utf-8')
+
+    def _fragment_row(self, row: Tuple) -> Dict[str, Any]:
+        item = {}
+        for index, key, kind in self._scalar_fields:
+            value = row[index]
+            item[key] = value.isoformat() if kind == DATETIME and value is not None else value
+        for index, key_json, kind in self._json_fields:
+            item[self.keys[index]] = _FRAGMENT(json_text(row[index], kind))
+        return item
+
+    def repair_json(self, batch_size: int = 500) -> int:
+        """Replace malformed stored JSON in this serializer's table with the empty defaults, one committed batch at a time"""
+        id_column = self.columns[self.positions['id'][0]]
+        table = id_column.table
+        json_columns = [(self.columns[index], kind) for index, _, kind in self._json_fields]
+        if not json_columns:
+            return 0
+
+        repaired = 0
+        last_id = 0
+        while True:
+            rows = db.session.query(id_column, *[column for column, _ in json_columns]).filter(
+                id_column > last_id
+            ).order_by(id_column.asc()).limit(batch_size).all()
+            if not rows:
+                break
+
+            for position, (column, kind) in enumerate(json_columns, start=1):
+                updates = [
+                    {'row_id': row[0], 'repaired': _JSON_DEFAULTS[kind]}
+                    for row in rows if row[position] and not _is_valid_json(row[position])
+                ]
+                if updates:
+                    for update in updates:
+                        logger.warning(f"Replacing malformed {table.name}.{column.name} of row {update['row_id']} "
+                                       f"with {_JSON_DEFAULTS[kind]}")
+                    db.session.execute(
+                        table.update().where(table.c.id == bindparam('row_id')).values(
+                            {column.name: bindparam('repaired')}
+                        ),
+                        updates
+                    )
+                    repaired += len(updates)
+            db.session.commit()
+            last_id = rows[-1][0]
+
+        return repaired
+
+    def encode_page(self, key: str, rows: Iterable[Tuple], **extra: Any) -> bytes:
+        """Encode {key: [rows...], **extra} as one JSON document"""
+        body = b'{' + fast_dumps(key) + b':' + self.encode_rows(rows)
+        for name, value in extra.items():
+            body += b',' + fast_dumps(name) + b':' + fast_dumps(value)
+        return body + b'}'
+
+
+# Field specs mirror each model's to_dict()
+knowledge_serializer = BulkSerializer([
+    ('id', KnowledgeEntry.id, RAW),
+    ('category', KnowledgeEntry.category, RAW),
+    ('title', KnowledgeEntry.title, RAW),
+    ('content', KnowledgeEntry.content, RAW),
+    ('metadata', KnowledgeEntry.meta_data, JSON_OBJECT),
+    ('tags', KnowledgeEntry.tags, JSON_LIST),
+    ('confidence_score', KnowledgeEntry.confidence_score, RAW),
+    ('source', KnowledgeEntry.source, RAW),
+    ('created_at', KnowledgeEntry.created_at, DATETIME),
+    ('updated_at', KnowledgeEntry.updated_at, DATETIME)
+])
+
+# Prompt context projection: title plus the stored snippet, never the full content
+# (entries without a snippet yet fall back to a prefix cut in the database)
+knowledge_context_serializer = BulkSerializer([
+    ('id', KnowledgeEntry.id, RAW),
+    ('title', KnowledgeEntry.title, RAW),
+    ('snippet', func.coalesce(KnowledgeSnippet.snippet, func.substr(KnowledgeEntry.content, 1, 200)), RAW),
+    ('confidence_score', KnowledgeEntry.confidence_score, RAW)
+], select_from=outerjoin(KnowledgeEntry, KnowledgeSnippet, KnowledgeSnippet.entry_id == KnowledgeEntry.id))
+
+error_log_serializer = BulkSerializer([
+    ('id', ErrorLog.id, RAW),
+    ('error_type', ErrorLog.error_type, RAW),
+    ('description', ErrorLog.description, RAW),
+    ('context', ErrorLog.context, JSON_OBJECT),
+    ('root_cause', ErrorLog.root_cause, RAW),
+    ('impact', ErrorLog.impact, RAW),
+    ('corrective_action', ErrorLog.corrective_action, RAW),
+    ('status', ErrorLog.status, RAW),
+    ('source_ai', ErrorLog.source_ai, RAW),
+    ('created_at', ErrorLog.created_at, DATETIME),
+    ('resolved_at', ErrorLog.resolved_at, DATETIME)
+])
+
+error_aggregate_serializer = BulkSerializer([
+    ('id', ErrorAggregate.id, RAW),
+    ('fingerprint', ErrorAggregate.fingerprint, RAW),
+    ('error_type', ErrorAggregate.error_type, RAW),
+    ('normalized_description', ErrorAggregate.normalized_description, RAW),
+    ('description', ErrorAggregate.sample_description, RAW),
+    ('impact', ErrorAggregate.impact, RAW),
+    ('source_ai', ErrorAggregate.source_ai, RAW),
+    ('status', ErrorAggregate.status, RAW),
+    ('occurrence_count', ErrorAggregate.occurrence_count, RAW),
+    ('sample_contexts', ErrorAggregate.sample_contexts, JSON_LIST),
+    ('first_seen', ErrorAggregate.first_seen, DATETIME),
+    ('last_seen', ErrorAggregate.last_seen, DATETIME),
+    ('resolved_at', ErrorAggregate.resolved_at, DATETIME)
+])
+
+framework_serializer = BulkSerializer([
+    ('id', ConceptualFramework.id, RAW),
+    ('name', ConceptualFramework.name, RAW),
+    ('description', ConceptualFramework.description, RAW),
+    ('principles', ConceptualFramework.principles, JSON_LIST),
+    ('applications', ConceptualFramework.applications, JSON_LIST),
+    ('relationships', ConceptualFramework.relationships, JSON_OBJECT),
+    ('version', ConceptualFramework.version, RAW),
+    ('created_at', ConceptualFramework.created_at, DATETIME),
+    ('updated_at', ConceptualFramework.updated_at, DATETIME)
+])
+
+short_term_memory_serializer = BulkSerializer([
+    ('id', ShortTermMemory.id, RAW),
+    ('session_id', ShortTermMemory.session_id, RAW),
+    ('context_type', ShortTermMemory.context_type, RAW),
+    ('content', ShortTermMemory.content, RAW),
+    ('metadata', ShortTermMemory.meta_data, JSON_OBJECT),
+    ('priority', ShortTermMemory.priority, RAW),
+    ('access_count', ShortTermMemory.access_count, RAW),
+    ('last_accessed', ShortTermMemory.last_accessed, DATETIME),
+    ('created_at', ShortTermMemory.created_at, DATETIME),
+    ('expires_at', ShortTermMemory.expires_at, DATETIME)
+])
+
+long_term_memory_serializer = BulkSerializer([
+    ('id', LongTermMemory.id, RAW),
+    ('memory_type', LongTermMemory.memory_type, RAW),
+    ('title', LongTermMemory.title, RAW),
+    ('content', LongTermMemory.content, RAW),
+    ('context', LongTermMemory.context, JSON_OBJECT),
+    ('emotional_context', LongTermMemory.emotional_context, JSON_OBJECT),
+    ('importance_score', LongTermMemory.importance_score, RAW),
+    ('consolidation_score', LongTermMemory.consolidation_score, RAW),
+    ('related_memories', LongTermMemory.related_memories, JSON_LIST),
+    ('tags', LongTermMemory.tags, JSON_LIST),
+    ('created_at', LongTermMemory.created_at, DATETIME),
+    ('last_reinforced', LongTermMemory.last_reinforced, DATETIME)
+])
+
+episodic_memory_serializer = BulkSerializer([
+    ('id', EpisodicMemory.id, RAW),
+    ('event_title', EpisodicMemory.event_title, RAW),
+    ('event_description', EpisodicMemory.event_description, RAW),
+    ('participants', EpisodicMemory.participants, JSON_LIST),
+    ('location', EpisodicMemory.location, RAW),
+    ('outcome', EpisodicMemory.outcome, RAW),
+    ('emotional_impact', EpisodicMemory.emotional_impact, RAW),
+    ('lessons_learned', EpisodicMemory.lessons_learned, RAW),
+    ('related_knowledge', EpisodicMemory.related_knowledge, JSON_LIST),
+    ('event_timestamp', EpisodicMemory.event_timestamp, DATETIME),
+    ('created_at', EpisodicMemory.created_at, DATETIME)
+])
+
+procedural_memory_serializer = BulkSerializer([
+    ('id', ProceduralMemory.id, RAW),
+    ('skill_name', ProceduralMemory.skill_name, RAW),
+    ('description', ProceduralMemory.description, RAW),
+    ('steps', ProceduralMemory.steps, JSON_LIST),
+    ('conditions', ProceduralMemory.conditions, JSON_OBJECT),
+    ('success_rate', ProceduralMemory.success_rate, RAW),
+    ('usage_count', ProceduralMemory.usage_count, RAW),
+    ('last_used', ProceduralMemory.last_used, DATETIME),
+    ('optimization_notes', ProceduralMemory.optimization_notes, RAW),
+    ('created_at', ProceduralMemory.created_at, DATETIME),
+    ('updated_at', ProceduralMemory.updated_at, DATETIME)
+])
+
+
+def repair_json_columns(batch_size: int = 500) -> Dict[str, int]:
+    """Repair malformed JSON in every serialized table (run once after upgrading; reads no longer validate)"""
+    return {
+        serializer.columns[0].table.name: serializer.repair_json(batch_size)
+        for serializer in (knowledge_serializer, error_log_serializer, error_aggregate_serializer,
+                           framework_serializer, short_term_memory_serializer, long_term_memory_serializer,
+                           episodic_memory_serializer, procedural_memory_serializer)
+    }
@@ -0,0 +1,224 @@
+"""
+Similar Errors for Manus II
+Finds resolved errors resembling a query or a newly logged error through the
+search-term index over error descriptions, contexts and corrective actions,
+so prompt building can cite the fixes of prior mistakes. Logged errors carry
+their own corrective action; the engine's aggregated errors take theirs from
+the resolution recorded for their fingerprint. Lookups are cached per error
+fingerprint and kept within a latency budget.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from src.models.knowledge_base import db, ErrorLog
+from src.models.knowledge_models import ErrorAggregate, ErrorResolution
+from .error_aggregator import error_fingerprint
+from .search_index import search_index, ERROR_LOG, ERROR_AGGREGATE
+from .snippets import make_snippet
+
+
+class SimilarErrorFinder:
+    """
+    Ranks resolved errors with a corrective action, logged or aggregated, by
+    term overlap with the lookup text, newest resolution first, one per
+    fingerprint. A lookup that takes longer than `latency_budget_ms` pauses
+    uncached lookups for `cooldown_seconds`, so a slow database degrades
+    retrieval instead of every query. Cached results expire after
+    `ttl_seconds` and are dropped when an error is resolved in this process.
+    """
+
+    def __init__(self, limit: int = 3, max_terms: int = 8, min_matched: int = 2, token_budget: int = 40,
+                 max_entries: int = 1024, ttl_seconds: float = 600.0, latency_budget_ms: float = 25.0,
+                 cooldown_seconds: float = 30.0):
+        self.logger = logging.getLogger(__name__)
+        self.limit = limit
+        self.max_terms = max_terms
+        self.min_matched = min_matched
+        self.token_budget = token_budget
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.latency_budget_ms = latency_budget_ms
+        self.cooldown_seconds = cooldown_seconds
+
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # fingerprint -> (generation, expires, results)
+        self._generation = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+        # Instrumentation
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.over_budget = 0
+
+    def index(self, error: ErrorLog):
+        """Index the text of one error; the caller commits"""
+        search_index.set_text(ERROR_LOG, error.id, error.description, error.context, error.corrective_action)
+
+    def record_resolution(self, fingerprint: str, corrective_action: Optional[str],
+                          resolved_at: Optional[datetime] = None):
+        """Remember how an error fingerprint was fixed (for aggregates, which hold no fix); the caller commits"""
+        if not corrective_action:
+            return
+        resolution = ErrorResolution.query.filter_by(fingerprint=fingerprint).first()
+        if resolution is None:
+            resolution = ErrorResolution(fingerprint=fingerprint)
+            db.session.add(resolution)
+        resolution.corrective_action = corrective_action
+        resolution.resolved_at = resolved_at or datetime.utcnow()
+
+    def invalidate(self):
+        """Drop cached lookups (an error was resolved or its corrective action changed)"""
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+
+    def lookup(self, description: str, error_type: str = 'query',
+               exclude: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Similar resolved errors for a text, from the cache when its fingerprint
+        was seen recently; `exclude` ({'source', 'id'}) drops the error being
+        looked up without shortening the list
+        """
+        fingerprint = error_fingerprint(error_type, description)
+        now = time.monotonic()
+
+        with self._lock:
+            cached = self._cache.get(fingerprint)
+            if cached is not None and cached[0] == self._generation and cached[1] > now:
+                self._cache.move_to_end(fingerprint)
+                self.hits += 1
+                return self._select(cached[2], exclude)
+            if now < self._paused_until:
+                self.skipped += 1
+                return []
+            self.misses += 1
+            generation = self._generation
+
+        started = time.perf_counter()
+        try:
+            results = self.find(description)
+        except Exception as e:
+            db.session.rollback()
+            self.logger.error(f"Similar error lookup failed: {str(e)}")
+            return []
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            if elapsed_ms > self.latency_budget_ms:
+                self.over_budget += 1
+                self._paused_until = time.monotonic() + self.cooldown_seconds
+                self.logger.warning(f"Similar error lookup took {elapsed_ms:.1f} ms (budget "
+                                    f"{self.latency_budget_ms:.0f} ms); pausing lookups for {self.cooldown_seconds:.0f} s")
+            # A resolution committed meanwhile may be missing from what we just read
+            if generation == self._generation:
+                self._cache[fingerprint] = (generation, now + self.ttl_seconds, results)
+                self._cache.move_to_end(fingerprint)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return self._select(results, exclude)
+
+    def _select(self, results: List[Dict[str, Any]], exclude: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if exclude is not None:
+            results = [result for result in results
+                       if (result['source'], result['id']) != (exclude['source'], exclude['id'])]
+        return results[:self.limit]
+
+    def find(self, description: str) -> List[Dict[str, Any]]:
+        """Query the index directly, bypassing the cache; one spare result for lookup's exclude"""
+        wanted = self.limit + 1
+        candidates = []
+
+        ranked = search_index.ranked(ERROR_LOG, description, max_terms=self.max_terms, min_matched=self.min_matched)
+        if ranked is not None:
+            candidates.extend(
+                (matched, resolved_at, ERROR_LOG, error_id, error_type, error_description, corrective_action)
+                for error_id, error_type, error_description, corrective_action, resolved_at, matched
+                in db.session.query(
+                    ErrorLog.id, ErrorLog.error_type, ErrorLog.description, ErrorLog.corrective_action,
+                    ErrorLog.resolved_at, ranked.c.matched
+                ).join(
+                    ranked, ErrorLog.id == ranked.c.entity_id
+                ).filter(
+                    ErrorLog.status == 'resolved',
+                    ErrorLog.corrective_action.isnot(None),
+                    ErrorLog.corrective_action != ''
+                ).order_by(
+                    ranked.c.matched.desc(), ErrorLog.resolved_at.desc(), ErrorLog.id.desc()
+                ).limit(wanted * 3)
+            )
+
+        ranked = search_index.ranked(ERROR_AGGREGATE, description, max_terms=self.max_terms,
+                                     min_matched=self.min_matched)
+        if ranked is not None:
+            candidates.extend(
+                (matched, resolved_at, ERROR_AGGREGATE, aggregate_id, error_type, error_description, corrective_action)
+                for aggregate_id, error_type, error_description, corrective_action, resolved_at, matched
+                in db.session.query(
+                    ErrorAggregate.id, ErrorAggregate.error_type, ErrorAggregate.sample_description,
+                    ErrorResolution.corrective_action, ErrorAggregate.resolved_at, ranked.c.matched
+                ).join(
+                    ranked, ErrorAggregate.id == ranked.c.entity_id
+                ).join(
+                    ErrorResolution, ErrorResolution.fingerprint == ErrorAggregate.fingerprint
+                ).filter(
+                    ErrorAggregate.status == 'resolved'
+                ).order_by(
+                    ranked.c.matched.desc(), ErrorAggregate.resolved_at.desc(), ErrorAggregate.id.desc()
+                ).limit(wanted * 3)
+            )
+
+        # Most matched terms first, then the newest resolution (two stable sorts)
+        candidates.sort(key=lambda candidate: candidate[1] or datetime.min, reverse=True)
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        # Repeats of one error (logged several times, or logged and aggregated) would crowd out the others
+        results = []
+        seen = set()
+        for matched, _, source, error_id, error_type, error_description, corrective_action in candidates:
+            fingerprint = error_fingerprint(error_type, error_description)
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+            results.append({
+                'source': source,
+                'id': error_id,
+                'error_type': error_type,
+                'description': make_snippet(error_description, self.token_budget)[0],
+                'corrective_action': make_snippet(corrective_action, self.token_budget)[0],
+                'matched_terms': matched
+            })
+            if len(results) >= wanted:
+                break
+        return results
+
+    def backfill(self, batch_size: int = 500) -> Dict[str, Any]:
+        """Index logged and aggregated errors written before the error index existed"""
+        result = {
+            'success': True,
+            ERROR_LOG: search_index.backfill(ERROR_LOG, batch_size=batch_size),
+            ERROR_AGGREGATE: search_index.backfill(ERROR_AGGREGATE, batch_size=batch_size)
+        }
+        self.invalidate()
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'skipped': self.skipped,
+                'over_budget': self.over_budget,
+                'cached': len(self._cache),
+                'paused': time.monotonic() < self._paused_until
+            }
+
+
+# Global similar error finder instance
+similar_errors = SimilarErrorFinder()
@@ -0,0 +1,223 @@
+"""
+Skill Usage Counters for Manus II
+Accumulates ProceduralMemory usage and outcomes in memory and flushes them as
+atomic increment UPDATEs, so hot skills are never read-modified-written per
+use, and serves the skill leaderboard without touching the database
+"""
+
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Iterable, Optional, Set
+from sqlalchemy import bindparam, case, func
+from src.models.memory_system import db, ProceduralMemory
+
+
+class SkillUsageAggregator:
+    """
+    Pending deltas per skill are (uses, successes, last_used). A flush folds
+    them into the row with success_rate computed as a running mean:
+    rate' = (rate * n + successes) / (n + uses)
+    """
+
+    LEADERBOARD_ORDERS = ('success_rate', 'usage_count', 'last_used')
+
+    def __init__(self, flush_interval: float = 30.0):
+        self.logger = logging.getLogger(__name__)
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._pending: Dict[int, List[Any]] = {}
+        self._stats: Dict[int, Dict[str, Any]] = {}
+        self._missing: Set[int] = set()  # recorded ids without a ProceduralMemory row at the last load
+        self._loaded = False
+
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        # Instrumentation
+        self.recorded = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    def load(self):
+        """(Re)load the leaderboard baseline from the database"""
+        rows = db.session.query(
+            ProceduralMemory.id, ProceduralMemory.skill_name, ProceduralMemory.usage_count,
+            ProceduralMemory.success_rate, ProceduralMemory.last_used
+        ).all()
+
+        with self._lock:
+            self._stats = {
+                skill_id: {
+                    'id': skill_id,
+                    'skill_name': skill_name,
+                    'usage_count': usage_count or 0,
+                    'success_rate': success_rate or 0.0,
+                    'last_used': last_used
+                }
+                for skill_id, skill_name, usage_count, success_rate, last_used in rows
+            }
+            # Uses that are not flushed yet are not in the rows
+            for skill_id, (uses, successes, last_used) in self._pending.items():
+                self._apply(skill_id, uses, successes, last_used)
+            self._missing = {skill_id for skill_id, stats in self._stats.items() if stats['skill_name'] is None}
+            self._loaded = True
+
+    def _apply(self, skill_id: int, uses: int, successes: int, used_at: datetime):
+        stats = self._stats.get(skill_id)
+        if stats is None:
+            stats = {'id': skill_id, 'skill_name': None, 'usage_count': 0, 'success_rate': 0.0, 'last_used': None}
+            self._stats[skill_id] = stats
+
+        count = stats['usage_count'] + uses
+        stats['success_rate'] = (stats['success_rate'] * stats['usage_count'] + successes) / count
+        stats['usage_count'] = count
+        if stats['last_used'] is None or used_at > stats['last_used']:
+            stats['last_used'] = used_at
+
+    def record(self, skill_id: int, success: bool, used_at: Optional[datetime] = None):
+        """Count one use of a skill and its outcome"""
+        self.record_many([skill_id], success, used_at)
+
+    def record_many(self, skill_ids: Iterable[int], success: bool, used_at: Optional[datetime] = None):
+        used_at = used_at or datetime.utcnow()
+        successes = 1 if success else 0
+
+        with self._lock:
+            for skill_id in skill_ids:
+                pending = self._pending.get(skill_id)
+                if pending is None:
+                    self._pending[skill_id] = [1, successes, used_at]
+                else:
+                    pending[0] += 1
+                    pending[1] += successes
+                    pending[2] = max(pending[2], used_at)
+                if self._loaded:
+                    self._apply(skill_id, 1, successes, used_at)
+                self.recorded += 1
+
+    def flush(self) -> int:
+        """Write pending deltas with one executemany UPDATE (requires an app context)"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        table = ProceduralMemory.__table__
+        usage_count = func.coalesce(table.c.usage_count, 0)
+        # success_rate is listed first so it reads the pre-increment usage_count on every backend
+        statement = table.update().where(table.c.id == bindparam('skill_id')).ordered_values(
+            (table.c.success_rate,
+             (func.coalesce(table.c.success_rate, 0.0) * usage_count + bindparam('successes'))
+             / (usage_count + bindparam('uses'))),
+            (table.c.usage_count, usage_count + bindparam('uses')),
+            (table.c.last_used, case(
+                (table.c.last_used.is_(None), bindparam('used_at')),
+                (table.c.last_used < bindparam('used_at'), bindparam('used_at')),
+                else_=table.c.last_used
+            ))
+        )
+        updates = [
+            {'skill_id': skill_id, 'uses': uses, 'successes': float(successes), 'used_at': used_at}
+            for skill_id, (uses, successes, used_at) in pending.items()
+        ]
+
+        try:
+            db.session.execute(statement, updates)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._lock:
+                # Put the deltas back; uses recorded meanwhile are added on top
+                for skill_id, (uses, successes, used_at) in pending.items():
+                    current = self._pending.get(skill_id)
+                    if current is None:
+                        self._pending[skill_id] = [uses, successes, used_at]
+                    else:
+                        current[0] += uses
+                        current[1] += successes
+                        current[2] = max(current[2], used_at)
+            raise
+
+        self.flushes += 1
+        self.rows_written += len(updates)
+        return len(updates)
+
+    def leaderboard(self, limit: int = 10, order_by: str = 'success_rate',
+                    min_uses: int = 1) -> List[Dict[str, Any]]:
+        """Best skills from the in-memory counters"""
+        if order_by not in self.LEADERBOARD_ORDERS:
+            raise ValueError(f"Unsupported leaderboard order: {order_by}")
+        if not self._loaded:
+            self.load()
+
+        with self._lock:
+            unnamed = any(stats['skill_name'] is None and skill_id not in self._missing
+                          for skill_id, stats in self._stats.items())
+        if unnamed:
+            # Skills created after the baseline was loaded; ids already found to have no row are not reloaded for
+            self.load()
+
+        with self._lock:
+            candidates = [
+                dict(stats) for stats in self._stats.values()
+                if stats['usage_count'] >= min_uses and stats['skill_name'] is not None
+            ]
+
+        if order_by == 'last_used':
+            key = lambda stats: (stats['last_used'] or datetime.min, stats['id'])
+        elif order_by == 'usage_count':
+            key = lambda stats: (stats['usage_count'], stats['success_rate'])
+        else:
+            key = lambda stats: (stats['success_rate'], stats['usage_count'])
+
+        best = heapq.nlargest(limit, candidates, key=key)
+        for stats in best:
+            stats['last_used'] = stats['last_used'].isoformat() if stats['last_used'] else None
+        return best
+
+    def start(self, app):
+        """Start the background flush thread for a Flask app; stop() flushes once more before it exits"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_forever, args=(app,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background flush thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval)
+            self._thread = None
+
+    def _run_forever(self, app):
+        stopping = False
+        while not stopping:
+            # One last flush after stop() so pending uses survive a clean shutdown
+            stopping = self._stop_event.wait(self.flush_interval)
+            try:
+                with app.app_context():
+                    started = time.perf_counter()
+                    written = self.flush()
+                    if written:
+                        self.logger.info(f"Flushed usage of {written} skills in {time.perf_counter() - started:.3f}s")
+            except Exception as e:
+                self.logger.error(f"Skill usage flush failed: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'loaded': self._loaded,
+                'pending_skills': len(self._pending),
+                'recorded': self.recorded,
+                'flushes': self.flushes,
+                'rows_written': self.rows_written
+            }
+
+
+# Global skill usage aggregator instance
+skill_usage = SkillUsageAggregator()
@@ -0,0 +1,111 @@
+"""
+Knowledge Snippets for Manus II
+Leading sentences of each knowledge entry, cut at a sentence boundary to a
+token budget and stored on write, so prompt building projects title plus
+snippet instead of loading and slicing the full content of every match
+"""
+
+import math
+import re
+from typing import Dict, Any, Iterable, Optional, Tuple
+from src.models.knowledge_base import db, KnowledgeEntry
+from src.models.knowledge_models import KnowledgeSnippet
+
+# Sentence ends: Latin and Arabic full stops / question marks, and line breaks
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?\u061f\u06d4])\s+|\s*\n\s*')
+_WORD = re.compile(r'\w+', re.UNICODE)
+_WHITESPACE = re.compile(r'[ \t\r\f\v]+')
+
+ELLIPSIS = '\u2026'
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 1.3 tokens per word) without a tokenizer"""
+    return math.ceil(len(_WORD.findall(text)) * 1.3)
+
+
+def make_snippet(content: Optional[str], token_budget: int) -> Tuple[str, int]:
+    """Whole leading sentences within the budget; a first sentence over budget is cut at a word"""
+    text = _WHITESPACE.sub(' ', content or '').strip()
+    sentences = [sentence for sentence in _SENTENCE_BREAK.split(text) if sentence]
+    if not sentences:
+        return '', 0
+
+    snippet = ''
+    tokens = 0
+    for sentence in sentences:
+        candidate = f'{snippet} {sentence}' if snippet else sentence
+        candidate_tokens = estimate_tokens(candidate)
+        if candidate_tokens > token_budget:
+            break
+        snippet, tokens = candidate, candidate_tokens
+
+    if snippet:
+        return snippet, tokens
+
+    words = []
+    for word in sentences[0].split(' '):
+        if estimate_tokens(' '.join(words + [word])) > token_budget:
+            break
+        words.append(word)
+    snippet = ' '.join(words).rstrip(',;:') + ELLIPSIS
+    return snippet, estimate_tokens(snippet)
+
+
+class KnowledgeSnippets:
+    """Maintains knowledge_snippets; callers own the transaction"""
+
+    def __init__(self, token_budget: int = 60):
+        self.token_budget = token_budget
+
+    def set(self, entry_id: int, content: Optional[str]):
+        self.set_bulk({entry_id: content})
+
+    def set_bulk(self, contents_by_id: Dict[int, Optional[str]]):
+        """Replace the snippets of many entries with one delete and one multi-row insert"""
+        if not contents_by_id:
+            return
+
+        self.remove(list(contents_by_id))
+        rows = []
+        for entry_id, content in contents_by_id.items():
+            snippet, tokens = make_snippet(content, self.token_budget)
+            rows.append({
+                'entry_id': entry_id,
+                'snippet': snippet,
+                'token_count': tokens,
+                'token_budget': self.token_budget
+            })
+        db.session.execute(KnowledgeSnippet.__table__.insert(), rows)
+
+    def remove(self, entry_ids: Iterable[int]):
+        entry_ids = list(entry_ids)
+        if entry_ids:
+            KnowledgeSnippet.query.filter(KnowledgeSnippet.entry_id.in_(entry_ids)).delete(synchronize_session=False)
+
+    def backfill(self, batch_size: int = 500, after_id: int = 0) -> Dict[str, Any]:
+        """Cut snippets for entries that have none or were cut for another budget"""
+        processed = 0
+        last_id = after_id
+
+        while True:
+            rows = db.session.query(KnowledgeEntry.id, KnowledgeEntry.content).outerjoin(
+                KnowledgeSnippet, KnowledgeSnippet.entry_id == KnowledgeEntry.id
+            ).filter(
+                KnowledgeEntry.id > last_id,
+                db.or_(KnowledgeSnippet.id.is_(None), KnowledgeSnippet.token_budget != self.token_budget)
+            ).order_by(KnowledgeEntry.id.asc()).limit(batch_size).all()
+            if not rows:
+                break
+
+            self.set_bulk(dict(rows))
+            db.session.commit()
+
+            processed += len(rows)
+            last_id = rows[-1][0]
+
+        return {'success': True, 'processed': processed, 'token_budget': self.token_budget, 'last_id': last_id}
+
+
+# Global knowledge snippets instance
+knowledge_snippets = KnowledgeSnippets()
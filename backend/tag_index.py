@@ -0,0 +1,173 @@
+"""
+Tag Index for Manus II
+Normalized (entity_type, tag, entity_id) rows maintained on every write, so
+tag filters become indexed lookups instead of LIKE scans over JSON text, and
+per-tag counters so cardinality queries never touch the entity tables
+"""
+
+import json
+from collections import Counter
+from typing import Dict, Any, List, Iterable, Optional
+from sqlalchemy import func
+from src.models.knowledge_base import db, KnowledgeEntry
+from src.models.knowledge_models import EntityTag, TagCount
+from src.models.memory_system import LongTermMemory
+from .counters import add_to_counter
+
+KNOWLEDGE = 'knowledge'
+LONG_TERM_MEMORY = 'long_term_memory'
+
+# Entity type -> (model, JSON tags column) for backfills
+TAGGED_MODELS = {
+    KNOWLEDGE: (KnowledgeEntry, KnowledgeEntry.tags),
+    LONG_TERM_MEMORY: (LongTermMemory, LongTermMemory.tags)
+}
+
+
+def normalize_tags(tags: Any) -> List[str]:
+    """Accept a list or JSON text and return unique, stripped, non-empty tags"""
+    if isinstance(tags, str):
+        try:
+            tags = json.loads(tags) if tags else []
+        except ValueError:
+            tags = []
+    if not isinstance(tags, (list, tuple, set)):
+        return []
+
+    normalized = []
+    for tag in tags:
+        if isinstance(tag, str):
+            tag = tag.strip()
+            if tag and tag not in normalized:
+                normalized.append(tag)
+    return normalized
+
+
+class TagIndex:
+    """Maintains entity_tags and tag_counts; callers own the transaction"""
+
+    def set_tags(self, entity_type: str, entity_id: int, tags: Any):
+        """Replace the indexed tags of one entity"""
+        self.set_tags_bulk(entity_type, {entity_id: tags})
+
+    def set_tags_bulk(self, entity_type: str, tags_by_id: Dict[int, Any]):
+        """Replace the indexed tags of many entities with one read and batched writes"""
+        if not tags_by_id:
+            return
+
+        current: Dict[int, set] = {entity_id: set() for entity_id in tags_by_id}
+        for entity_id, tag in db.session.query(EntityTag.entity_id, EntityTag.tag).filter(
+            EntityTag.entity_type == entity_type,
+            EntityTag.entity_id.in_(list(tags_by_id))
+        ):
+            current[entity_id].add(tag)
+
+        inserts = []
+        deletes: Dict[int, List[str]] = {}
+        deltas = Counter()
+
+        for entity_id, tags in tags_by_id.items():
+            wanted = set(normalize_tags(tags))
+            existing = current[entity_id]
+            for tag in wanted - existing:
+                inserts.append({'entity_type': entity_type, 'entity_id': entity_id, 'tag': tag})
+                deltas[tag] += 1
+            removed = existing - wanted
+            if removed:
+                deletes[entity_id] = list(removed)
+                for tag in removed:
+                    deltas[tag] -= 1
+
+        for entity_id, tags in deletes.items():
+            EntityTag.query.filter(
+                EntityTag.entity_type == entity_type,
+                EntityTag.entity_id == entity_id,
+                EntityTag.tag.in_(tags)
+            ).delete(synchronize_session=False)
+
+        if inserts:
+            db.session.execute(EntityTag.__table__.insert(), inserts)
+
+        self.adjust_counts(entity_type, deltas)
+
+    def remove(self, entity_type: str, entity_ids: Iterable[int]):
+        """Drop every indexed tag of the given entities"""
+        entity_ids = list(entity_ids)
+        if not entity_ids:
+            return
+
+        deltas = Counter()
+        for tag, count in db.session.query(EntityTag.tag, func.count(EntityTag.id)).filter(
+            EntityTag.entity_type == entity_type,
+            EntityTag.entity_id.in_(entity_ids)
+        ).group_by(EntityTag.tag):
+            deltas[tag] -= count
+
+        EntityTag.query.filter(
+            EntityTag.entity_type == entity_type,
+            EntityTag.entity_id.in_(entity_ids)
+        ).delete(synchronize_session=False)
+
+        self.adjust_counts(entity_type, deltas)
+
+    def adjust_counts(self, entity_type: str, deltas: Counter):
+        table = TagCount.__table__
+        for tag, delta in deltas.items():
+            if delta == 0:
+                continue
+            # Decrements never create a row
+            add_to_counter(table, {'entity_type': entity_type, 'tag': tag}, {'count': delta}, create=delta > 0)
+
+    def ids_with_all_tags(self, entity_type: str, tags: List[str]):
+        """
+        Subquery of entity ids carrying every tag, answered from the
+        (entity_type, tag) index; callers skip the filter when normalize_tags
+        leaves no tag, which would match nothing
+        """
+        tags = normalize_tags(tags)
+        return db.session.query(EntityTag.entity_id).filter(
+            EntityTag.entity_type == entity_type,
+            EntityTag.tag.in_(tags)
+        ).group_by(EntityTag.entity_id).having(
+            func.count(func.distinct(EntityTag.tag)) == len(tags)
+        ).subquery()
+
+    def tags_for(self, entity_type: str, entity_id: int) -> List[str]:
+        return [row.tag for row in db.session.query(EntityTag.tag).filter(
+            EntityTag.entity_type == entity_type,
+            EntityTag.entity_id == entity_id
+        )]
+
+    def cardinality(self, entity_type: str, tags: Optional[List[str]] = None,
+                    limit: int = 100) -> List[Dict[str, Any]]:
+        """Entity counts per tag, read from the counters"""
+        query = TagCount.query.filter(TagCount.entity_type == entity_type, TagCount.count > 0)
+        tags = normalize_tags(tags)
+        if tags:
+            query = query.filter(TagCount.tag.in_(tags))
+        return [row.to_dict() for row in query.order_by(TagCount.count.desc(), TagCount.tag).limit(limit)]
+
+    def backfill(self, entity_type: str, batch_size: int = 1000, after_id: int = 0) -> Dict[str, Any]:
+        """Index the JSON tags of existing rows, one committed batch at a time"""
+        model, tags_column = TAGGED_MODELS[entity_type]
+        processed = 0
+        last_id = after_id
+
+        while True:
+            rows = db.session.query(model.id, tags_column).filter(
+                model.id > last_id
+            ).order_by(model.id.asc()).limit(batch_size).all()
+            if not rows:
+                break
+
+            self.set_tags_bulk(entity_type, {row[0]: row[1] for row in rows})
+            db.session.commit()
+
+            processed += len(rows)
+            last_id = rows[-1][0]
+
+        return {'success': True, 'entity_type': entity_type, 'processed': processed, 'last_id': last_id}
+
+
+# Global tag index instance
+tag_index = TagIndex()
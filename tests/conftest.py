@@ -0,0 +1,48 @@
+"""
+Shared fixtures: a Flask app on an in-memory SQLite database with every
+memory and knowledge table, and a client with the knowledge API registered
+"""
+
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.knowledge_base import db  # noqa: E402
+import src.models.knowledge_models  # noqa: E402,F401 - registers the derived knowledge tables
+import src.models.memory_system  # noqa: E402,F401
+from backend.etags import table_versions, body_cache  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        # Every test starts from version 0, so ETags and bodies cached by an earlier test would match
+        table_versions.reset()
+        body_cache.reset()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    from backend.knowledge_api import knowledge_bp
+    from backend.error_aggregator import error_aggregator
+    from backend.memory_ranking import memory_ranker
+    from backend.memory_sweeper import memory_sweeper
+    from backend.skill_usage import skill_usage
+
+    app.register_blueprint(knowledge_bp)
+    # Registration starts the background jobs; tests drive them explicitly
+    for job in (error_aggregator, memory_ranker, memory_sweeper, skill_usage):
+        job.stop()
+    return app.test_client()
@@ -0,0 +1,103 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.core import ManusAIEngine
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = ManusAIEngine()
+    engine._db_executor = ThreadPoolExecutor(max_workers=1)
+    engine._llm_executor = ThreadPoolExecutor(max_workers=1)
+    calls = []
+
+    def execute_capability(capability, parameters):
+        calls.append((capability, parameters))
+        if 'sleep' in parameters:
+            # Sleep in small steps, honouring the cancel flag like a batched job
+            deadline = time.perf_counter() + parameters['sleep']
+            while time.perf_counter() < deadline:
+                if engine.node_cancelled():
+                    engine.abandoned.set()
+                    return {'success': False, 'error': 'cancelled'}
+                time.sleep(0.01)
+        return {'success': not parameters.get('fail'), 'value': capability, 'error': 'boom'}
+
+    engine.calls = calls
+    engine.abandoned = threading.Event()
+    monkeypatch.setattr(engine, 'execute_capability', execute_capability)
+    yield engine
+    engine._db_executor.shutdown(wait=True)
+    engine._llm_executor.shutdown(wait=True)
+
+
+def test_dependencies_receive_results_in_order(engine):
+    result = engine.execute_capabilities([
+        {'id': 'a', 'capability': 'knowledge_retrieval'},
+        {'id': 'b', 'capability': 'web_search', 'depends_on': ['a']}
+    ])
+
+    assert result['success']
+    assert engine.calls[1][1]['dependency_results'] == {'a': {'success': True, 'value': 'knowledge_retrieval',
+                                                              'error': 'boom'}}
+
+
+def test_dependents_of_a_failed_node_are_skipped(engine):
+    result = engine.execute_capabilities([
+        {'id': 'a', 'capability': 'web_search', 'parameters': {'fail': True}},
+        {'id': 'b', 'capability': 'web_search', 'depends_on': ['a']}
+    ])
+
+    assert not result['success']
+    assert result['results']['a']['status'] == 'failed'
+    assert result['results']['b']['status'] == 'skipped'
+    assert len(engine.calls) == 1
+
+
+def test_queue_wait_does_not_count_against_a_node_timeout(engine):
+    # One LLM worker: the second node waits behind the first for longer than its own timeout
+    result = engine.execute_capabilities([
+        {'id': 'slow', 'capability': 'web_search', 'parameters': {'sleep': 0.3}},
+        {'id': 'queued', 'capability': 'task_planning', 'timeout': 0.2}
+    ])
+
+    assert result['success'], result['results']
+    assert result['results']['queued']['started_at'] >= 0.25
+
+
+def test_timed_out_node_is_cancelled_and_frees_its_worker(engine):
+    result = engine.execute_capabilities([
+        {'id': 'hung', 'capability': 'web_search', 'timeout': 0.1, 'parameters': {'sleep': 5}},
+        {'id': 'after', 'capability': 'web_search', 'depends_on': ['hung']}
+    ])
+
+    assert result['results']['hung']['status'] == 'timeout'
+    assert result['results']['after']['status'] == 'skipped'
+    assert engine.abandoned.wait(1)
+    assert engine._llm_executor.submit(lambda: 'free').result(timeout=1) == 'free'
+
+
+@pytest.mark.parametrize('plan', [
+    'not a plan',
+    {'nodes': None},
+    [['a', 'web_search']],
+    [{'id': 1, 'capability': 'web_search'}],
+    [{'id': 'a', 'capability': 'web_search', 'depends_on': 'b'}],
+    [{'id': 'a', 'capability': 'web_search', 'depends_on': [['b']]}],
+    [{'id': 'a', 'capability': 'web_search', 'timeout': 'soon'}],
+    [{'id': 'a', 'capability': 'web_search', 'timeout': -1}],
+    [{'id': 'a', 'capability': 'web_search', 'parameters': 'x'}],
+    {'nodes': [{'id': 'a', 'capability': 'web_search'}], 'timeout': True},
+    [{'id': 'a', 'capability': 'web_search', 'depends_on': ['missing']}],
+    [{'id': 'a', 'capability': 'web_search', 'depends_on': ['b']},
+     {'id': 'b', 'capability': 'web_search', 'depends_on': ['a']}]
+])
+def test_malformed_plans_are_rejected_before_running(engine, plan):
+    result = engine.execute_capabilities(plan)
+
+    assert result['success'] is False
+    assert result['status_code'] == 400
+    assert engine.calls == []
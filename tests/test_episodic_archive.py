@@ -0,0 +1,89 @@
+import gzip
+import os
+from datetime import datetime
+
+import pytest
+
+from src.models.memory_system import db, EpisodicMemory, EpisodicArchivePartition
+from backend.episodic_archive import EpisodicArchive
+
+NOW = datetime(2026, 6, 15)
+
+
+@pytest.fixture
+def archive(app, tmp_path):
+    return EpisodicArchive(archive_dir=str(tmp_path), hot_months=2, batch_size=2)
+
+
+def add_episode(title, timestamp):
+    episode = EpisodicMemory(event_title=title, event_description=f'{title} happened', event_timestamp=timestamp,
+                             participants='["user"]')
+    db.session.add(episode)
+    db.session.commit()
+    return episode.id
+
+
+def titles(records):
+    return [record['event_title'] for record in records]
+
+
+def test_compact_moves_cold_months_into_partitions(archive):
+    add_episode('january', datetime(2026, 1, 10))
+    add_episode('february', datetime(2026, 2, 3))
+    add_episode('february late', datetime(2026, 2, 27))
+    add_episode('may', datetime(2026, 5, 1))
+
+    result = archive.compact(now=NOW)
+
+    assert result['months'] == ['2026-01', '2026-02']
+    assert result['archived'] == 3
+    assert [episode.event_title for episode in EpisodicMemory.query.all()] == ['may']
+    partition = EpisodicArchivePartition.query.filter_by(month='2026-02').one()
+    assert partition.row_count == 2
+    with gzip.open(os.path.join(archive.archive_dir, partition.path)) as handle:
+        assert len(handle.read().splitlines()) == 2
+    assert archive.compact(now=NOW)['archived'] == 0
+
+
+def test_range_queries_merge_live_rows_and_overlapping_partitions(archive):
+    add_episode('january', datetime(2026, 1, 10))
+    add_episode('february', datetime(2026, 2, 3))
+    archive.compact(now=NOW)
+    add_episode('backdated', datetime(2026, 1, 20))
+    add_episode('may', datetime(2026, 5, 1))
+
+    everything = archive.query_range()
+    february_on = archive.query_range(start=datetime(2026, 2, 1))
+
+    assert titles(everything) == ['january', 'backdated', 'february', 'may']
+    assert everything[0]['participants'] == ['user']
+    assert titles(february_on) == ['february', 'may']
+    assert archive.get_stats()['partitions_pruned'] == 1
+    assert titles(archive.query_range(limit=2)) == ['january', 'backdated']
+
+
+def test_backdated_rows_are_merged_into_a_new_partition_file(archive):
+    add_episode('january', datetime(2026, 1, 10))
+    archive.compact(now=NOW)
+    old_path = EpisodicArchivePartition.query.one().path
+    add_episode('backdated', datetime(2026, 1, 5))
+
+    archive.compact(now=NOW)
+
+    partition = EpisodicArchivePartition.query.one()
+    assert partition.row_count == 2
+    assert partition.path != old_path
+    assert not os.path.exists(os.path.join(archive.archive_dir, old_path))
+    assert titles(archive.query_range()) == ['backdated', 'january']
+
+
+def test_get_many_reads_live_and_archived_episodes(archive):
+    archived = add_episode('january', datetime(2026, 1, 10))
+    archive.compact(now=NOW)
+    live = add_episode('may', datetime(2026, 5, 1))
+
+    found = archive.get_many([archived, live, 999])
+
+    assert {memory_id: record['event_title'] for memory_id, record in found.items()} == {
+        archived: 'january', live: 'may'
+    }
@@ -0,0 +1,89 @@
+import pytest
+
+from src.models.knowledge_base import db
+from src.models.knowledge_models import ErrorAggregate
+from backend.error_aggregator import ErrorAggregator, error_aggregator, error_fingerprint, normalize_description
+
+
+@pytest.fixture
+def aggregator(app):
+    # Occurrences folded into a request are put back into the global aggregator on rollback
+    error_aggregator._pending.clear()
+    yield error_aggregator
+    error_aggregator._pending.clear()
+
+
+def test_variable_parts_share_a_fingerprint():
+    first = "Timeout after 30s reading '/var/data/a.json' for 6f1c2b3a-1111-2222-3333-444455556666"
+    second = "Timeout after 45s reading '/var/data/b.json' for 0a0b0c0d-aaaa-bbbb-cccc-ddddeeeeffff"
+
+    assert normalize_description(first) == normalize_description(second)
+    assert error_fingerprint('api_error', first) == error_fingerprint('api_error', second)
+    assert error_fingerprint('api_error', first) != error_fingerprint('db_error', first)
+    assert normalize_description('input and/or output') == 'input and/or output'
+
+
+def test_flush_writes_one_row_per_fingerprint(app):
+    aggregator = ErrorAggregator(max_samples=2)
+    for attempt in range(5):
+        aggregator.record('api_error', f'Request {attempt} failed', {'attempt': attempt})
+    aggregator.record('db_error', 'Connection refused')
+
+    assert aggregator.flush() == 2
+    assert aggregator.flush() == 0
+    aggregate = ErrorAggregate.query.filter_by(error_type='api_error').one()
+    assert aggregate.occurrence_count == 5
+    assert aggregate.sample_description == 'Request 4 failed'
+    assert len(db.session.get(ErrorAggregate, aggregate.id).to_dict()['sample_contexts']) == 2
+
+
+def test_recurring_resolved_error_is_reopened(app):
+    aggregator = ErrorAggregator()
+    fingerprint = aggregator.record('api_error', 'Request 1 failed')
+    aggregator.flush()
+    aggregator.resolve(fingerprint)
+    db.session.commit()
+
+    aggregator.record('api_error', 'Request 2 failed')
+    aggregator.flush()
+
+    aggregate = ErrorAggregate.query.filter_by(fingerprint=fingerprint).one()
+    assert (aggregate.status, aggregate.resolved_at, aggregate.occurrence_count) == ('open', None, 2)
+
+
+def test_fold_pending_writes_only_its_fingerprint(aggregator):
+    fingerprint = aggregator.record('api_error', 'Request 1 failed')
+    other = aggregator.record('db_error', 'Connection refused')
+
+    aggregator.fold_pending(fingerprint)
+    db.session.commit()
+
+    assert ErrorAggregate.query.filter_by(fingerprint=fingerprint).one().occurrence_count == 1
+    assert ErrorAggregate.query.filter_by(fingerprint=other).first() is None
+    assert list(aggregator._pending) == [other]
+
+
+def test_folded_occurrences_return_to_the_buffer_on_rollback(aggregator):
+    fingerprint = aggregator.record('api_error', 'Request 1 failed')
+
+    aggregator.fold_pending(fingerprint)
+    db.session.rollback()
+
+    assert aggregator._pending[fingerprint].count == 1
+    assert ErrorAggregate.query.count() == 0
+
+
+def test_resolving_by_fingerprint_counts_unflushed_occurrences(client, aggregator):
+    client.post('/errors', json={'error_type': 'api_error', 'description': 'Request 1 failed'})
+    client.post('/errors', json={'error_type': 'db_error', 'description': 'Connection refused'})
+    fingerprint = error_fingerprint('api_error', 'Request 1 failed')
+
+    response = client.put(f'/errors/fingerprints/{fingerprint}/resolve',
+                          json={'corrective_action': 'Retry with backoff'})
+
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'resolved'
+    assert response.get_json()['occurrence_count'] == 1
+    # The other fingerprint stays buffered until the next flush
+    assert len(aggregator._pending) == 1
+    assert client.put('/errors/fingerprints/unknown/resolve').status_code == 404
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.knowledge_base import db, ErrorLog
+from backend.error_aggregator import ErrorAggregator
+from backend.error_rollups import ErrorRollups
+
+MORNING = datetime(2026, 4, 2, 9, 15)
+
+
+@pytest.fixture
+def rollups(app):
+    return ErrorRollups()
+
+
+def test_records_land_in_hour_and_day_buckets(rollups):
+    rollups.record('timeout', 'high', 'planner', MORNING, occurrences=2)
+    rollups.record('timeout', 'high', 'planner', MORNING + timedelta(minutes=30), occurrences=1)
+    rollups.record('timeout', 'high', 'planner', MORNING + timedelta(hours=2), occurrences=4)
+    db.session.commit()
+
+    hourly = rollups.series('hour')
+    daily = rollups.series('day')
+
+    assert [(point['bucket_start'], point['occurrences']) for point in hourly['series']] == [
+        ('2026-04-02T09:00:00', 3), ('2026-04-02T11:00:00', 4)
+    ]
+    assert [(point['bucket_start'], point['occurrences']) for point in daily['series']] == [('2026-04-02T00:00:00', 7)]
+    assert daily['totals']['occurrences'] == 7
+
+
+def test_mean_time_to_resolve_per_bucket_and_overall(rollups):
+    rollups.record_resolved('timeout', 'high', 'planner', MORNING, MORNING + timedelta(minutes=10))
+    rollups.record_resolved('timeout', 'high', 'planner', MORNING, MORNING + timedelta(minutes=30))
+    rollups.record_resolved('parse', None, None, MORNING, MORNING + timedelta(days=1, minutes=1))
+    # Clock skew never produces a negative duration
+    rollups.record_resolved('parse', None, None, MORNING, MORNING - timedelta(minutes=5))
+    db.session.commit()
+
+    result = rollups.series('day')
+
+    first, second = result['series']
+    assert (first['resolved'], first['mean_time_to_resolve_seconds']) == (3, pytest.approx(2400 / 3))
+    assert (second['resolved'], second['occurrences']) == (1, 0)
+    assert result['totals']['mean_time_to_resolve_seconds'] == pytest.approx((2400 + 86460) / 4)
+
+
+def test_group_by_filters_and_time_range(rollups):
+    rollups.record('timeout', 'high', 'planner', MORNING, occurrences=2)
+    rollups.record('timeout', None, 'executor', MORNING, occurrences=1)
+    rollups.record('parse', 'low', 'planner', MORNING + timedelta(days=1), occurrences=5)
+    db.session.commit()
+
+    by_source = rollups.series('day', group_by='source_ai')
+    timeouts = rollups.series('day', filters={'error_type': 'timeout', 'impact': None})
+    unknown_impact = rollups.series('day', filters={'impact': 'unknown'})
+    later = rollups.series('day', start=datetime(2026, 4, 3))
+
+    assert [(point['bucket_start'][:10], point['source_ai'], point['occurrences'])
+            for point in by_source['series']] == [
+        ('2026-04-02', 'executor', 1), ('2026-04-02', 'planner', 2), ('2026-04-03', 'planner', 5)
+    ]
+    assert timeouts['totals']['occurrences'] == 3
+    assert unknown_impact['totals']['occurrences'] == 1
+    assert later['totals']['occurrences'] == 5
+    assert rollups.series('day', end=datetime(2026, 4, 3))['totals']['occurrences'] == 3
+
+
+@pytest.mark.parametrize('kwargs', [{'granularity': 'week'}, {'group_by': 'description'}])
+def test_series_rejects_unknown_dimensions(rollups, kwargs):
+    with pytest.raises(ValueError):
+        rollups.series(**kwargs)
+
+
+def test_aggregator_flush_counts_occurrences_by_hour(app):
+    aggregator = ErrorAggregator()
+    aggregator.record('timeout', 'upstream did not answer', impact='high', source_ai='planner')
+    aggregator.record('timeout', 'upstream did not answer', impact='high', source_ai='planner')
+
+    aggregator.flush()
+
+    result = ErrorRollups().series('hour')
+    assert result['totals']['occurrences'] == 2
+    assert len(result['series']) == 1
+
+
+def test_analytics_endpoint_reports_resolutions(client):
+    error_id = client.post('/errors', json={'error_type': 'timeout', 'description': 'upstream did not answer',
+                                            'impact': 'high'}).get_json()['id']
+    client.put(f'/errors/{error_id}/resolve', json={'corrective_action': 'raise the timeout'})
+    # Resolving twice is counted once
+    client.put(f'/errors/{error_id}/resolve', json={})
+    created_at = db.session.get(ErrorLog, error_id).created_at
+
+    analytics = client.get('/errors/analytics?granularity=hour&group_by=impact&impact=high').get_json()
+
+    assert analytics['totals']['resolved'] == 1
+    assert analytics['totals']['mean_time_to_resolve_seconds'] >= 0
+    assert analytics['series'][0]['impact'] == 'high'
+    assert client.get(f'/errors/analytics?start={created_at.date() + timedelta(days=1)}').get_json()[
+        'totals']['resolved'] == 0
+
+
+@pytest.mark.parametrize('query', ['granularity=week', 'group_by=description', 'start=yesterday'])
+def test_analytics_endpoint_rejects_bad_parameters(client, query):
+    assert client.get(f'/errors/analytics?{query}').status_code == 400
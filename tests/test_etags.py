@@ -0,0 +1,73 @@
+from src.models.knowledge_base import db
+from src.models.knowledge_models import TableVersion
+from backend.etags import BodyCache, TableVersions, body_cache, table_versions
+
+
+def post_entry(client, title):
+    return client.post('/knowledge', json={'category': 'notes', 'title': title, 'content': f'{title} body text'})
+
+
+def test_bump_counts_per_table_and_reaches_readers_after_commit(app):
+    # Ending a transaction invalidates the global instance
+    versions = table_versions
+    assert versions.get('knowledge_entries') == 0
+
+    versions.bump('knowledge_entries')
+    versions.bump('knowledge_entries')
+    assert versions.get('knowledge_entries') == 0  # still cached until the transaction ends
+    db.session.commit()
+
+    assert versions.get('knowledge_entries') == 2
+    assert versions.get('error_logs') == 0
+    assert TableVersion.query.filter_by(table_name='knowledge_entries').one().updated_at is not None
+
+
+def test_rolled_back_bumps_leave_the_version_alone(app):
+    versions = table_versions
+    versions.bump('knowledge_entries')
+    db.session.rollback()
+
+    assert versions.get('knowledge_entries') == 0
+
+
+def test_etag_changes_with_versions_and_request_key(app):
+    versions = TableVersions(ttl=0)
+    first = versions.etag(('knowledge_entries',), '/knowledge?limit=5')
+
+    assert versions.etag(('knowledge_entries',), '/knowledge?limit=5') == first
+    assert versions.etag(('knowledge_entries',), '/knowledge?limit=6') != first
+    versions.bump('knowledge_entries')
+    db.session.commit()
+    assert versions.etag(('knowledge_entries',), '/knowledge?limit=5') != first
+
+
+def test_body_cache_is_a_bounded_lru():
+    cache = BodyCache(max_entries=2, max_body_bytes=10)
+    cache.put('a', b'1', 'application/json')
+    cache.put('b', b'2', 'application/json')
+    cache.get('a')
+    cache.put('c', b'3', 'application/json')
+    cache.put('big', b'x' * 11, 'application/json')
+
+    assert cache.get('b') is None and cache.get('big') is None
+    assert cache.get('a') == (b'1', 'application/json')
+    assert cache.get_stats()['entries'] == 2
+
+
+def test_listing_answers_304_until_a_write(client):
+    post_entry(client, 'first')
+    first = client.get('/knowledge')
+    etag = first.headers['ETag']
+
+    assert etag.startswith('W/')
+    again = client.get('/knowledge', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    replayed = client.get('/knowledge')
+    assert replayed.data == first.data
+    assert body_cache.get_stats()['hits'] >= 1
+
+    post_entry(client, 'second')
+    changed = client.get('/knowledge', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert len(changed.get_json()['entries']) == 2
+
@@ -0,0 +1,62 @@
+import gzip
+import json
+from datetime import datetime
+
+from src.models.knowledge_base import db, KnowledgeEntry
+from backend import export
+from backend.export import stream_ndjson
+from backend.serializers import knowledge_serializer
+
+
+def add_entries(count, updated_at=None):
+    entries = [KnowledgeEntry(category='notes', title=f'entry {i}', content=f'body {i}', tags='["t"]',
+                              updated_at=updated_at or datetime(2026, 1, 1)) for i in range(count)]
+    db.session.add_all(entries)
+    db.session.commit()
+
+
+def lines(body):
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def test_stream_matches_to_dict_across_chunks(app, monkeypatch):
+    monkeypatch.setattr(export, 'CHUNK_BYTES', 100)
+    add_entries(5)
+    query = knowledge_serializer.query().order_by(KnowledgeEntry.id)
+
+    chunks = list(stream_ndjson(knowledge_serializer, query, batch_size=2))
+
+    assert len(chunks) > 1
+    assert lines(b''.join(chunks)) == [entry.to_dict() for entry in KnowledgeEntry.query.order_by(KnowledgeEntry.id)]
+
+
+def test_compressed_stream_is_one_gzip_member(app, monkeypatch):
+    monkeypatch.setattr(export, 'CHUNK_BYTES', 100)
+    add_entries(5)
+
+    body = b''.join(stream_ndjson(knowledge_serializer, knowledge_serializer.query(), compress=True))
+
+    assert len(lines(gzip.decompress(body))) == 5
+
+
+def test_empty_export_yields_nothing_or_an_empty_gzip(app):
+    assert list(stream_ndjson(knowledge_serializer, knowledge_serializer.query())) == []
+    assert gzip.decompress(b''.join(stream_ndjson(knowledge_serializer, knowledge_serializer.query(),
+                                                  compress=True))) == b''
+
+
+def test_export_endpoint_filters_by_since_and_negotiates_gzip(client):
+    add_entries(2, updated_at=datetime(2026, 1, 1))
+    add_entries(1, updated_at=datetime(2026, 3, 1))
+
+    # Streamed responses hold a request context until they are closed
+    with client.get('/knowledge/export?since=2026-02-01', headers={'Accept-Encoding': 'identity'}) as plain:
+        assert plain.mimetype == 'application/x-ndjson'
+        assert len(lines(plain.data)) == 1
+        assert 'X-Export-Started-At' in plain.headers
+    with client.get('/knowledge/export', headers={'Accept-Encoding': 'gzip'}) as compressed:
+        assert compressed.headers['Content-Encoding'] == 'gzip'
+        assert len(lines(gzip.decompress(compressed.data))) == 3
+    with client.get('/knowledge/export', headers={'Accept-Encoding': 'gzip;q=0'}) as refused:
+        assert 'Content-Encoding' not in refused.headers
+    assert client.get('/knowledge/export?since=yesterday').status_code == 400
@@ -0,0 +1,66 @@
+from src.models.knowledge_base import db
+from src.models.knowledge_models import FacetCount, TagCount
+from backend.facets import facet_index
+
+
+def add_entry(client, title, category, tags):
+    response = client.post('/knowledge?dedup=allow', json={'category': category, 'title': title, 'tags': tags,
+                                                            'content': f'{title} is described here in full'})
+    return response.get_json()['id']
+
+
+def counts(rows):
+    return {row['value']: row['count'] for row in rows}
+
+
+def test_counters_follow_inserts_updates_and_deletes(client):
+    first = add_entry(client, 'alpha', 'notes', ['a', 'b'])
+    add_entry(client, 'beta', 'notes', ['a'])
+    third = add_entry(client, 'gamma', 'howto', ['c'])
+
+    client.put(f'/knowledge/{first}', json={'category': 'howto', 'tags': ['a']})
+    client.delete(f'/knowledge/{third}')
+
+    facets = client.get('/knowledge/facets').get_json()
+    assert counts(facets['categories']) == {'notes': 1, 'howto': 1}
+    assert counts(facets['tags']) == {'a': 2}
+
+
+def test_histogram_orders_by_count_and_respects_limit(app):
+    facet_index.adjust('category', {'rare': 1, 'common': 3, 'empty': 0})
+    db.session.commit()
+
+    assert facet_index.histogram(limit=1)['categories'] == [{'value': 'common', 'count': 3}]
+    assert [row['value'] for row in facet_index.histogram()['categories']] == ['common', 'rare']
+
+
+def test_filtered_facets_count_only_matching_entries(client):
+    add_entry(client, 'alpha', 'notes', ['a', 'b'])
+    add_entry(client, 'beta', 'howto', ['a'])
+    add_entry(client, 'gamma', 'howto', ['c'])
+
+    by_tag = client.get('/knowledge/facets?tags=a').get_json()
+    by_category = client.get('/knowledge/facets?category=howto').get_json()
+
+    assert by_tag['total'] == 2
+    assert counts(by_tag['categories']) == {'notes': 1, 'howto': 1}
+    assert counts(by_tag['tags']) == {'a': 2, 'b': 1}
+    assert by_category['total'] == 2
+    assert counts(by_category['tags']) == {'a': 1, 'c': 1}
+
+
+def test_rebuild_corrects_drifted_counters(client):
+    add_entry(client, 'alpha', 'notes', ['a'])
+    add_entry(client, 'beta', 'notes', ['a'])
+    db.session.execute(FacetCount.__table__.update().values(count=7))
+    db.session.add(FacetCount(entity_type='knowledge', facet='category', value='ghost', count=2))
+    db.session.execute(TagCount.__table__.update().values(count=0))
+    db.session.commit()
+
+    result = client.post('/knowledge/facets/rebuild').get_json()
+
+    assert result['corrected'] == {'category': 2, 'tags': 1}
+    facets = client.get('/knowledge/facets').get_json()
+    assert counts(facets['categories']) == {'notes': 2}
+    assert counts(facets['tags']) == {'a': 2}
+    assert client.post('/knowledge/facets/rebuild').get_json()['corrected'] == {'category': 0, 'tags': 0}
@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from src.models.knowledge_base import db, KnowledgeEntry
+from backend.knowledge_bulk import KnowledgeBulkEditor, validate_changes
+from backend.tag_index import tag_index, KNOWLEDGE
+
+
+def add_entry(client, title, category='notes', tags=()):
+    response = client.post('/knowledge?dedup=allow', json={'category': category, 'title': title, 'tags': list(tags),
+                                                            'content': f'{title} is described here in full'})
+    return response.get_json()['id']
+
+
+def facet_counts(client):
+    facets = client.get('/knowledge/facets').get_json()
+    return ({row['value']: row['count'] for row in facets['categories']},
+            {row['value']: row['count'] for row in facets['tags']})
+
+
+@pytest.mark.parametrize('body, message', [
+    ({'set': {'title': 'x'}}, 'cannot be bulk edited: title'),
+    ({'set': {'category': ''}}, 'category must be'),
+    ({'set': {'confidence_score': True}}, 'confidence_score must be a number'),
+    ({'set': {'metadata': []}}, 'metadata must be an object'),
+    ({'add_tags': 'a'}, 'add_tags must be an array'),
+    ({'tags': ['a'], 'remove_tags': ['b']}, 'cannot be combined'),
+    ({}, 'Nothing to change'),
+])
+def test_validate_changes_rejects_bad_bodies(body, message):
+    with pytest.raises(ValueError, match=message):
+        validate_changes(body)
+
+
+def test_validate_changes_maps_fields_to_columns():
+    changes = validate_changes({'set': {'metadata': {'k': 1}, 'source': 's'}, 'add_tags': [' a ', 'b', 'a']})
+
+    assert changes['values'] == {'meta_data': '{"k": 1}', 'source': 's'}
+    assert changes['tags'] == {'add_tags': ['a', 'b']}
+
+
+def test_id_chunks_walk_ids_and_queries_in_order(app):
+    db.session.add_all(KnowledgeEntry(category='notes', title=f'entry {i}', content='c') for i in range(5))
+    db.session.commit()
+    editor = KnowledgeBulkEditor(chunk_size=2)
+
+    assert list(editor.id_chunks(ids=[5, 1, 3, 1])) == [[1, 3], [5]]
+    assert list(editor.id_chunks(query=KnowledgeEntry.query)) == [[1, 2], [3, 4], [5]]
+
+
+def test_patch_by_filter_moves_categories_and_edits_tags(client):
+    first = add_entry(client, 'alpha', tags=['a', 'b'])
+    second = add_entry(client, 'beta', tags=['b'])
+    add_entry(client, 'gamma', category='howto', tags=['a'])
+
+    response = client.patch('/knowledge/bulk', json={'filter': {'category': 'notes'},
+                                                     'set': {'category': 'archive', 'confidence_score': 0.5},
+                                                     'add_tags': ['old'], 'remove_tags': ['b']})
+
+    result = response.get_json()
+    assert response.status_code == 200
+    assert (result['matched'], result['updated'], result['tags_changed']) == (2, 2, 2)
+    entry = db.session.get(KnowledgeEntry, first)
+    assert (entry.category, entry.confidence_score, json.loads(entry.tags)) == ('archive', 0.5, ['a', 'old'])
+    assert json.loads(db.session.get(KnowledgeEntry, second).tags) == ['old']
+    assert tag_index.tags_for(KNOWLEDGE, second) == ['old']
+    assert facet_counts(client) == ({'archive': 2, 'howto': 1}, {'a': 2, 'old': 2})
+
+
+def test_patch_replacing_tags_counts_only_changed_entries(client):
+    add_entry(client, 'alpha', tags=['a'])
+    add_entry(client, 'beta', tags=['b'])
+
+    result = client.patch('/knowledge/bulk', json={'filter': {'tags': ['a', 'b']}, 'tags': ['a']}).get_json()
+    assert result['matched'] == 0
+
+    result = client.patch('/knowledge/bulk', json={'filter': {'category': 'notes'}, 'tags': ['a']}).get_json()
+    assert result['tags_changed'] == 1
+    assert facet_counts(client)[1] == {'a': 2}
+
+
+def test_delete_by_ids_keeps_the_counters_consistent(client):
+    ids = [add_entry(client, f'entry {i}', tags=['t']) for i in range(3)]
+
+    result = client.delete('/knowledge/bulk', json={'ids': ids[:2] + [999]}).get_json()
+
+    assert (result['matched'], result['deleted'], result['success']) == (3, 2, True)
+    assert client.get('/knowledge').get_json()['total'] == 1
+    assert facet_counts(client) == ({'notes': 1}, {'t': 1})
+
+
+def test_failed_chunk_stops_and_reports_its_ids(client, monkeypatch):
+    ids = [add_entry(client, f'entry {i}') for i in range(3)]
+    editor = KnowledgeBulkEditor(chunk_size=2)
+    calls = []
+
+    def fail_second_chunk(chunk, changes):
+        calls.append(chunk)
+        if len(calls) == 2:
+            raise RuntimeError('database is locked')
+        return len(chunk), 0
+
+    monkeypatch.setattr(editor, '_update_chunk', fail_second_chunk)
+
+    result = editor.update(editor.id_chunks(ids=ids), validate_changes({'set': {'source': 's'}}))
+
+    assert result['success'] is False
+    assert (result['matched'], result['chunks'], result['failed_ids']) == (2, 1, [ids[2]])
+
+
+@pytest.mark.parametrize('method, body', [
+    ('patch', {'set': {'source': 's'}}),
+    ('patch', {'filter': {'tags': [' ', '']}, 'set': {'source': 's'}}),
+    ('patch', {'ids': [1, True], 'set': {'source': 's'}}),
+    ('patch', {'ids': [1], 'set': {'content': 'x'}}),
+    ('delete', {'filter': 'notes'}),
+    ('delete', ['not', 'an', 'object']),
+])
+def test_bulk_endpoints_reject_unscoped_or_malformed_bodies(client, method, body):
+    add_entry(client, 'alpha')
+
+    response = getattr(client, method)('/knowledge/bulk', json=body)
+
+    assert response.status_code == 400
+    assert client.get('/knowledge').get_json()['total'] == 1
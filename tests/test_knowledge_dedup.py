@@ -0,0 +1,153 @@
+import io
+import json
+
+import pytest
+
+from src.models.knowledge_base import db, KnowledgeEntry
+from src.models.knowledge_models import KnowledgeContentHash
+from backend.knowledge_dedup import (KnowledgeDeduplicator, DuplicateMatch, content_hash, EXACT, NEAR, MERGE,
+                                     REJECT)
+from backend.knowledge_ingest import KnowledgeBulkIngestor
+
+WORDS = ('the scheduler retries failed jobs with exponential backoff until the queue drains and every worker '
+         'reports a healthy heartbeat to the coordinator which then resumes dispatching new batches of work '
+         'while old checkpoints are compacted in the background so recovery after a crash replays only the '
+         'most recent segment of the journal instead of the whole history').split()
+TEXT = ' '.join(WORDS)
+NEAR_TEXT = ' '.join(WORDS[:-1] + ['log'])
+
+
+@pytest.fixture
+def dedup(app):
+    return KnowledgeDeduplicator()
+
+
+def add_entry(content, tags='[]', **values):
+    entry = KnowledgeEntry(category='notes', title='entry', content=content, tags=tags, **values)
+    db.session.add(entry)
+    db.session.flush()
+    return entry
+
+
+def index_entry(dedup, content):
+    entry = add_entry(content)
+    fingerprint = dedup.fingerprint(content)
+    dedup.index(entry.id, fingerprint, dedup.find(fingerprint))
+    db.session.commit()
+    return entry.id
+
+
+def test_content_hash_ignores_case_width_and_whitespace():
+    assert content_hash('Retry  the\tJob\n') == content_hash('retry the job')
+    assert content_hash('ＡＢＣ') == content_hash('abc')
+    assert content_hash('retry the job') != content_hash('retry the jobs')
+
+
+def test_find_reports_exact_near_and_no_match(dedup):
+    original = index_entry(dedup, TEXT)
+
+    assert dedup.find(dedup.fingerprint(TEXT.upper())) == DuplicateMatch(original, EXACT, 1.0)
+    near = dedup.find(dedup.fingerprint(NEAR_TEXT))
+    assert (near.entry_id, near.kind) == (original, NEAR)
+    assert dedup.similarity_threshold <= near.similarity < 1.0
+    assert dedup.find(dedup.fingerprint('an unrelated note about lunch')) is None
+    assert dedup.find(dedup.fingerprint(TEXT), exclude_id=original) is None
+
+
+def test_exact_copies_inherit_the_hash_when_the_first_copy_is_removed(dedup):
+    first = index_entry(dedup, TEXT)
+    second = index_entry(dedup, TEXT)
+    third = index_entry(dedup, TEXT)
+
+    dedup.remove([first])
+    db.session.commit()
+
+    assert dedup.find(dedup.fingerprint(TEXT)) == DuplicateMatch(second, EXACT, 1.0)
+    assert KnowledgeContentHash.query.filter_by(entry_id=third).one().duplicate_of == second
+    assert dedup.find(dedup.fingerprint(NEAR_TEXT)).entry_id == second
+    assert dedup.distinct([third, second]) == [third]
+
+
+def test_merge_unions_tags_and_keeps_existing_metadata(dedup):
+    entry = add_entry(TEXT, tags='["a"]', confidence_score=0.4, meta_data='{"source": "old"}')
+
+    dedup.merge(entry, ['b', 'a'], 0.9, {'source': 'new', 'lang': 'en'})
+
+    assert json.loads(entry.tags) == ['a', 'b']
+    assert entry.confidence_score == 0.9
+    assert json.loads(entry.meta_data) == {'source': 'old', 'lang': 'en'}
+    dedup.merge(entry, confidence_score=0.1)
+    assert entry.confidence_score == 0.9
+
+
+def test_backfill_indexes_old_entries_and_links_copies_within_a_batch(dedup):
+    add_entry(TEXT)
+    add_entry(TEXT)
+    add_entry('an unrelated note about lunch')
+    db.session.commit()
+
+    result = dedup.backfill(batch_size=2)
+
+    assert (result['indexed'], result['duplicates']) == (3, 1)
+    assert dedup.distinct([1, 2, 3]) == [1, 3]
+    assert dedup.backfill()['indexed'] == 0
+
+
+def test_policy_overrides_and_environment(monkeypatch):
+    monkeypatch.setenv('MANUS_KNOWLEDGE_DEDUP_ADD', 'reject')
+    dedup = KnowledgeDeduplicator()
+
+    assert dedup.policy('add') == REJECT
+    assert dedup.policy('add', MERGE) == MERGE
+    with pytest.raises(ValueError):
+        dedup.policy('add', 'ignore')
+
+
+def test_add_endpoint_applies_each_policy(client):
+    body = {'category': 'notes', 'title': 'retries', 'content': TEXT, 'tags': ['a'], 'confidence_score': 0.5}
+    original = client.post('/knowledge', json=body).get_json()['id']
+
+    allowed = client.post('/knowledge', json={**body, 'content': TEXT.upper()})
+    rejected = client.post('/knowledge?dedup=reject', json=body)
+    merged = client.post('/knowledge?dedup=merge', json={**body, 'tags': ['b'], 'confidence_score': 0.8})
+
+    assert allowed.status_code == 201
+    assert allowed.get_json()['duplicate'] == {'duplicate_of': original, 'kind': EXACT, 'similarity': 1.0}
+    assert rejected.status_code == 409 and rejected.get_json()['duplicate_of'] == original
+    assert merged.status_code == 200
+    assert (merged.get_json()['id'], merged.get_json()['tags']) == (original, ['a', 'b'])
+    assert merged.get_json()['confidence_score'] == 0.8
+    assert client.get('/knowledge').get_json()['total'] == 2
+    assert client.post('/knowledge?dedup=ignore', json=body).status_code == 400
+
+
+def test_update_endpoint_rejects_content_copied_from_another_entry(client):
+    client.post('/knowledge', json={'category': 'notes', 'title': 'retries', 'content': TEXT})
+    other = client.post('/knowledge', json={'category': 'notes', 'title': 'lunch',
+                                            'content': 'an unrelated note about lunch'}).get_json()['id']
+
+    assert client.put(f'/knowledge/{other}', json={'content': TEXT}).status_code == 409
+    assert client.put(f'/knowledge/{other}?dedup=merge', json={'content': TEXT}).status_code == 400
+    assert client.put(f'/knowledge/{other}?dedup=allow', json={'content': TEXT}).status_code == 200
+
+
+def test_bulk_ingest_merges_into_existing_entries_and_earlier_lines(app):
+    existing_id = add_entry(TEXT, tags='["a"]').id
+    db.session.commit()
+    KnowledgeDeduplicator().backfill()
+    lines = [
+        {'category': 'notes', 'title': 'copy', 'content': TEXT, 'tags': ['b']},
+        {'category': 'notes', 'title': 'fresh', 'content': 'an unrelated note about lunch', 'tags': ['x']},
+        {'category': 'notes', 'title': 'fresh copy', 'content': 'An unrelated  note about lunch', 'tags': ['y'],
+         'confidence_score': 0.3},
+    ]
+    body = b''.join(json.dumps(line).encode('utf-8') + b'\n' for line in lines)
+
+    result = KnowledgeBulkIngestor().ingest(io.BytesIO(body), policy=MERGE)
+
+    assert (result['inserted'], result['merged'], result['duplicates']) == (1, 2, 2)
+    db.session.expire_all()
+    assert json.loads(db.session.get(KnowledgeEntry, existing_id).tags) == ['a', 'b']
+    fresh = KnowledgeEntry.query.filter_by(title='fresh').one()
+    assert json.loads(fresh.tags) == ['x', 'y']
+    assert fresh.confidence_score == 1.0
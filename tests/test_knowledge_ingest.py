@@ -0,0 +1,98 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from src.models.knowledge_base import KnowledgeEntry
+from backend.knowledge_ingest import EntryValidationError, KnowledgeBulkIngestor, validate_entry
+from backend.knowledge_dedup import ALLOW
+
+
+def ndjson(*items):
+    return b''.join((item if isinstance(item, bytes) else json.dumps(item).encode('utf-8')) + b'\n'
+                    for item in items)
+
+
+def entry(i, **extra):
+    return {'category': 'notes', 'title': f'entry {i}', 'content': f'distinct body number {i} ' * 3, **extra}
+
+
+@pytest.mark.parametrize('item, message', [
+    (['not', 'an', 'object'], 'not a JSON object'),
+    ({'category': 'notes', 'title': 't'}, 'Missing required fields: content'),
+    ({'category': 'notes', 'title': 7, 'content': 'c'}, 'title must be a string'),
+    ({'category': 'notes', 'title': 't', 'content': 'c', 'tags': 'a,b'}, 'tags must be an array'),
+    ({'category': 'notes', 'title': 't', 'content': 'c', 'confidence_score': True}, 'must be a number'),
+])
+def test_validate_entry_rejects_malformed_lines(item, message):
+    with pytest.raises(EntryValidationError, match=message):
+        validate_entry(item)
+
+
+def test_ingest_inserts_in_batches_and_reports_bad_lines(app):
+    body = ndjson(entry(1, tags=['a']), b'{broken', entry(2), b'', {'title': 'no body'}, entry(3))
+
+    result = KnowledgeBulkIngestor(batch_size=2).ingest(io.BytesIO(body), policy=ALLOW)
+
+    assert (result['inserted'], result['failed'], result['lines']) == (3, 2, 5)
+    assert [error['line'] for error in result['errors']] == [2, 5]
+    assert sorted(entry.title for entry in KnowledgeEntry.query.all()) == ['entry 1', 'entry 2', 'entry 3']
+
+
+def test_overlong_lines_are_skipped_without_losing_the_next_line(app):
+    body = ndjson(entry(1, content='x' * 500), entry(2))
+
+    result = KnowledgeBulkIngestor(max_line_bytes=200).ingest(io.BytesIO(body), policy=ALLOW)
+
+    assert result['inserted'] == 1
+    assert result['errors'] == [{'line': 1, 'error': 'Line exceeds 200 bytes'}]
+
+
+def test_error_reports_are_capped(app):
+    body = ndjson(*[b'{broken'] * 5)
+
+    result = KnowledgeBulkIngestor(max_reported_errors=2).ingest(io.BytesIO(body))
+
+    assert result['failed'] == 5
+    assert len(result['errors']) == 2 and result['errors_truncated']
+
+
+def test_gzip_bodies_and_truncated_payloads(app):
+    compressed = gzip.compress(ndjson(entry(1), entry(2)))
+
+    assert KnowledgeBulkIngestor().ingest(io.BytesIO(compressed), compressed=True, policy=ALLOW)['inserted'] == 2
+
+    result = KnowledgeBulkIngestor().ingest(io.BytesIO(compressed[:-10]), compressed=True, policy=ALLOW)
+    assert 'body_error' in result
+
+
+def test_failed_batch_is_retried_row_by_row(app, monkeypatch):
+    ingestor = KnowledgeBulkIngestor(batch_size=10)
+    apply = ingestor._apply
+
+    def fail_for_poison(inserts, merges):
+        apply(inserts, merges)
+        if any(line.values['title'] == 'poison' for line in inserts):
+            raise RuntimeError('constraint violated')
+
+    monkeypatch.setattr(ingestor, '_apply', fail_for_poison)
+    body = ndjson(entry(1), entry(2, title='poison'), entry(3))
+
+    result = ingestor.ingest(io.BytesIO(body), policy=ALLOW)
+
+    assert result['inserted'] == 2
+    assert [error['line'] for error in result['errors']] == [2]
+    assert sorted(entry.title for entry in KnowledgeEntry.query.all()) == ['entry 1', 'entry 3']
+
+
+def test_bulk_endpoint_accepts_gzip_ndjson(client):
+    body = gzip.compress(ndjson(entry(1), entry(2)))
+
+    response = client.post('/knowledge/bulk?dedup=allow', data=body,
+                           headers={'Content-Type': 'application/x-ndjson', 'Content-Encoding': 'gzip'})
+
+    assert response.status_code == 200
+    assert response.get_json()['inserted'] == 2
+    assert response.get_json()['success'] is True
+    assert client.get('/knowledge').get_json()['total'] == 2
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.knowledge_base import db, KnowledgeEntry
+from src.models.knowledge_models import KnowledgeTombstone
+from backend.knowledge_snapshot import KnowledgeSnapshotStore
+
+BUILT_BEFORE = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def store(app, tmp_path):
+    return KnowledgeSnapshotStore(path=str(tmp_path / 'knowledge.snapshot'), check_interval=0, grace_seconds=0)
+
+
+def add_entry(client, title, content, confidence_score=1.0):
+    response = client.post('/knowledge', json={'category': 'notes', 'title': title, 'content': content,
+                                               'confidence_score': confidence_score})
+    return response.get_json()['id']
+
+
+def backdate():
+    """Move every entry before the snapshot watermark, so only the file serves them"""
+    db.session.execute(KnowledgeEntry.__table__.update().values(updated_at=BUILT_BEFORE))
+    db.session.commit()
+
+
+def titles(results):
+    return [result['title'] for result in results]
+
+
+def test_search_ranks_by_overlap_then_confidence(client, store):
+    add_entry(client, 'partial', 'Database connection pooling.', confidence_score=0.9)
+    add_entry(client, 'full', 'Database connection pooling with retries.', confidence_score=0.5)
+    add_entry(client, 'confident', 'Database connection pooling notes.', confidence_score=0.95)
+    add_entry(client, 'unrelated', 'Lunch menu for Friday.')
+    backdate()
+
+    result = store.build()
+    found = store.search('database connection retries')
+
+    assert (result['entries'], result['success']) == (4, True)
+    assert titles(found) == ['full', 'confident', 'partial']
+    assert found[0] == {'id': 2, 'title': 'full', 'snippet': 'Database connection pooling with retries.',
+                        'confidence_score': 0.5}
+    assert store.search('the of and') == []
+    assert store.get_stats()['delta_rows'] == 0
+
+
+def test_duplicate_groups_are_served_once(client, store):
+    add_entry(client, 'first', 'Database connection pooling.')
+    add_entry(client, 'copy', 'database  connection pooling.')
+    backdate()
+    store.build()
+
+    assert titles(store.search('database connection')) == ['first']
+
+
+def test_delta_overlays_writes_and_deletes_since_the_build(client, store):
+    add_entry(client, 'kept', 'Database connection pooling.')
+    edited = add_entry(client, 'edited', 'Database connection pooling tuned.')
+    deleted = add_entry(client, 'deleted', 'Database connection pooling removed.')
+    backdate()
+    store.build()
+
+    add_entry(client, 'new', 'Database connection pooling added later.', confidence_score=0.1)
+    client.put(f'/knowledge/{edited}', json={'title': 'edited again', 'content': 'Cache warming only.'})
+    client.delete(f'/knowledge/{deleted}')
+
+    assert titles(store.search('database connection')) == ['kept', 'new']
+    assert titles(store.search('cache warming')) == ['edited again']
+    assert store.get_stats()['delta_rows'] == 2
+
+
+def test_falls_back_without_a_snapshot_or_with_an_oversized_delta(client, tmp_path):
+    missing = KnowledgeSnapshotStore(path=str(tmp_path / 'missing'), check_interval=0)
+    assert missing.search('database connection') is None
+
+    store = KnowledgeSnapshotStore(path=str(tmp_path / 'small'), check_interval=0, grace_seconds=0,
+                                   max_delta_rows=1)
+    add_entry(client, 'old', 'Database connection pooling.')
+    backdate()
+    store.build()
+    add_entry(client, 'one', 'Database connection one.')
+    assert titles(store.search('database connection')) == ['old', 'one']
+
+    add_entry(client, 'two', 'Database connection two.')
+    assert store.search('database connection') is None
+    assert store.get_stats()['fallbacks'] == 1
+
+
+def test_republished_snapshot_is_remapped_and_prunes_old_tombstones(client, store):
+    add_entry(client, 'old', 'Database connection pooling.')
+    backdate()
+    store.build()
+    store.search('database connection')
+    add_entry(client, 'new', 'Database connection added.')
+    db.session.add(KnowledgeTombstone(entry_id=99, deleted_at=datetime.utcnow() - timedelta(days=3)))
+    db.session.commit()
+    backdate()
+
+    result = store.build()
+
+    assert result['tombstones_pruned'] == 1
+    assert titles(store.search('database connection')) == ['old', 'new']
+    assert store.get_stats()['reloads'] == 2
+    assert store.get_stats()['entries'] == 2
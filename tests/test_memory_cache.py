@@ -0,0 +1,146 @@
+import threading
+
+from backend.memory_cache import SessionContextCache
+
+
+class FakeStore:
+    """Short-term memory rows per session, newest first, as a worker's database sees them"""
+
+    def __init__(self):
+        self.rows = {}
+        self.next_id = 1
+        self.loads = 0
+
+    def add(self, session_id):
+        memory = {'id': self.next_id, 'session_id': session_id}
+        self.next_id += 1
+        self.rows.setdefault(session_id, []).insert(0, memory)
+        return memory
+
+    def load(self, session_id, limit):
+        self.loads += 1
+        return list(self.rows.get(session_id, [])[:limit])
+
+    def version(self, session_id):
+        rows = self.rows.get(session_id, [])
+        return len(rows), max((row['id'] for row in rows), default=None)
+
+
+def test_second_read_is_served_from_cache():
+    store = FakeStore()
+    store.add('s1')
+    cache = SessionContextCache()
+
+    first = cache.get_recent('s1', store.load, store.version)
+    second = cache.get_recent('s1', store.load, store.version)
+
+    assert first == second == store.rows['s1']
+    assert store.loads == 1
+    assert cache.get_stats()['hits'] == 1
+    assert cache.get_stats()['misses'] == 1
+
+
+def test_record_writes_through_and_keeps_the_cache_valid():
+    store = FakeStore()
+    cache = SessionContextCache(per_session_limit=2, revalidate_seconds=0)
+    cache.get_recent('s1', store.load, store.version)
+
+    for _ in range(3):
+        cache.record('s1', store.add('s1'))
+
+    assert cache.get_recent('s1', store.load, store.version) == store.rows['s1'][:2]
+    assert store.loads == 1
+    assert cache.get_stats()['stale'] == 0
+
+
+def test_write_from_another_worker_is_picked_up_on_revalidation():
+    store = FakeStore()
+    store.add('s1')
+    cache = SessionContextCache(revalidate_seconds=0)
+    cache.get_recent('s1', store.load, store.version)
+
+    store.add('s1')  # committed by another worker, never recorded here
+
+    assert cache.get_recent('s1', store.load, store.version) == store.rows['s1']
+    assert store.loads == 2
+    assert cache.get_stats()['stale'] == 1
+
+
+def test_sweep_from_another_worker_is_picked_up_on_revalidation():
+    store = FakeStore()
+    store.add('s1')
+    store.add('s1')
+    cache = SessionContextCache(revalidate_seconds=0)
+    cache.get_recent('s1', store.load, store.version)
+
+    store.rows['s1'].pop()  # oldest row swept elsewhere
+
+    assert cache.get_recent('s1', store.load, store.version) == store.rows['s1']
+    assert store.loads == 2
+
+
+def test_fresh_entries_skip_the_probe():
+    store = FakeStore()
+    store.add('s1')
+    cache = SessionContextCache(revalidate_seconds=60)
+    cache.get_recent('s1', store.load, store.version)
+
+    store.add('s1')
+
+    assert len(cache.get_recent('s1', store.load, store.version)) == 1
+    assert cache.get_stats()['revalidations'] == 0
+
+
+def test_least_recently_used_session_is_evicted():
+    store = FakeStore()
+    for session_id in ('s1', 's2', 's3'):
+        store.add(session_id)
+    cache = SessionContextCache(max_entries=2)
+
+    cache.get_recent('s1', store.load)
+    cache.get_recent('s2', store.load)
+    cache.get_recent('s1', store.load)
+    cache.get_recent('s3', store.load)
+
+    assert cache.get_stats()['evictions'] == 1
+    cache.get_recent('s1', store.load)
+    assert store.loads == 3
+    cache.get_recent('s2', store.load)
+    assert store.loads == 4
+
+
+def test_invalidate_forces_a_reload():
+    store = FakeStore()
+    store.add('s1')
+    cache = SessionContextCache()
+    cache.get_recent('s1', store.load)
+
+    cache.invalidate('s1')
+    cache.get_recent('s1', store.load)
+
+    assert store.loads == 2
+    assert cache.get_stats()['entries'] == 1
+
+
+def test_write_during_load_does_not_cache_the_stale_read():
+    store = FakeStore()
+    store.add('s1')
+    cache = SessionContextCache()
+    loading = threading.Event()
+    release = threading.Event()
+
+    def slow_load(session_id, limit):
+        rows = store.load(session_id, limit)
+        loading.set()
+        release.wait(5)
+        return rows
+
+    reader = threading.Thread(target=cache.get_recent, args=('s1', slow_load))
+    reader.start()
+    loading.wait(5)
+    cache.record('s1', store.add('s1'))
+    release.set()
+    reader.join(5)
+
+    assert cache.get_recent('s1', store.load) == store.rows['s1']
+    assert store.loads == 2
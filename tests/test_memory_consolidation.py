@@ -0,0 +1,66 @@
+import json
+
+from src.models.memory_system import db, LongTermMemory, ConsolidationCheckpoint
+from backend.memory_consolidation import MemoryConsolidator
+from backend.tag_index import tag_index, LONG_TERM_MEMORY
+
+
+def add_pattern(content, tags=(), importance=1.0, memory_type='pattern'):
+    memory = LongTermMemory(memory_type=memory_type, title='Query pattern', content=content,
+                            importance_score=importance, tags=json.dumps(list(tags)))
+    db.session.add(memory)
+    db.session.commit()
+    return memory.id
+
+
+def test_near_duplicates_merge_into_the_oldest(app):
+    survivor = add_pattern('what is the meaning of life and everything in the universe', tags=['life'])
+    add_pattern('what is the meaning of life and everything in the universe please', tags=['universe'],
+                importance=3.0)
+    other = add_pattern('totally different topic about quantum biology research')
+
+    result = MemoryConsolidator().run()
+
+    assert result['merged'] == 1
+    assert {memory.id for memory in LongTermMemory.query.all()} == {survivor, other}
+    merged = db.session.get(LongTermMemory, survivor)
+    assert merged.consolidation_score > 0
+    assert merged.importance_score == 3.0
+    assert json.loads(merged.tags) == ['life', 'universe']
+    assert tag_index.tags_for(LONG_TERM_MEMORY, survivor) == ['life', 'universe']
+
+
+def test_other_memory_types_are_left_alone(app):
+    add_pattern('what is the meaning of life and everything in the universe', memory_type='insight')
+    add_pattern('what is the meaning of life and everything in the universe', memory_type='insight')
+
+    assert MemoryConsolidator().run()['processed'] == 0
+    assert LongTermMemory.query.count() == 2
+
+
+def test_runs_resume_from_the_checkpoint(app):
+    for _ in range(5):
+        add_pattern('what is the meaning of life and everything in the universe')
+
+    consolidator = MemoryConsolidator(batch_size=2)
+    first = consolidator.run(max_batches=1)
+    second = consolidator.run()
+
+    assert first['processed'] == 2 and not first['caught_up']
+    assert second['processed'] == 3 and second['caught_up']
+    assert LongTermMemory.query.count() == 1
+    checkpoint = ConsolidationCheckpoint.query.filter_by(job_name=MemoryConsolidator.JOB_NAME).one()
+    assert checkpoint.processed_count == 5
+    assert checkpoint.merged_count == 4
+
+    add_pattern('what is the meaning of life and everything in the universe')
+    assert consolidator.run()['merged'] == 1
+
+
+def test_should_stop_ends_the_run_between_batches(app):
+    for i in range(4):
+        add_pattern(f'distinct memory number {i} about topic {i * 17}')
+
+    result = MemoryConsolidator(batch_size=1).run(should_stop=lambda: True)
+
+    assert result['batches'] == 0
@@ -0,0 +1,80 @@
+import json
+
+from src.models.memory_system import db, LongTermMemory, MemoryAssociation
+from backend.memory_graph import MemoryGraph, LONG_TERM_MEMORY, KNOWLEDGE
+
+LTM = LONG_TERM_MEMORY
+
+
+def add_memory(title, related=None):
+    memory = LongTermMemory(memory_type='insight', title=title, content=f'{title} content',
+                            related_memories=json.dumps(related) if related is not None else None)
+    db.session.add(memory)
+    db.session.commit()
+    return memory.id
+
+
+def chain(graph, *ids, weight=1.0):
+    for source, target in zip(ids, ids[1:]):
+        graph.add_association(LTM, source, LTM, target, weight=weight)
+    db.session.commit()
+
+
+def test_neighborhood_walks_edges_both_ways_up_to_k_hops(app):
+    graph = MemoryGraph()
+    chain(graph, 1, 2, 3, 4)
+
+    nodes = graph.neighborhood([(LTM, 2)], hops=2)
+
+    assert {node['id']: node['depth'] for node in nodes} == {1: 1, 3: 1, 4: 2}
+    assert nodes[-1]['id'] == 4
+    assert {node['id'] for node in graph.neighborhood([(LTM, 2)], hops=1)} == {1, 3}
+
+
+def test_path_weight_is_the_product_of_edge_weights(app):
+    graph = MemoryGraph()
+    graph.add_association(LTM, 1, LTM, 2, weight=0.5)
+    graph.add_association(LTM, 2, LTM, 3, weight=0.5)
+    graph.add_association(LTM, 1, KNOWLEDGE, 7, weight=0.9)
+    db.session.commit()
+
+    nodes = {(node['type'], node['id']): node['weight'] for node in graph.neighborhood([(LTM, 1)], hops=2)}
+
+    assert nodes == {(LTM, 2): 0.5, (LTM, 3): 0.25, (KNOWLEDGE, 7): 0.9}
+    assert graph.neighborhood([(LTM, 1)], hops=2, min_weight=0.6) == [
+        {'type': KNOWLEDGE, 'id': 7, 'depth': 1, 'weight': 0.9}
+    ]
+
+
+def test_repeated_associations_strengthen_one_edge(app):
+    graph = MemoryGraph()
+    graph.add_association(LTM, 1, LTM, 2, weight=0.3)
+    graph.add_association(LTM, 1, LTM, 2, weight=0.8)
+    graph.add_association(LTM, 1, LTM, 2, weight=0.5)
+    db.session.commit()
+
+    assert [edge.weight for edge in MemoryAssociation.query.all()] == [0.8]
+
+
+def test_merge_node_moves_edges_onto_the_survivor(app):
+    graph = MemoryGraph()
+    chain(graph, 1, 2, 3)
+
+    graph.merge_node(LTM, 2, 1)
+    db.session.commit()
+
+    edges = {(edge.source_id, edge.target_id) for edge in MemoryAssociation.query.all()}
+    assert edges == {(1, 3)}
+
+
+def test_related_memories_loads_titles_and_backfill_reads_legacy_json(app):
+    first = add_memory('first')
+    second = add_memory('second', related=[first])
+    add_memory('third', related=[second, second, 999, 'x'])
+    graph = MemoryGraph()
+
+    assert graph.backfill(batch_size=1) == {'success': True, 'edges': 3}
+    assert graph.backfill()['edges'] == 0
+
+    related = graph.related_memories([(LTM, first)], hops=2, min_weight=0.0)
+    assert [memory['title'] for memory in related] == ['second', 'third']
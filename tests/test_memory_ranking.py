@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.memory_system import db, LongTermMemory
+from backend.memory_ranking import MemoryRankingEngine
+
+NOW = datetime(2026, 6, 1)
+
+
+def add_memory(importance, reinforced_days_ago=0.0, consolidation=0.0):
+    memory = LongTermMemory(memory_type='insight', title='Title', content='Content',
+                            importance_score=importance, consolidation_score=consolidation,
+                            last_reinforced=NOW - timedelta(days=reinforced_days_ago))
+    db.session.add(memory)
+    db.session.commit()
+    return memory.id
+
+
+def test_scores_decay_with_the_half_life(app):
+    fresh = add_memory(1.0)
+    old = add_memory(1.0, reinforced_days_ago=30)
+    consolidated = add_memory(0.0, consolidation=0.5)
+    ranker = MemoryRankingEngine(half_life_days=30, consolidation_weight=0.5)
+
+    scores = dict(ranker.top_k(k=3, now=NOW))
+
+    assert scores[fresh] == pytest.approx(1.0)
+    assert scores[old] == pytest.approx(0.5)
+    assert scores[consolidated] == pytest.approx(0.25)
+
+
+def test_top_k_orders_and_limits_candidates(app):
+    ids = [add_memory(importance) for importance in (0.2, 0.9, 0.5, 0.7)]
+    ranker = MemoryRankingEngine()
+
+    assert [memory_id for memory_id, _ in ranker.top_k(k=2, now=NOW)] == [ids[1], ids[3]]
+    assert [memory_id for memory_id, _ in ranker.top_k(k=5, candidate_ids=[ids[0], ids[2]], now=NOW)] == \
+        [ids[2], ids[0]]
+    assert ranker.top_k(k=0) == []
+
+
+def test_candidates_are_paged_in_without_a_full_load(app):
+    ids = [add_memory(0.5) for _ in range(3)]
+    ranker = MemoryRankingEngine()
+
+    ranker.top_k(k=1, candidate_ids=[ids[0]], now=NOW)
+
+    assert ranker.get_stats()['loaded'] is False
+    assert ranker.get_stats()['memories'] == 1
+
+
+def test_reinforcement_is_written_back_in_bulk(app):
+    memory_id = add_memory(0.5, reinforced_days_ago=10)
+    ranker = MemoryRankingEngine(reinforcement_rate=0.1)
+
+    ranker.reinforce([memory_id, 12345], now=NOW)
+
+    assert ranker.flush() == 1
+    assert ranker.flush() == 0
+    db.session.expire_all()
+    memory = db.session.get(LongTermMemory, memory_id)
+    assert memory.importance_score == pytest.approx(0.55)
+    assert memory.last_reinforced == NOW
+
+
+def test_reload_keeps_reinforcement_that_was_not_written_yet(app):
+    memory_id = add_memory(0.5)
+    ranker = MemoryRankingEngine(reinforcement_rate=0.5)
+    ranker.load()
+
+    ranker.reinforce([memory_id], now=NOW)
+    ranker.load()
+
+    assert dict(ranker.top_k(k=1, now=NOW))[memory_id] == pytest.approx(0.75)
+    assert ranker.get_stats()['dirty'] == 1
+
+
+def test_removed_memories_drop_out_of_the_ranking(app):
+    kept = add_memory(0.1)
+    removed = add_memory(0.9)
+    ranker = MemoryRankingEngine()
+    ranker.load()
+
+    ranker.remove([removed])
+
+    assert [memory_id for memory_id, _ in ranker.top_k(k=5, now=NOW)] == [kept]
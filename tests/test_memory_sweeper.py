@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from src.models.memory_system import db, ShortTermMemory
+from backend.error_aggregator import error_aggregator
+from backend.memory_cache import session_context_cache
+from backend.memory_ranking import memory_ranker
+from backend.memory_sweeper import ShortTermMemorySweeper, memory_sweeper
+from backend.skill_usage import skill_usage
+
+
+def add_memory(session_id='s1', context_type='conversation', expires_at=None, created_at=None):
+    memory = ShortTermMemory(session_id=session_id, context_type=context_type, content='turn',
+                             expires_at=expires_at, created_at=created_at or datetime.utcnow())
+    db.session.add(memory)
+    db.session.commit()
+    return memory.id
+
+
+def test_expiry_follows_the_context_type_policy():
+    sweeper = ShortTermMemorySweeper(ttl_policy={'task': timedelta(days=7), 'system': None})
+    created_at = datetime(2026, 1, 1)
+
+    assert sweeper.expiry_for('task', created_at) == datetime(2026, 1, 8)
+    assert sweeper.expiry_for('system', created_at) is None
+    assert sweeper.expiry_for('unknown', created_at) == datetime(2026, 1, 2)
+
+
+def test_sweep_deletes_only_expired_rows_in_capped_batches(app):
+    past = datetime.utcnow() - timedelta(minutes=1)
+    for _ in range(5):
+        add_memory(expires_at=past)
+    kept = add_memory(expires_at=datetime.utcnow() + timedelta(hours=1))
+    sweeper = ShortTermMemorySweeper(batch_size=2, max_batches_per_run=2, batch_pause=0)
+
+    first = sweeper.sweep()
+    second = sweeper.sweep()
+
+    assert (first['reclaimed'], first['batches']) == (4, 2)
+    assert second['reclaimed'] == 1
+    assert [memory.id for memory in ShortTermMemory.query.all()] == [kept]
+    assert sweeper.get_stats()['rows_reclaimed'] == 5
+
+
+def test_sweep_backfills_rows_written_before_the_policy(app):
+    old = datetime.utcnow() - timedelta(days=2)
+    expired = add_memory(context_type='conversation', created_at=old)
+    never = add_memory(context_type='system', created_at=old)
+    sweeper = ShortTermMemorySweeper(ttl_policy={'conversation': timedelta(hours=24), 'system': None},
+                                     batch_pause=0)
+
+    result = sweeper.sweep()
+
+    assert result['backfilled'] == 1
+    assert result['reclaimed'] == 1
+    assert db.session.get(ShortTermMemory, expired) is None
+    assert db.session.get(ShortTermMemory, never).expires_at is None
+
+
+def test_sweep_invalidates_cached_sessions(app):
+    add_memory(session_id='swept', expires_at=datetime.utcnow() - timedelta(minutes=1))
+    session_context_cache.get_recent('swept', lambda session_id, limit: [{'id': 1}])
+
+    ShortTermMemorySweeper(batch_pause=0).sweep()
+
+    assert session_context_cache.get_recent('swept', lambda session_id, limit: []) == []
+
+
+def test_registering_the_knowledge_api_starts_the_sweeper(app):
+    from backend.knowledge_api import knowledge_bp
+
+    app.register_blueprint(knowledge_bp)
+    try:
+        assert memory_sweeper.get_stats()['running']
+    finally:
+        for job in (error_aggregator, memory_ranker, memory_sweeper, skill_usage):
+            job.stop()
+
+    assert not memory_sweeper.get_stats()['running']
@@ -0,0 +1,51 @@
+import pytest
+
+from backend.metrics import MetricsCollector
+
+
+def test_histograms_are_cumulative():
+    collector = MetricsCollector(buckets=(0.1, 1.0))
+    collector.observe('retrieval', 0.05)
+    collector.observe('retrieval', 0.5)
+    collector.observe('retrieval', 5.0)
+
+    text = collector.render_prometheus()
+
+    assert 'manus_stage_duration_seconds_bucket{stage="retrieval",le="0.1"} 1' in text
+    assert 'manus_stage_duration_seconds_bucket{stage="retrieval",le="1.0"} 2' in text
+    assert 'manus_stage_duration_seconds_bucket{stage="retrieval",le="+Inf"} 3' in text
+    assert 'manus_stage_duration_seconds_count{stage="retrieval"} 3' in text
+
+
+def test_gauges_and_counters_are_typed():
+    collector = MetricsCollector()
+    collector.register_gauge('manus_entries', 'Entries held', lambda: 4)
+    collector.register_counter('manus_hits_total', 'Hits served', lambda: 7)
+
+    lines = collector.render_prometheus().splitlines()
+
+    assert lines[lines.index('# TYPE manus_entries gauge') + 1] == 'manus_entries 4.0'
+    assert lines[lines.index('# TYPE manus_hits_total counter') + 1] == 'manus_hits_total 7.0'
+
+
+def test_counter_names_need_the_total_suffix():
+    with pytest.raises(ValueError):
+        MetricsCollector().register_counter('manus_hits', 'Hits served', lambda: 0)
+
+
+def test_failing_callbacks_are_left_out_of_the_scrape():
+    collector = MetricsCollector()
+    collector.register_counter('manus_broken_total', 'Always fails', lambda: 1 / 0)
+
+    assert 'manus_broken_total' not in collector.render_prometheus()
+
+
+def test_exported_monotonic_values_are_counters():
+    from backend.metrics_api import metrics_collector
+
+    text = metrics_collector.render_prometheus()
+
+    for name in ('manus_short_term_memory_reclaimed_rows_total', 'manus_http_not_modified_responses_total',
+                 'manus_http_body_cache_hits_total'):
+        assert f'# TYPE {name} counter' in text
+    assert '# TYPE manus_context_cache_entries gauge' in text
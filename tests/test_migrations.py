@@ -0,0 +1,32 @@
+from sqlalchemy import create_engine, inspect, text
+
+import pytest
+
+from backend.migrations import HOT_QUERIES, check_query_plans, migrate
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'manus.db'}")
+    migrate(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_migrate_builds_indexes_missing_from_existing_tables(engine):
+    with engine.begin() as conn:
+        conn.execute(text('DROP INDEX ix_short_term_memory_session_accessed'))
+
+    result = migrate(engine)
+
+    assert result == {'created_tables': [], 'created_indexes': ['ix_short_term_memory_session_accessed']}
+    indexes = {index['name'] for index in inspect(engine).get_indexes('short_term_memory')}
+    assert 'ix_short_term_memory_session_accessed' in indexes
+    assert migrate(engine) == {'created_tables': [], 'created_indexes': []}
+
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_uses_its_index(engine, name):
+    result = check_query_plans(engine)[name]
+
+    assert result['uses_index'], f"{name} does not use {result['expected_index']}:\n{result['plan']}"
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pytest
+
+from src.models.knowledge_base import db, KnowledgeEntry
+from backend.pagination import CountCache, InvalidCursor, decode_cursor, encode_cursor, keyset_page, count_cache
+
+STAMP = datetime(2026, 5, 1, 12, 0)
+
+
+@pytest.fixture(autouse=True)
+def fresh_counts():
+    count_cache.invalidate(KnowledgeEntry.__tablename__)
+    yield
+    count_cache.invalidate(KnowledgeEntry.__tablename__)
+
+
+def add_entries(stamps):
+    entries = [KnowledgeEntry(category='notes', title=f'entry {i}', content=f'body {i}', updated_at=stamp)
+               for i, stamp in enumerate(stamps)]
+    db.session.add_all(entries)
+    db.session.commit()
+    # The column default replaces None on insert
+    ids = [entry.id for entry in entries]
+    null_ids = [entry_id for entry_id, stamp in zip(ids, stamps) if stamp is None]
+    if null_ids:
+        db.session.execute(KnowledgeEntry.__table__.update().where(KnowledgeEntry.id.in_(null_ids))
+                           .values(updated_at=None))
+        db.session.commit()
+    return ids
+
+
+def walk(limit):
+    query = db.session.query(KnowledgeEntry.updated_at, KnowledgeEntry.id)
+    seen, cursor = [], None
+    while True:
+        rows, cursor = keyset_page(query, KnowledgeEntry.updated_at, KnowledgeEntry.id, cursor, limit, 0, 1)
+        seen.extend(row[1] for row in rows)
+        if cursor is None:
+            return seen
+
+
+def test_cursor_round_trip_and_rejection():
+    assert decode_cursor(encode_cursor(STAMP, 7)) == (STAMP, 7)
+    assert decode_cursor(encode_cursor(None, 3)) == (None, 3)
+    for token in ('garbage', encode_cursor(STAMP, 7)[:-4], 'WzIsbnVsbCwxXQ'):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(token)
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 10])
+def test_pages_cover_ties_and_null_sort_values_exactly_once(app, limit):
+    ids = add_entries([STAMP, STAMP, STAMP, datetime(2026, 6, 1), None, None])
+    expected = [ids[3], ids[2], ids[1], ids[0], ids[5], ids[4]]
+
+    assert walk(limit) == expected
+
+
+def test_count_cache_serves_totals_until_invalidated(app):
+    add_entries([STAMP, STAMP])
+    cache = CountCache(ttl=60)
+    query = KnowledgeEntry.query
+
+    assert cache.count('knowledge_entries', {}, query) == {'total': 2, 'total_source': 'exact'}
+    add_entries([STAMP])
+    assert cache.count('knowledge_entries', {}, query) == {'total': 2, 'total_source': 'cached'}
+    assert cache.count('knowledge_entries', {}, query, 'exact')['total'] == 3
+    cache.invalidate('knowledge_entries')
+    assert cache.count('knowledge_entries', {'category': None}, query)['total'] == 3
+    assert cache.count('knowledge_entries', {}, query, 'none') == {}
+
+
+def test_listing_follows_next_cursor(client):
+    for i in range(5):
+        client.post('/knowledge', json={'category': 'notes', 'title': f'entry {i}', 'content': f'body number {i}'})
+
+    first = client.get('/knowledge?limit=2').get_json()
+    second = client.get(f"/knowledge?limit=2&cursor={first['next_cursor']}").get_json()
+    third = client.get(f"/knowledge?limit=2&cursor={second['next_cursor']}").get_json()
+
+    titles = [entry['title'] for page in (first, second, third) for entry in page['entries']]
+    assert titles == [f'entry {i}' for i in range(4, -1, -1)]
+    assert third['next_cursor'] is None
+    assert first['total'] == 5 and first['total_source'] == 'exact'
+    assert 'total' not in client.get('/knowledge?count=none').get_json()
+
+
+@pytest.mark.parametrize('query', ['offset=10', 'cursor=bogus', 'limit=0', 'count=approximate'])
+def test_listing_rejects_bad_paging_parameters(client, query):
+    response = client.get(f'/knowledge?{query}')
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
@@ -0,0 +1,57 @@
+import pytest
+
+from backend.search_index import normalize_text, stem, tokenize, search_index, KNOWLEDGE
+from src.models.knowledge_base import db, KnowledgeEntry
+
+
+@pytest.mark.parametrize('variant, plain', [
+    ('مُحَمَّد', 'محمد'),  # harakat
+    ('أحمد', 'احمد'),  # hamza on alef
+    ('إسلام', 'اسلام'),  # hamza under alef
+    ('آمن', 'امن'),  # madda
+    ('مدرسة', 'مدرسه'),  # teh marbuta
+    ('مستشفى', 'مستشفي'),  # alef maksura
+    ('كتـــاب', 'كتاب'),  # tatweel
+    ('٢٠٢٤', '2024'),  # Arabic-Indic digits
+    ('Café', 'cafe')
+])
+def test_normalize_text_folds_variants(variant, plain):
+    assert normalize_text(variant) == normalize_text(plain)
+
+
+@pytest.mark.parametrize('token, expected', [
+    ('البيت', 'بيت'),
+    ('والكتاب', 'كتاب'),
+    ('بالمدرسه', 'مدرسه'),
+    ('للطلاب', 'طلاب'),
+    ('house', 'house')
+])
+def test_stem_strips_attached_article(token, expected):
+    assert stem(token) == expected
+
+
+@pytest.mark.parametrize('word, unrelated', [
+    ('الله', 'له'),  # God / for him
+    ('الان', 'ان'),  # now / that
+    ('الهم', 'هم')  # worry / they
+])
+def test_short_article_words_do_not_collapse_onto_unrelated_words(word, unrelated):
+    assert stem(word) == word
+    assert tokenize(word) != tokenize(unrelated)
+
+
+def test_tokenize_drops_stopwords_only_when_asked():
+    assert tokenize('the quantum and the biology') == ['the', 'quantum', 'and', 'biology']
+    assert tokenize('the quantum and the biology', drop_stopwords=True) == ['quantum', 'biology']
+
+
+def test_index_matches_spelling_variants(app):
+    entry = KnowledgeEntry(category='c', title='الصّحة النفسية', content='أهمية النوم للطلاب')
+    db.session.add(entry)
+    db.session.flush()
+    search_index.set_text(KNOWLEDGE, entry.id, entry.title, entry.content)
+    db.session.commit()
+
+    for query in ('صحة', 'الصحه', 'اهميه', 'طلاب النوم'):
+        ids = [row[0] for row in db.session.query(search_index.ids_matching_all(KNOWLEDGE, query))]
+        assert ids == [entry.id], query
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from src.models.memory_system import db, LongTermMemory
+from backend import serializers
+from backend.serializers import long_term_memory_serializer, repair_json_columns
+
+
+def add_memory(**columns):
+    memory = LongTermMemory(memory_type='insight', title='Title', content='Content', **columns)
+    db.session.add(memory)
+    db.session.commit()
+    return memory
+
+
+@pytest.mark.parametrize('fragments', [True, False], ids=['orjson-fragments', 'spliced-text'])
+def test_encoded_rows_match_to_dict(app, monkeypatch, fragments):
+    if not fragments:
+        monkeypatch.setattr(serializers, '_FRAGMENT', None)
+    full = add_memory(context=json.dumps({'turn': 3}), tags=json.dumps(['arabic', 'نص']),
+                      related_memories=json.dumps([1, 2]))
+    empty = add_memory()
+
+    rows = long_term_memory_serializer.query().order_by(LongTermMemory.id).all()
+    encoded = json.loads(long_term_memory_serializer.encode_rows(rows))
+
+    assert encoded == [full.to_dict(), empty.to_dict()]
+    assert encoded[1]['tags'] == [] and encoded[1]['context'] == {}
+
+
+def test_records_decode_json_columns_on_access(app):
+    add_memory(tags=json.dumps(['a']), context=json.dumps({'k': 'v'}))
+    record = long_term_memory_serializer.records(long_term_memory_serializer.query().all())[0]
+
+    assert record.raw('tags') == '["a"]'
+    assert record['tags'] == ['a']
+    assert record['context'] == {'k': 'v'}
+    assert record['created_at'].startswith('20')
+    assert list(record) == long_term_memory_serializer.keys
+
+
+def test_encode_page_wraps_rows_with_extra_fields(app):
+    add_memory()
+    rows = long_term_memory_serializer.query().all()
+
+    page = json.loads(long_term_memory_serializer.encode_page('memories', rows, next_cursor=None, total=1))
+
+    assert list(page) == ['memories', 'next_cursor', 'total']
+    assert len(page['memories']) == 1
+
+
+def test_repair_replaces_malformed_json_once(app):
+    broken = add_memory(tags='not json', context='{"ok": true}')
+    fine = add_memory(tags='["kept"]')
+
+    assert repair_json_columns(batch_size=1)['long_term_memory'] == 1
+    assert repair_json_columns()['long_term_memory'] == 0
+
+    db.session.expire_all()
+    assert db.session.get(LongTermMemory, broken.id).tags == '[]'
+    assert db.session.get(LongTermMemory, broken.id).context == '{"ok": true}'
+    assert db.session.get(LongTermMemory, fine.id).tags == '["kept"]'
+
+
+def test_repair_endpoint_reports_repaired_columns(client):
+    add_memory(related_memories='[1,')
+
+    response = client.post('/knowledge/json/repair', json={'batch_size': 10})
+
+    assert response.status_code == 200
+    assert response.get_json()['repaired']['long_term_memory'] == 1
@@ -0,0 +1,121 @@
+import pytest
+
+from src.models.knowledge_base import db
+from src.models.knowledge_models import ErrorResolution
+from backend.error_aggregator import error_aggregator, error_fingerprint
+from backend.search_index import ERROR_LOG, ERROR_AGGREGATE
+from backend.similar_errors import SimilarErrorFinder, similar_errors
+
+
+@pytest.fixture(autouse=True)
+def fresh_lookups():
+    similar_errors.invalidate()
+    yield
+    similar_errors.invalidate()
+
+
+def log_error(client, description, error_type='timeout', fix=None):
+    error_id = client.post('/errors', json={'error_type': error_type, 'description': description}).get_json()['id']
+    if fix is not None:
+        client.put(f'/errors/{error_id}/resolve', json={'corrective_action': fix})
+    return error_id
+
+
+def test_similar_endpoint_lists_resolved_errors_with_fixes(client):
+    fixed = log_error(client, 'Upstream payment gateway timed out', fix='Raise the gateway timeout')
+    log_error(client, 'Upstream payment gateway refused the card')
+    log_error(client, 'Upstream payment gateway timed out again', fix='')
+    new = log_error(client, 'Payment gateway timed out during checkout')
+
+    similar = client.get(f'/errors/{new}/similar').get_json()['similar_errors']
+
+    assert [(result['source'], result['id']) for result in similar] == [(ERROR_LOG, fixed)]
+    assert similar[0]['corrective_action'] == 'Raise the gateway timeout'
+    assert similar[0]['matched_terms'] >= 2
+    assert client.get(f'/errors/{fixed}/similar').get_json()['similar_errors'] == []
+
+
+def test_aggregated_errors_take_their_fix_from_the_resolution(client):
+    error_aggregator.record('crash', 'Worker crashed while compacting the journal')
+    error_aggregator.flush()
+    fingerprint = error_fingerprint('crash', 'Worker crashed while compacting the journal')
+
+    assert similar_errors.lookup('journal compacting crashed') == []
+    client.put(f'/errors/fingerprints/{fingerprint}/resolve', json={'corrective_action': 'Free disk space'})
+
+    found = similar_errors.lookup('journal compacting crashed')
+    assert [(result['source'], result['corrective_action']) for result in found] == [
+        (ERROR_AGGREGATE, 'Free disk space')
+    ]
+
+
+def test_repeats_of_one_error_are_listed_once_newest_first(client):
+    log_error(client, 'Disk quota exceeded on volume 3', fix='Old fix')
+    newest = log_error(client, 'Disk quota exceeded on volume 7', fix='New fix')
+    finder = SimilarErrorFinder()
+
+    found = finder.find('disk quota exceeded')
+
+    assert [(result['id'], result['corrective_action']) for result in found] == [(newest, 'New fix')]
+
+
+def test_lookups_are_cached_until_invalidated_or_expired(client):
+    log_error(client, 'Cache server connection reset', fix='Restart the cache')
+    finder = SimilarErrorFinder()
+
+    first = finder.lookup('cache server connection reset')
+    log_error(client, 'Cache server connection reset by peer', error_type='network', fix='Check the proxy')
+    assert finder.lookup('cache server connection reset') == first
+    assert finder.get_stats()['hits'] == 1
+
+    finder.invalidate()
+    assert len(finder.lookup('cache server connection reset')) == 2
+
+    expiring = SimilarErrorFinder(ttl_seconds=0)
+    expiring.lookup('cache server connection reset')
+    expiring.lookup('cache server connection reset')
+    assert expiring.get_stats()['misses'] == 2
+
+
+def test_exclude_keeps_the_list_full(client):
+    ids = [log_error(client, f'Queue {name} overflowed its buffer', error_type=name, fix=f'Grow {name}')
+           for name in ('alpha', 'beta', 'gamma', 'delta')]
+    finder = SimilarErrorFinder(limit=3)
+
+    found = finder.lookup('queue overflowed buffer', exclude={'source': ERROR_LOG, 'id': ids[-1]})
+
+    assert len(found) == 3
+    assert ids[-1] not in [result['id'] for result in found]
+
+
+def test_slow_lookups_pause_uncached_lookups(client):
+    log_error(client, 'Index rebuild stalled', fix='Rebuild offline')
+    finder = SimilarErrorFinder(latency_budget_ms=-1, cooldown_seconds=60)
+
+    assert len(finder.lookup('index rebuild stalled')) == 1
+    assert finder.lookup('index rebuild stalled')[0]['corrective_action'] == 'Rebuild offline'
+    assert finder.lookup('different index rebuild question') == []
+    stats = finder.get_stats()
+    assert (stats['over_budget'], stats['skipped'], stats['paused']) == (1, 1, True)
+
+
+def test_failed_lookup_returns_nothing(app, monkeypatch):
+    finder = SimilarErrorFinder()
+
+    def fail(description):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(finder, 'find', fail)
+
+    assert finder.lookup('anything at all') == []
+
+
+def test_record_resolution_upserts_and_ignores_empty_fixes(app):
+    finder = SimilarErrorFinder()
+
+    finder.record_resolution('abc', '')
+    finder.record_resolution('abc', 'First fix')
+    finder.record_resolution('abc', 'Second fix')
+    db.session.commit()
+
+    assert [row.corrective_action for row in ErrorResolution.query.all()] == ['Second fix']
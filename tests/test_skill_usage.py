@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pytest
+
+from src.models.memory_system import db, ProceduralMemory
+from backend.skill_usage import SkillUsageAggregator
+
+
+def add_skill(name, usage_count=0, success_rate=0.0, last_used=None):
+    skill = ProceduralMemory(skill_name=name, description=name, steps='[]', usage_count=usage_count,
+                             success_rate=success_rate, last_used=last_used)
+    db.session.add(skill)
+    db.session.commit()
+    return skill.id
+
+
+def test_flush_folds_uses_into_a_running_mean(app):
+    skill_id = add_skill('deploy', usage_count=2, success_rate=0.5, last_used=datetime(2026, 1, 1))
+    usage = SkillUsageAggregator()
+
+    usage.record(skill_id, True, used_at=datetime(2026, 3, 1))
+    usage.record(skill_id, True, used_at=datetime(2026, 2, 1))
+
+    assert usage.flush() == 1
+    assert usage.flush() == 0
+    db.session.expire_all()
+    skill = db.session.get(ProceduralMemory, skill_id)
+    assert skill.usage_count == 4
+    assert skill.success_rate == pytest.approx(0.75)
+    assert skill.last_used == datetime(2026, 3, 1)
+
+
+def test_leaderboard_includes_unflushed_uses(app):
+    steady = add_skill('steady', usage_count=10, success_rate=0.8)
+    rising = add_skill('rising')
+    add_skill('unused')
+    usage = SkillUsageAggregator()
+
+    usage.record_many([rising, rising], True)
+    usage.record(steady, False)
+
+    by_rate = usage.leaderboard(order_by='success_rate')
+    by_count = usage.leaderboard(order_by='usage_count', limit=1)
+
+    assert [row['skill_name'] for row in by_rate] == ['rising', 'steady']
+    assert by_rate[1]['success_rate'] == pytest.approx(8 / 11)
+    assert [row['skill_name'] for row in by_count] == ['steady']
+    with pytest.raises(ValueError):
+        usage.leaderboard(order_by='name')
+
+
+def test_skills_created_after_the_baseline_are_picked_up(app):
+    usage = SkillUsageAggregator()
+    usage.load()
+    skill_id = add_skill('late')
+
+    usage.record(skill_id, True)
+    usage.record(987654, True)
+
+    assert [row['skill_name'] for row in usage.leaderboard()] == ['late']
+
+
+def test_failed_flush_keeps_the_deltas(app, monkeypatch):
+    skill_id = add_skill('flaky')
+    usage = SkillUsageAggregator()
+    usage.record(skill_id, True)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(db.session, 'execute', fail)
+    with pytest.raises(RuntimeError):
+        usage.flush()
+    monkeypatch.undo()
+
+    usage.record(skill_id, False)
+    assert usage.flush() == 1
+    db.session.expire_all()
+    assert db.session.get(ProceduralMemory, skill_id).usage_count == 2
+
+
+def test_stop_flushes_pending_uses(app):
+    skill_id = add_skill('shutdown')
+    usage = SkillUsageAggregator(flush_interval=60)
+    usage.start(app)
+    usage.record(skill_id, True)
+
+    usage.stop()
+
+    db.session.expire_all()
+    assert db.session.get(ProceduralMemory, skill_id).usage_count == 1
@@ -0,0 +1,83 @@
+import pytest
+
+from src.models.knowledge_base import db, KnowledgeEntry
+from src.models.knowledge_models import KnowledgeSnippet
+from backend.serializers import knowledge_context_serializer
+from backend.snippets import KnowledgeSnippets, make_snippet, estimate_tokens, ELLIPSIS
+
+
+def snippet_of(entry_id):
+    row = KnowledgeSnippet.query.filter_by(entry_id=entry_id).one_or_none()
+    return row.snippet if row else None
+
+
+def test_estimate_tokens_counts_words():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('one two three, four!') == 6
+
+
+def test_snippet_keeps_whole_leading_sentences_within_budget():
+    content = 'First short one. Second is here!   Third runs on for quite a few more words than the others?'
+
+    assert make_snippet(content, 6) == ('First short one.', 4)
+    assert make_snippet(content, 10)[0] == 'First short one. Second is here!'
+    assert make_snippet(content, 1000)[0] == content.replace('   ', ' ')
+
+
+def test_line_breaks_and_arabic_stops_end_sentences():
+    assert make_snippet('Heading\nbody text that goes on and on', 3)[0] == 'Heading'
+    assert make_snippet('مرحبا بكم؟ كيف', 3)[0] == 'مرحبا بكم؟'
+
+
+def test_overlong_first_sentence_is_cut_at_a_word():
+    snippet, tokens = make_snippet('alpha beta, gamma delta epsilon zeta eta theta.', 3)
+
+    assert snippet == 'alpha beta' + ELLIPSIS
+    assert tokens <= 3
+
+
+@pytest.mark.parametrize('content', [None, '', '  \n\t '])
+def test_empty_content_has_an_empty_snippet(content):
+    assert make_snippet(content, 60) == ('', 0)
+
+
+def test_endpoints_keep_snippets_in_step_with_content(client):
+    entry_id = client.post('/knowledge', json={'category': 'notes', 'title': 'retries',
+                                               'content': 'Retries back off. Details follow.'}).get_json()['id']
+    assert snippet_of(entry_id) == 'Retries back off. Details follow.'
+
+    client.put(f'/knowledge/{entry_id}', json={'content': 'Rewritten body.'})
+    assert snippet_of(entry_id) == 'Rewritten body.'
+
+    client.delete(f'/knowledge/{entry_id}')
+    assert snippet_of(entry_id) is None
+
+
+def test_backfill_cuts_missing_and_rebudgeted_snippets(app):
+    entries = [KnowledgeEntry(category='notes', title=f'entry {i}', content=f'Sentence {i} here. Another one.')
+               for i in range(3)]
+    db.session.add_all(entries)
+    db.session.commit()
+    KnowledgeSnippets(token_budget=60).set(entries[0].id, entries[0].content)
+    db.session.commit()
+
+    assert KnowledgeSnippets(token_budget=60).backfill(batch_size=1)['processed'] == 2
+    assert KnowledgeSnippets(token_budget=60).backfill()['processed'] == 0
+
+    result = KnowledgeSnippets(token_budget=4).backfill()
+    assert result['processed'] == 3
+    assert snippet_of(entries[1].id) == 'Sentence 1 here.'
+
+
+def test_context_projection_falls_back_to_a_content_prefix(app):
+    cut = KnowledgeEntry(category='notes', title='cut', content='Short. ' + 'word ' * 100)
+    uncut = KnowledgeEntry(category='notes', title='uncut', content='x' * 300)
+    db.session.add_all([cut, uncut])
+    db.session.flush()
+    KnowledgeSnippets(token_budget=4).set(cut.id, cut.content)
+    db.session.commit()
+
+    rows = knowledge_context_serializer.dicts(knowledge_context_serializer.query().order_by(KnowledgeEntry.id).all())
+
+    assert [row['snippet'] for row in rows] == ['Short.', 'x' * 200]
+    assert 'content' not in rows[0]
@@ -0,0 +1,76 @@
+import json
+
+from src.models.knowledge_base import db, KnowledgeEntry
+from backend.tag_index import TagIndex, KNOWLEDGE, normalize_tags
+
+
+def add_entry(title, tags):
+    entry = KnowledgeEntry(category='notes', title=title, content=f'{title} body', tags=json.dumps(tags))
+    db.session.add(entry)
+    db.session.commit()
+    return entry.id
+
+
+def counts(index):
+    return {row['tag']: row['count'] for row in index.cardinality(KNOWLEDGE)}
+
+
+def test_normalize_tags_accepts_lists_and_json_text():
+    assert normalize_tags([' a', 'b', 'a', '', 3]) == ['a', 'b']
+    assert normalize_tags('["x", "y"]') == ['x', 'y']
+    assert normalize_tags('not json') == []
+    assert normalize_tags(None) == []
+
+
+def test_set_tags_maintains_rows_and_counters(app):
+    index = TagIndex()
+    first = add_entry('first', [])
+    second = add_entry('second', [])
+
+    index.set_tags_bulk(KNOWLEDGE, {first: ['python', 'flask'], second: ['python']})
+    index.set_tags(KNOWLEDGE, first, ['python', 'sqlite'])
+    db.session.commit()
+
+    assert sorted(index.tags_for(KNOWLEDGE, first)) == ['python', 'sqlite']
+    assert counts(index) == {'python': 2, 'sqlite': 1}
+
+    index.remove(KNOWLEDGE, [first, second])
+    db.session.commit()
+    assert counts(index) == {}
+
+
+def test_ids_with_all_tags_requires_every_tag(app):
+    index = TagIndex()
+    both = add_entry('both', [])
+    one = add_entry('one', [])
+    index.set_tags_bulk(KNOWLEDGE, {both: ['a', 'b'], one: ['a']})
+    db.session.commit()
+
+    matches = db.session.query(index.ids_with_all_tags(KNOWLEDGE, ['a', 'b']).c.entity_id).all()
+
+    assert [row[0] for row in matches] == [both]
+
+
+def test_backfill_indexes_existing_rows(app):
+    index = TagIndex()
+    for i in range(5):
+        add_entry(f'entry {i}', ['legacy'] if i % 2 else ['legacy', 'odd'])
+
+    result = index.backfill(KNOWLEDGE, batch_size=2)
+
+    assert result['processed'] == 5
+    assert counts(index) == {'legacy': 5, 'odd': 3}
+    assert index.backfill(KNOWLEDGE)['processed'] == 5
+    assert counts(index) == {'legacy': 5, 'odd': 3}
+
+
+def test_listing_filters_by_tags_through_the_index(client):
+    for title, tags in (('alpha', ['x', 'y']), ('beta', ['x']), ('gamma', ['y'])):
+        client.post('/knowledge', json={'category': 'notes', 'title': title, 'content': f'{title} body', 'tags': tags})
+
+    titles = {entry['title'] for entry in client.get('/knowledge?tags=x,y').get_json()['entries']}
+    cardinality = client.get('/knowledge/tags').get_json()['tags']
+
+    assert titles == {'alpha'}
+    assert {row['tag']: row['count'] for row in cardinality} == {'x': 2, 'y': 2}
+    assert len(client.get('/knowledge?tags=%20').get_json()['entries']) == 3